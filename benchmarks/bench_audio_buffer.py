@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+音频缓冲区微基准测试
+对比旧的逐块 np.concatenate 累积方式与 AudioRingBuffer 的耗时和内存分配
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.ring_buffer import AudioRingBuffer
+
+SAMPLE_RATE = 16000
+CHUNK_SIZE = 1024
+BUFFER_DURATION = 5.0
+
+
+class ConcatBuffer:
+    """旧实现：每个回调块都拼接整个缓冲区"""
+
+    def __init__(self):
+        self.required = int(SAMPLE_RATE * BUFFER_DURATION)
+        self.buffer = np.array([], dtype=np.float32)
+
+    def push(self, chunk: np.ndarray):
+        self.buffer = np.concatenate([self.buffer, chunk])
+        if len(self.buffer) >= self.required:
+            window = np.array(self.buffer)
+            self.buffer = np.array([], dtype=np.float32)
+            return window
+        return None
+
+
+class RingBuffer:
+    """新实现：写入预分配的环形缓冲区，窗口零拷贝读取"""
+
+    def __init__(self):
+        self.required = int(SAMPLE_RATE * BUFFER_DURATION)
+        self.buffer = AudioRingBuffer(self.required * 2)
+
+    def push(self, chunk: np.ndarray):
+        self.buffer.write(chunk)
+        if len(self.buffer) >= self.required:
+            window = self.buffer.view()
+            self.buffer.clear()
+            return window
+        return None
+
+
+def measure(factory, chunks, audio_seconds: float, repeat: int) -> dict:
+    """测量每秒音频的耗时与内存分配"""
+    best = float("inf")
+    for _ in range(repeat):
+        impl = factory()
+        start = time.perf_counter()
+        for chunk in chunks:
+            impl.push(chunk)
+        best = min(best, time.perf_counter() - start)
+
+    # 逐块统计临时分配：每次push前重置峰值，峰值增量即该次调用新分配的内存
+    # 只统计不小于 1 KiB 的分配（音频数组），忽略解释器自身的小对象
+    impl = factory()
+    tracemalloc.start()
+    allocations = 0
+    allocated_bytes = 0
+    for chunk in chunks:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        impl.push(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+        if peak - current >= 1024:
+            allocations += 1
+            allocated_bytes += peak - current
+    tracemalloc.stop()
+
+    return {
+        "us_per_audio_second": best / audio_seconds * 1e6,
+        "allocating_calls_per_audio_second": allocations / audio_seconds,
+        "kib_allocated_per_audio_second": allocated_bytes / 1024 / audio_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="音频缓冲区微基准测试")
+    parser.add_argument("--seconds", type=float, default=60.0, help="模拟输入的音频时长（秒）")
+    parser.add_argument("--repeat", type=int, default=5, help="计时重复次数（取最优）")
+    args = parser.parse_args()
+
+    n_chunks = int(args.seconds * SAMPLE_RATE / CHUNK_SIZE)
+    rng = np.random.default_rng(0)
+    chunks = [rng.standard_normal(CHUNK_SIZE).astype(np.float32) for _ in range(n_chunks)]
+    audio_seconds = n_chunks * CHUNK_SIZE / SAMPLE_RATE
+
+    print(f"=== 音频缓冲区基准: {audio_seconds:.1f}s 音频, 块大小 {CHUNK_SIZE}, 窗口 {BUFFER_DURATION}s ===")
+    results = {
+        "concatenate": measure(ConcatBuffer, chunks, audio_seconds, args.repeat),
+        "ring_buffer": measure(RingBuffer, chunks, audio_seconds, args.repeat),
+    }
+    for name, result in results.items():
+        print(
+            f"{name:>12}: {result['us_per_audio_second']:8.1f} µs/音频秒, "
+            f"分配调用 {result['allocating_calls_per_audio_second']:6.1f} 次/音频秒, "
+            f"分配量 {result['kib_allocated_per_audio_second']:8.1f} KiB/音频秒"
+        )
+
+    speedup = results["concatenate"]["us_per_audio_second"] / results["ring_buffer"]["us_per_audio_second"]
+    print(f"加速比: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+音频回调基准测试
+对比旧回调（每块 indata.copy().flatten() + call_soon_threadsafe 入队）与预分配帧池回调的
+单次耗时分布和内存分配，可选在后台线程制造CPU负载（模拟并发的Whisper推理）
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    from src.audio_capture import AudioCapture
+except ImportError as e:  # sounddevice/PortAudio 不可用
+    print(f"无法导入AudioCapture: {e}")
+    sys.exit(1)
+
+from src.pipeline import AudioFrame
+
+
+class LegacyCallback:
+    """旧实现：每块复制一份数据并通过 call_soon_threadsafe 交给事件循环入队"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=32)
+
+    def _enqueue(self, frame):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(frame)
+
+    def __call__(self, indata, frames, time_info, status):
+        captured_at = time.perf_counter()
+        audio_data = indata.copy().flatten()
+        self.loop.call_soon_threadsafe(self._enqueue, AudioFrame(audio_data, captured_at))
+
+
+def make_pooled(loop, blocksize, channels):
+    capture = AudioCapture(buffer_size=32)
+    capture._loop = loop
+    capture._data_ready = asyncio.Event()
+    capture._wake = lambda: loop.call_soon_threadsafe(capture._data_ready.set)
+    capture._allocate_pool(blocksize, channels)
+    capture.is_recording = True
+    return capture._audio_callback, capture
+
+
+def measure(callback, indata, blocks, drain):
+    """在独立线程中模拟音频线程连续调用回调，返回 (每次耗时数组, 分配字节数)"""
+    durations = np.zeros(blocks)
+    frames = len(indata)
+
+    def run():
+        for i in range(blocks):
+            started = time.perf_counter()
+            callback(indata, frames, None, None)
+            durations[i] = time.perf_counter() - started
+            if i % 16 == 15:
+                drain()
+
+    tracemalloc.start()
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return durations, peak
+
+
+def burn(stop: threading.Event):
+    """后台CPU负载（numpy运算会释放GIL，纯Python循环则会争用GIL）"""
+    while not stop.is_set():
+        sum(i * i for i in range(10000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="音频回调耗时与分配基准测试")
+    parser.add_argument("--blocks", type=int, default=5000, help="模拟的回调次数")
+    parser.add_argument("--rate", type=int, default=48000)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--load-threads", type=int, default=0, help="后台纯Python负载线程数（争用GIL）")
+    args = parser.parse_args()
+
+    blocksize = round(1024 * args.rate / 16000)
+    indata = np.random.default_rng(0).normal(0, 0.1, (blocksize, args.channels)).astype(np.float32)
+    loop = asyncio.new_event_loop()
+
+    stop = threading.Event()
+    workers = [threading.Thread(target=burn, args=(stop,), daemon=True) for _ in range(args.load_threads)]
+    for worker in workers:
+        worker.start()
+
+    legacy = LegacyCallback(loop)
+    pooled, capture = make_pooled(loop, blocksize, args.channels)
+    capture._waiting = True
+    # 消费端：事件循环处理已调度的回调 / 读取帧池（模拟消费者跟得上的情况）
+    drain_loop = lambda: (loop.call_soon(loop.stop), loop.run_forever())
+
+    def drain_pool():
+        # 消费者读完后重新进入等待，下一块到达时回调需要唤醒它（与实际运行时相同）
+        capture._read = capture._written
+        drain_loop()
+        capture._waiting = True
+
+    print(
+        f"=== 音频回调基准: {args.blocks} 块 × {blocksize} 帧 × {args.channels} 声道, "
+        f"后台负载线程 {args.load_threads} ==="
+    )
+    try:
+        for name, callback, drain in (("旧回调(复制+入队)", legacy, drain_loop), ("帧池回调", pooled, drain_pool)):
+            durations, peak = measure(callback, indata, args.blocks, drain)
+            us = durations * 1e6
+            print(
+                f"{name:14s} | p50 {np.percentile(us, 50):6.1f}us  p99 {np.percentile(us, 99):7.1f}us  "
+                f"最大 {us.max():8.1f}us | 峰值分配 {peak / 1024:7.1f}KB"
+            )
+    finally:
+        stop.set()
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+解码配置基准测试
+在一组固定的WAV样本上对比 realtime / balanced / accurate 解码配置的实时率(RTF)，
+样本旁有同名 .txt 参考文本时同时计算词错误率(WER)
+
+默认使用仓库中的 benchmarks/fixtures/*.wav 样本及其参考文本；也可在命令行指定其他WAV
+（任意采样率的16位PCM，多声道会混为单声道，参考文本可选）
+"""
+import argparse
+import glob
+import re
+import sys
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+from scipy.signal import resample_poly
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.transcription import DECODING_PROFILES, WhisperTranscriber
+
+SAMPLE_RATE = 16000
+
+
+def load_wav(path: str) -> np.ndarray:
+    """读取16位PCM WAV，转换为16kHz单声道float32"""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: 只支持16位PCM")
+        rate, channels = f.getframerate(), f.getnchannels()
+        audio = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    audio = audio.reshape(-1, channels).mean(axis=1).astype(np.float32) / 32768.0
+    if rate != SAMPLE_RATE:
+        divisor = np.gcd(rate, SAMPLE_RATE)
+        audio = resample_poly(audio, SAMPLE_RATE // divisor, rate // divisor).astype(np.float32)
+    return audio
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """词级编辑距离 / 参考词数"""
+    normalize = lambda text: re.sub(r"[^\w\s']", " ", text.lower()).split()
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解码配置实时率基准测试")
+    parser.add_argument("wavs", nargs="*", help="WAV文件（默认 benchmarks/fixtures/*.wav）")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--threads", type=int, default=0, help="推理线程数，0为自动")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--profiles", nargs="+", default=list(DECODING_PROFILES), choices=list(DECODING_PROFILES))
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    paths = args.wavs or sorted(glob.glob(str(Path(__file__).parent / "fixtures" / "*.wav")))
+    if not paths:
+        sys.exit("❌ 未找到WAV样本：benchmarks/fixtures/ 中的样本随仓库提供，请检查检出是否完整（见 benchmarks/fixtures/README.md）")
+    missing = [path for path in paths if not Path(path).is_file()]
+    if not args.wavs:
+        # 自带样本必须有参考文本，否则WER会被悄悄跳过
+        missing += [str(Path(path).with_suffix(".txt")) for path in paths if not Path(path).with_suffix(".txt").is_file()]
+    if missing:
+        sys.exit(f"❌ 样本文件不存在: {', '.join(missing)}")
+    fixtures = [(Path(p).name, load_wav(p), Path(p).with_suffix(".txt")) for p in paths]
+    total_audio = sum(len(audio) for _, audio, _ in fixtures) / SAMPLE_RATE
+
+    transcriber = WhisperTranscriber(
+        model_name=args.model, device=args.device, compute_type=args.compute_type,
+        cpu_threads=args.threads, language=args.language,
+    )
+    transcriber.preload().result()
+    print(
+        f"=== 解码配置基准: 模型 {args.model}/{args.compute_type}, {len(fixtures)} 个样本共 {total_audio:.1f}s, "
+        f"加载 {transcriber.load_seconds:.2f}s ==="
+    )
+
+    for name in args.profiles:
+        profile = DECODING_PROFILES[name]
+        elapsed, errors = 0.0, []
+        for _ in range(args.repeat):
+            for fixture, audio, reference in fixtures:
+                started = time.perf_counter()
+                segments, _ = transcriber._decode(audio, profile)
+                elapsed += time.perf_counter() - started
+                if reference.exists():
+                    text = " ".join(segment.text.strip() for segment in segments)
+                    errors.append(word_error_rate(reference.read_text(encoding="utf-8"), text))
+
+        rtf = elapsed / (total_audio * args.repeat)
+        wer = f"WER {np.mean(errors):6.1%}" if errors else "WER   -"
+        print(
+            f"{name:9s} | beam {profile.beam_size} best_of {profile.best_of} 温度 {len(profile.temperature)}档 | "
+            f"RTF {rtf:.3f} ({1 / rtf if rtf else float('inf'):5.1f}x 实时) | {wer}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+端到端流水线基准测试
+用固定的WAV样本驱动完整流水线（采集回放 → VAD → Whisper → 翻译 → 字幕渲染），
+翻译默认指向单独进程中的本地模拟服务（可配置延迟）。
+
+报告实时率(RTF)、各阶段 p50/p95/p99 延迟、CPU占用和峰值内存，结果保存为JSON，
+用 --compare 与之前某次提交的结果对比，超过阈值的退化会被标出（退出码为1）。
+
+默认使用仓库中的 benchmarks/fixtures/*.wav 样本（与 bench_decoding_profiles.py 相同，见该目录的README）
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import wave
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import main as app_main  # 导入时会加载 .env，基准配置需在此之后设置
+from benchmarks.bench_decoding_profiles import SAMPLE_RATE, load_wav
+from src.file_source import FileAudioSource
+from src.resilience import AdaptiveRateLimiter, ResilientCaller
+from src.subtitle_overlay import SimpleConsoleOverlay, SubtitleOverlay
+from src.transcription import DECODING_PROFILES, WhisperTranscriber
+from src.translators import TRANSLATORS, create_translator
+from src.vad import VoiceActivityDetector
+
+# 对比时检查的指标（均为越大越差）
+COMPARED_METRICS = (
+    "rtf",
+    "asr_rtf",
+    "cpu_percent",
+    "peak_rss_mb",
+    "stages.asr.p95_ms",
+    "stages.translate.p95_ms",
+    "stages.render.p95_ms",
+    "stages.end_to_end.p50_ms",
+    "stages.end_to_end.p95_ms",
+    "stages.end_to_end.p99_ms",
+)
+
+
+def build_input(paths, gap: float) -> tuple:
+    """把样本拼接为一个16kHz单声道WAV（样本之间插入静音，让VAD切分语句），返回 (路径, 时长)"""
+    silence = np.zeros(int(gap * SAMPLE_RATE), dtype=np.float32)
+    parts = []
+    for path in paths:
+        parts += [load_wav(path), silence]
+    audio = np.concatenate(parts)
+    handle, output = tempfile.mkstemp(prefix="bench_pipeline_", suffix=".wav")
+    os.close(handle)
+    with wave.open(output, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+    return output, len(audio) / SAMPLE_RATE
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_server(latency: float, token_interval: float) -> tuple:
+    """在独立进程中启动模拟翻译服务（不计入被测进程的CPU和内存），返回 (进程, base_url)"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, str(Path(__file__).parent / "mock_kimi_server.py"), "--port", str(port),
+         "--latency", str(latency), "--token-interval", str(token_interval)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}/v1"
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{base_url}/models", timeout=0.5).close()
+            return process, base_url
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("模拟翻译服务启动失败")
+
+
+def cpu_seconds() -> float:
+    """本进程累计的用户态+内核态CPU时间"""
+    if resource:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+    return time.process_time()
+
+
+def peak_rss_mb():
+    """本进程峰值常驻内存(MB)；无法获取时返回None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 为字节
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{revision}-dirty" if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_pipeline(args, input_path: str) -> dict:
+    """运行一次完整流水线，返回流水线统计和资源占用"""
+    logger = logging.getLogger("bench")
+
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    transcriber = WhisperTranscriber(
+        model_name=args.model, device=args.device, compute_type=args.compute_type,
+        cpu_threads=args.threads, language=args.language, profile=args.profile,
+        adaptive=args.adaptive, streaming=args.streaming,
+    )
+    # 模型加载和预热不计入结果
+    transcriber.preload().result()
+
+    translator = create_translator(
+        args.translator,
+        # 模拟服务没有配额，去掉客户端限流
+        resilience=ResilientCaller(limiter=AdaptiveRateLimiter(rate=1000, burst=1000)),
+    )
+    overlay = SubtitleOverlay() if args.gui else SimpleConsoleOverlay()
+    source = FileAudioSource(input_path, realtime=not args.fast)
+    app = app_main.Application(
+        transcriber=transcriber,
+        translator=translator,
+        audio_capture=source,
+        overlay=overlay,
+        logger=logger,
+        vad=VoiceActivityDetector(sample_rate=SAMPLE_RATE, backend="energy"),
+    )
+
+    cpu_started, started = cpu_seconds(), time.perf_counter()
+    try:
+        app.start()
+    except SystemExit:
+        pass
+    wall = time.perf_counter() - started
+    stats = app.get_pipeline_stats()
+    return {
+        "stats": stats,
+        "wall_seconds": wall,
+        "cpu_percent": (cpu_seconds() - cpu_started) / wall * 100,
+        "peak_rss_mb": peak_rss_mb(),
+        "load_seconds": transcriber.load_seconds,
+        "warmup_seconds": transcriber.warmup_seconds,
+    }
+
+
+def lookup(result: dict, key: str):
+    for part in key.split("."):
+        if not isinstance(result, dict) or part not in result:
+            return None
+        result = result[part]
+    return result
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> int:
+    """打印与基线的差异，返回超过阈值的退化项数"""
+    print(f"\n=== 与基线对比: {baseline.get('revision')} ({baseline.get('timestamp')}) ===")
+    changed = [key for key, value in result["config"].items() if baseline.get("config", {}).get(key) != value]
+    if changed:
+        print(f"注意: 基准配置不同（{', '.join(changed)}），结果可能不可比")
+    regressions = 0
+    for key in COMPARED_METRICS:
+        old, new = lookup(baseline, key), lookup(result, key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        regressed = change > threshold
+        regressions += regressed
+        print(f"{key:28s} {old:10.2f} → {new:10.2f} ({change:+7.1%}){'  ⚠️ 退化' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端流水线基准测试")
+    parser.add_argument("wavs", nargs="*", help="WAV文件（默认 benchmarks/fixtures/*.wav）")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--threads", type=int, default=0, help="推理线程数，0为自动")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--profile", default="balanced", choices=list(DECODING_PROFILES))
+    parser.add_argument("--adaptive", action=argparse.BooleanOptionalAction, default=True,
+                        help="负载高时自动切换到贪心解码")
+    parser.add_argument("--streaming", action="store_true", help="使用流式识别")
+    parser.add_argument("--translator", default="kimi", help=f"翻译后端，可选: {', '.join(sorted(TRANSLATORS))}")
+    parser.add_argument("--latency", type=float, default=0.15, help="模拟翻译服务延迟（秒）")
+    parser.add_argument("--token-interval", type=float, default=0.0, help="模拟服务流式token间隔（秒）")
+    parser.add_argument("--gap", type=float, default=1.0, help="样本之间插入的静音（秒）")
+    parser.add_argument("--fast", action="store_true",
+                        help="全速回放（测吞吐）；默认按真实时间回放（测延迟）")
+    parser.add_argument("--gui", action="store_true", help="使用Tk字幕窗口渲染（需要显示器）")
+    parser.add_argument("--output", help="结果JSON路径（默认 benchmarks/results/pipeline-<提交>-<时间>.json）")
+    parser.add_argument("--compare", help="与之前的结果JSON对比")
+    parser.add_argument("--threshold", type=float, default=0.10, help="判定退化的相对变化阈值")
+    args = parser.parse_args()
+
+    paths = args.wavs or sorted(str(p) for p in (Path(__file__).parent / "fixtures").glob("*.wav"))
+    if not paths:
+        sys.exit("❌ 未找到WAV样本：benchmarks/fixtures/ 中的样本随仓库提供，请检查检出是否完整（见 benchmarks/fixtures/README.md）")
+    missing = [path for path in paths if not Path(path).is_file()]
+    if missing:
+        sys.exit(f"❌ WAV样本不存在: {', '.join(missing)}")
+
+    logging.disable(logging.WARNING)
+    input_path, audio_seconds = build_input(paths, args.gap)
+    server = None
+    try:
+        if args.translator in ("kimi", "openai", "local"):
+            server, base_url = start_mock_server(args.latency, args.token_interval)
+            for name in ("KIMI_BASE_URL", "OPENAI_BASE_URL", "LOCAL_TRANSLATION_BASE_URL"):
+                os.environ[name] = base_url
+            os.environ["KIMI_API_KEY"] = os.environ["OPENAI_API_KEY"] = "mock-key"
+        os.environ.setdefault("PIPELINE_STATS_INTERVAL", "0")
+        os.environ.setdefault("TRANSLATION_CACHE_SIZE", "0")
+
+        mode = "全速" if args.fast else "实时"
+        print(
+            f"=== 流水线基准: {len(paths)} 个样本共 {audio_seconds:.1f}s ({mode}回放), "
+            f"模型 {args.model}/{args.compute_type}/{args.profile}, 翻译 {args.translator} ==="
+        )
+        run = run_pipeline(args, input_path)
+    finally:
+        os.remove(input_path)
+        if server:
+            server.terminate()
+            server.wait()
+
+    stats = run["stats"]
+    stages = {
+        name: {key: round(value, 3) if isinstance(value, float) else value for key, value in stage.items()}
+        for name, stage in stats["stages"].items()
+    }
+    transcription = stats["transcription"]
+    result = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "wavs")},
+        "system": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "fixtures": [Path(p).name for p in paths],
+        "audio_seconds": audio_seconds,
+        "wall_seconds": run["wall_seconds"],
+        "rtf": run["wall_seconds"] / audio_seconds,
+        "asr_rtf": transcription["realtime_factor"],
+        "cpu_percent": run["cpu_percent"],
+        "peak_rss_mb": run["peak_rss_mb"],
+        "load_seconds": run["load_seconds"],
+        "warmup_seconds": run["warmup_seconds"],
+        "sentences": stages["end_to_end"]["count"],
+        "fast_path_decodes": transcription["fast_path_decodes"],
+        "stages": stages,
+        "queues": stats["queues"],
+        "capture_dropped": stats["capture"]["dropped_chunks"],
+    }
+
+    print(
+        f"墙钟 {result['wall_seconds']:.2f}s | RTF {result['rtf']:.3f} | "
+        f"识别RTF {result['asr_rtf'] or 0:.3f} | CPU {result['cpu_percent']:.0f}% | "
+        f"峰值内存 {result['peak_rss_mb'] or 0:.0f}MB | {result['sentences']} 句"
+    )
+    for name, stage in stages.items():
+        if stage["count"]:
+            print(
+                f"  {name:13s} n={stage['count']:<4d} p50 {stage['p50_ms']:8.1f}ms  "
+                f"p95 {stage['p95_ms']:8.1f}ms  p99 {stage['p99_ms']:8.1f}ms"
+            )
+
+    output = Path(args.output) if args.output else (
+        Path(__file__).parent / "results" / f"pipeline-{result['revision']}-{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"结果已保存: {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare(result, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+重采样基准测试
+测量把设备原生格式（44.1/48kHz、单/双声道）转换为16kHz单声道的CPU开销（每秒音频的CPU毫秒），
+对比流式多相重采样器与逐块调用 resample_poly，并以整段 resample_poly 的结果为参考计算误差
+"""
+import argparse
+import sys
+import time
+from math import gcd
+from pathlib import Path
+
+import numpy as np
+from scipy.signal import resample_poly
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.resampler import StreamingResampler
+
+OUTPUT_RATE = 16000
+FORMATS = [(44100, 2), (48000, 2), (48000, 1), (96000, 2), (16000, 1)]
+
+
+def make_audio(rate: int, channels: int, seconds: float) -> np.ndarray:
+    """带噪声的扫频信号 [帧, 声道]"""
+    t = np.arange(int(rate * seconds)) / rate
+    sweep = 0.3 * np.sin(2 * np.pi * (100 + 3900 * t / seconds) * t)
+    noise = np.random.default_rng(0).normal(0, 0.02, (len(t), channels))
+    return (sweep[:, None] + noise).astype(np.float32)
+
+
+def blocks(audio: np.ndarray, size: int):
+    for start in range(0, len(audio), size):
+        yield audio[start:start + size]
+
+
+def run_streaming(audio, rate, block_size):
+    resampler = StreamingResampler(rate, OUTPUT_RATE)
+    return np.concatenate([resampler.process(block) for block in blocks(audio, block_size)])
+
+
+def run_per_block(audio, rate, block_size):
+    divisor = gcd(rate, OUTPUT_RATE)
+    up, down = OUTPUT_RATE // divisor, rate // divisor
+    return np.concatenate([
+        resample_poly(block.mean(axis=1), up, down).astype(np.float32) for block in blocks(audio, block_size)
+    ])
+
+
+def cpu_ms_per_second(func, audio, rate, block_size, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        output = func(audio, rate, block_size)
+        best = min(best, time.process_time() - started)
+    return best * 1000 / (len(audio) / rate), output
+
+
+def max_error(output: np.ndarray, reference: np.ndarray, delay: int) -> float:
+    """对齐群延迟后与参考结果的最大绝对误差（忽略首尾滤波器过渡区）"""
+    length = min(len(output) - delay, len(reference)) - 200
+    return float(np.abs(output[delay + 200:delay + length] - reference[200:length]).max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重采样CPU开销基准测试")
+    parser.add_argument("--seconds", type=float, default=30.0, help="每种格式的音频时长")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="输出16kHz下的音频块大小（与采集一致）")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最快一次")
+    args = parser.parse_args()
+
+    print(f"=== 重采样基准: 每种格式 {args.seconds:.0f}s 音频, 输出块 {args.chunk_size} 样本 ===")
+    for rate, channels in FORMATS:
+        audio = make_audio(rate, channels, args.seconds)
+        block_size = round(args.chunk_size * rate / OUTPUT_RATE)
+        divisor = gcd(rate, OUTPUT_RATE)
+        reference = resample_poly(audio.mean(axis=1), OUTPUT_RATE // divisor, rate // divisor)
+
+        streaming_cost, streaming = cpu_ms_per_second(run_streaming, audio, rate, block_size, args.repeat)
+        label = f"{rate / 1000:g}kHz×{channels}"
+        if rate == OUTPUT_RATE:
+            print(f"{label:10s} | 流式 {streaming_cost:6.2f} ms/秒音频（直通，只下混）")
+            continue
+        per_block_cost, per_block = cpu_ms_per_second(run_per_block, audio, rate, block_size, args.repeat)
+        delay = 10  # resample_poly 默认滤波器下采样时的群延迟（输出样本）
+        print(
+            f"{label:10s} | 流式 {streaming_cost:6.2f} ms/秒音频, 误差 {max_error(streaming, reference, delay):.1e} | "
+            f"逐块resample_poly {per_block_cost:6.2f} ms/秒音频, 误差 {max_error(per_block, reference, 0):.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
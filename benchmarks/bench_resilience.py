@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+请求可靠性基准测试
+在注入5xx错误、429限流和长尾延迟的本地模拟服务上，对比 无重试 / 重试 / 重试+对冲 三种策略的
+成功率、延迟分位数和实际发出的请求数
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.mock_kimi_server import MockKimiServer
+from src.resilience import AdaptiveRateLimiter, ResilientCaller, RetryPolicy
+from src.translation import KimiTranslator
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+async def run_strategy(args, name, max_attempts, hedge):
+    server = MockKimiServer(
+        latency=args.latency, token_interval=0.0,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+        tail_rate=args.tail_rate, tail_latency=args.tail_latency, seed=args.seed,
+    )
+    base_url = await server.start()
+    resilience = ResilientCaller(
+        limiter=AdaptiveRateLimiter(rate=args.rate, burst=args.burst),
+        policy=RetryPolicy(max_attempts=max_attempts, deadline=args.deadline),
+        hedge=hedge,
+    )
+    translator = KimiTranslator(api_key=os.getenv("KIMI_API_KEY", "mock-key"), base_url=base_url,
+                                resilience=resilience)
+
+    latencies, succeeded = [], 0
+    try:
+        for i in range(args.requests):
+            started = time.perf_counter()
+            # 每句不同，避免任何层面的缓存
+            result = await translator.translate(f"Sentence number {i} for the resilience benchmark.")
+            latencies.append(time.perf_counter() - started)
+            succeeded += result is not None
+    finally:
+        await translator.close()
+        await server.stop()
+
+    stats = resilience.get_stats()
+    print(
+        f"{name:10s} | 成功 {succeeded / args.requests:6.1%} | "
+        f"p50 {statistics.median(latencies) * 1000:5.0f}ms  p95 {percentile(latencies, 95) * 1000:5.0f}ms  "
+        f"p99 {percentile(latencies, 99) * 1000:5.0f}ms | "
+        f"请求 {server.requests:4d} (429: {server.statuses[429]}, 503: {server.statuses[503]}) | "
+        f"重试 {stats['retries']}  对冲 {stats['hedged']}/胜 {stats['hedge_wins']}"
+    )
+
+
+async def run(args):
+    print(
+        f"=== 可靠性基准: {args.requests} 句, 延迟 {args.latency * 1000:.0f}ms, 503 {args.error_rate:.0%}, "
+        f"429 {args.throttle_rate:.0%}, 长尾 {args.tail_rate:.0%}(+{args.tail_latency * 1000:.0f}ms) ==="
+    )
+    await run_strategy(args, "无重试", max_attempts=1, hedge=False)
+    await run_strategy(args, "重试", max_attempts=args.max_attempts, hedge=False)
+    await run_strategy(args, "重试+对冲", max_attempts=args.max_attempts, hedge=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="请求可靠性基准测试")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="模拟服务基础延迟（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="返回503的比例")
+    parser.add_argument("--throttle-rate", type=float, default=0.03, help="返回429的比例")
+    parser.add_argument("--retry-after", type=float, default=0.2, help="429响应的Retry-After（秒）")
+    parser.add_argument("--tail-rate", type=float, default=0.05, help="长尾延迟请求的比例")
+    parser.add_argument("--tail-latency", type=float, default=1.0, help="长尾请求的额外延迟（秒）")
+    parser.add_argument("--rate", type=float, default=50.0, help="客户端限流速率（次/秒）")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--deadline", type=float, default=5.0, help="单句截止时间（秒）")
+    parser.add_argument("--seed", type=int, default=0)
+    logging.disable(logging.CRITICAL)  # 逐次失败/重试日志会淹没结果
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+流式翻译基准测试
+对比普通翻译和SSE流式翻译的首字可见时间与完整译文时间（使用本地模拟服务）
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.mock_kimi_server import MockKimiServer, fake_translate
+from src.translation import KimiTranslator
+
+SENTENCES = [
+    "Thank you.",
+    "Welcome back to the channel, today we are going to talk about real-time translation.",
+    "The quick brown fox jumps over the lazy dog while the audience watches in silence, "
+    "waiting for the speaker to finish the long and winding sentence about nothing in particular.",
+]
+
+
+async def run(args):
+    server = MockKimiServer(latency=args.latency, token_interval=args.token_interval)
+    base_url = await server.start()
+    translator = KimiTranslator(api_key=os.getenv("KIMI_API_KEY", "mock-key"), base_url=base_url)
+
+    print(f"=== 流式翻译基准: 首字延迟 {args.latency * 1000:.0f}ms, token间隔 {args.token_interval * 1000:.0f}ms ===")
+    try:
+        for sentence in SENTENCES:
+            blocking, first, full = [], [], []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                result = await translator.translate(sentence)
+                blocking.append(time.perf_counter() - started)
+                assert result == fake_translate(sentence)
+
+                started = time.perf_counter()
+                first_at = None
+                async for partial in translator.translate_stream(sentence):
+                    if first_at is None:
+                        first_at = time.perf_counter()
+                first.append(first_at - started)
+                full.append(time.perf_counter() - started)
+                assert partial == fake_translate(sentence)
+
+            print(
+                f"{len(sentence):4d}字符 | 普通: {statistics.median(blocking) * 1000:6.0f}ms | "
+                f"流式首字: {statistics.median(first) * 1000:6.0f}ms, 完整: {statistics.median(full) * 1000:6.0f}ms"
+            )
+    finally:
+        await translator.close()
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式翻译基准测试")
+    parser.add_argument("--latency", type=float, default=0.2, help="模拟服务首字延迟（秒）")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="模拟服务token间隔（秒）")
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
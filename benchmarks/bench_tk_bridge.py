@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+asyncio–Tkinter桥接基准测试
+测量一次字幕更新从"事件循环中该执行的时刻"到"在Tk线程中实际执行"的延迟：
+
+- pump:   旧方案，Tk每50ms调用一次 loop.stop(); loop.run_forever() 驱动事件循环
+- bridge: 事件循环在后台线程持续运行，更新经 TkBridge 以唤醒管道通知Tk线程执行
+
+另外统计 bridge 方案中 call() 在事件循环线程上的耗时（唤醒不应阻塞事件循环）
+
+需要图形界面（macOS 直接运行；Linux 无显示器时可用 xvfb-run）
+"""
+import argparse
+import asyncio
+import random
+import sys
+import threading
+import time
+import tkinter as tk
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.pipeline import StageStats
+from src.tk_bridge import TkBridge
+
+
+async def produce(updates: int, interval: float, submit):
+    """按随机间隔产生更新（模拟识别/翻译结果到达），submit(到期时间) 负责把更新交给界面"""
+    rng = random.Random(0)
+    for _ in range(updates):
+        delay = rng.uniform(0, 2 * interval)
+        due = time.perf_counter() + delay
+        await asyncio.sleep(delay)
+        submit(due)
+
+
+def run_pump(updates: int, interval: float) -> list:
+    """旧方案：事件循环与Tk同在主线程，由 after(50) 驱动"""
+    root = tk.Tk()
+    label = tk.Label(root, text="")
+    label.pack()
+    loop = asyncio.new_event_loop()
+    latencies = []
+
+    def submit(due):
+        label.config(text=str(len(latencies)))
+        latencies.append(time.perf_counter() - due)
+
+    task = loop.create_task(produce(updates, interval, submit))
+
+    def pump():
+        loop.stop()
+        loop.run_forever()
+        if task.done():
+            root.destroy()
+        else:
+            root.after(50, pump)
+
+    root.after(50, pump)
+    root.mainloop()
+    loop.close()
+    return latencies
+
+
+def run_bridge(updates: int, interval: float) -> tuple:
+    """新方案：事件循环在后台线程，经 TkBridge 更新界面"""
+    root = tk.Tk()
+    label = tk.Label(root, text="")
+    label.pack()
+    stats = StageStats("gui_bridge", window=updates)
+    bridge = TkBridge(root, stats=stats)
+    loop = asyncio.new_event_loop()
+    latencies = []
+    call_times = []
+
+    def apply(due):
+        label.config(text=str(len(latencies)))
+        latencies.append(time.perf_counter() - due)
+
+    def submit(due):
+        started = time.perf_counter()
+        bridge.call(apply, due)
+        call_times.append(time.perf_counter() - started)
+
+    async def main():
+        await produce(updates, interval, submit)
+        bridge.call(root.destroy)
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(main(),), daemon=True)
+    thread.start()
+    root.mainloop()
+    bridge.close()
+    thread.join()
+    loop.close()
+    return latencies, stats, call_times
+
+
+def report(name: str, latencies: list):
+    ms = np.array(latencies) * 1000
+    print(
+        f"{name:7s} | p50 {np.percentile(ms, 50):6.2f}ms  p95 {np.percentile(ms, 95):6.2f}ms  "
+        f"p99 {np.percentile(ms, 99):6.2f}ms  最大 {ms.max():6.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="asyncio–Tkinter桥接延迟基准测试")
+    parser.add_argument("--updates", type=int, default=200, help="更新次数")
+    parser.add_argument("--interval", type=float, default=0.03, help="平均更新间隔（秒）")
+    args = parser.parse_args()
+
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        print(f"无法创建Tk窗口（需要图形界面）: {e}")
+        sys.exit(1)
+
+    print(f"=== 界面桥接基准: {args.updates} 次更新，平均间隔 {args.interval * 1000:.0f}ms ===")
+    report("pump", run_pump(args.updates, args.interval))
+    latencies, stats, call_times = run_bridge(args.updates, args.interval)
+    report("bridge", latencies)
+    bridge = stats.get_stats()
+    print(f"         其中桥接队列 p50 {bridge['p50_ms']:.2f}ms  p95 {bridge['p95_ms']:.2f}ms  p99 {bridge['p99_ms']:.2f}ms")
+    us = np.array(call_times) * 1e6
+    print(f"         call() 阻塞事件循环 p50 {np.percentile(us, 50):.1f}us  p99 {np.percentile(us, 99):.1f}us  最大 {us.max():.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+翻译后端基准测试
+用同一组句子对比各翻译后端的逐句延迟(p50/p95)和批量吞吐量（句/秒）
+
+远程后端默认指向本地模拟服务（--mock），加上 --no-mock 则使用 .env 中的真实配置；
+ctranslate2 后端需要先转换模型并设置 CT2_MODEL_PATH。
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.mock_kimi_server import MockKimiServer
+from src.resilience import AdaptiveRateLimiter, ResilientCaller
+from src.translators import TRANSLATORS, create_translator
+
+SENTENCES = [
+    "Thank you.",
+    "Good morning, everyone.",
+    "Welcome back to the channel, today we are going to talk about real-time translation.",
+    "Please make sure your microphone is muted when you are not speaking.",
+    "The results of the experiment were surprising to everyone on the team.",
+    "Let's take a short break and continue in ten minutes.",
+    "Can you share your screen so that we can all see the slides?",
+    "I think we should focus on latency before adding new features.",
+]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+async def bench_backend(service: str, args):
+    try:
+        resilience = None
+        if args.mock:
+            # 模拟服务没有配额，去掉客户端限流，只比较请求本身
+            resilience = ResilientCaller(limiter=AdaptiveRateLimiter(rate=1000, burst=1000))
+        translator = create_translator(service, resilience=resilience)
+    except (ImportError, ValueError) as e:
+        print(f"{service:12s} | 跳过: {e}")
+        return
+
+    try:
+        await translator.warmup(1)  # 建立连接/加载模型，不计入结果
+
+        # 逐句延迟（每句加编号，避免缓存）
+        latencies, failures = [], 0
+        for i in range(args.rounds):
+            for sentence in SENTENCES:
+                started = time.perf_counter()
+                result = await translator.translate(f"{sentence} ({i})")
+                latencies.append(time.perf_counter() - started)
+                failures += result is None
+
+        # 批量吞吐
+        batch = [f"{sentence} [{i}]" for i in range(args.rounds) for sentence in SENTENCES]
+        started = time.perf_counter()
+        results = await translator.translate_batch(batch)
+        elapsed = time.perf_counter() - started
+        failures += sum(result is None for result in results)
+
+        print(
+            f"{service:12s} | p50 {statistics.median(latencies) * 1000:6.1f}ms  "
+            f"p95 {percentile(latencies, 95) * 1000:6.1f}ms | "
+            f"批量 {len(batch)} 句 {elapsed * 1000:6.0f}ms = {len(batch) / elapsed:7.1f} 句/秒 | 失败 {failures}"
+        )
+    finally:
+        await translator.close()
+
+
+async def run(args):
+    server = None
+    if args.mock:
+        # 远程后端都指向模拟服务，只比较客户端开销和请求模式
+        server = MockKimiServer(latency=args.latency, token_interval=0.0)
+        base_url = await server.start()
+        os.environ["KIMI_BASE_URL"] = base_url
+        os.environ["OPENAI_BASE_URL"] = base_url
+        os.environ["LOCAL_TRANSLATION_BASE_URL"] = base_url
+        os.environ.setdefault("KIMI_API_KEY", "mock-key")
+        os.environ.setdefault("OPENAI_API_KEY", "mock-key")
+
+    source = f"模拟服务延迟 {args.latency * 1000:.0f}ms" if server else "真实服务"
+    print(f"=== 翻译后端基准: {len(SENTENCES) * args.rounds} 句, {source} ===")
+    try:
+        for service in args.backends:
+            await bench_backend(service, args)
+    finally:
+        if server:
+            await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="翻译后端基准测试")
+    parser.add_argument("--backends", nargs="+", default=["simple", "kimi", "local", "ctranslate2"],
+                        help=f"要测试的后端，可选: {', '.join(sorted(TRANSLATORS))}")
+    parser.add_argument("--rounds", type=int, default=3, help="每句重复轮数")
+    parser.add_argument("--mock", action=argparse.BooleanOptionalAction, default=True,
+                        help="远程后端使用本地模拟服务")
+    parser.add_argument("--latency", type=float, default=0.15, help="模拟服务延迟（秒）")
+    logging.disable(logging.WARNING)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+本地模拟Kimi(OpenAI兼容)翻译服务
+支持普通响应和SSE流式响应，可配置首字延迟和逐字间隔，
+并可按比例注入5xx错误、429限流和长尾延迟，用于离线测试和基准测试
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+from aiohttp import web
+
+
+def fake_translate(text: str) -> str:
+    """生成确定性的"译文"，长度与原文成正比"""
+    return f"【译】{text}"
+
+
+class MockKimiServer:
+    """模拟 /v1/chat/completions 和 /v1/models 接口"""
+
+    def __init__(self, latency: float = 0.2, token_interval: float = 0.02, chars_per_token: int = 2,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, retry_after: float = 0.5,
+                 tail_rate: float = 0.0, tail_latency: float = 2.0, seed: int = 0):
+        self.latency = latency  # 首字（或完整响应）前的延迟（秒）
+        self.token_interval = token_interval  # 流式响应中相邻token的间隔（秒）
+        self.chars_per_token = chars_per_token
+        # 故障注入
+        self.error_rate = error_rate  # 返回503的比例
+        self.throttle_rate = throttle_rate  # 返回429的比例
+        self.retry_after = retry_after  # 429响应的Retry-After（秒）
+        self.tail_rate = tail_rate  # 额外延迟 tail_latency 的比例（模拟长尾）
+        self.tail_latency = tail_latency
+        self._random = random.Random(seed)
+        self.requests = 0
+        self.statuses = Counter()
+        self._runner = None
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_get("/v1/models", self.models)
+        return app
+
+    async def models(self, request: web.Request) -> web.Response:
+        return web.json_response({"data": [{"id": "moonshot-v1-8k"}]})
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        payload = await request.json()
+
+        roll = self._random.random()
+        if roll < self.throttle_rate:
+            self.statuses[429] += 1
+            return web.json_response(
+                {"error": {"message": "rate limited", "type": "rate_limit_reached_error"}},
+                status=429, headers={"Retry-After": f"{self.retry_after:g}"},
+            )
+        if roll < self.throttle_rate + self.error_rate:
+            await asyncio.sleep(self.latency)
+            self.statuses[503] += 1
+            return web.json_response({"error": {"message": "overloaded"}}, status=503)
+        self.statuses[200] += 1
+        delay = self.latency
+        if self._random.random() < self.tail_rate:
+            delay += self.tail_latency
+
+        text = payload["messages"][-1]["content"]
+        try:
+            # 批量请求：内容是JSON字符串数组，按相同格式逐项返回
+            items = json.loads(text)
+        except ValueError:
+            items = None
+        if isinstance(items, list):
+            translated = json.dumps([fake_translate(item) for item in items], ensure_ascii=False)
+        else:
+            translated = fake_translate(text)
+        tokens = [
+            translated[i:i + self.chars_per_token]
+            for i in range(0, len(translated), self.chars_per_token)
+        ]
+
+        await asyncio.sleep(delay)
+
+        if not payload.get("stream"):
+            # 非流式：等待全部token生成完再返回
+            await asyncio.sleep(self.token_interval * len(tokens))
+            return web.json_response({
+                "id": f"mock-{self.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": translated},
+                    "finish_reason": "stop",
+                }],
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(self.token_interval)
+            chunk = {
+                "id": f"mock-{self.requests}",
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """在当前事件循环中启动服务，返回base_url"""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        actual_port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{actual_port}/v1"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟Kimi翻译服务")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="首字延迟（秒）")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="流式token间隔（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回503的比例")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="返回429的比例")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="429响应的Retry-After（秒）")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="长尾延迟请求的比例")
+    parser.add_argument("--tail-latency", type=float, default=2.0, help="长尾请求的额外延迟（秒）")
+    args = parser.parse_args()
+
+    server = MockKimiServer(
+        latency=args.latency, token_interval=args.token_interval,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+        tail_rate=args.tail_rate, tail_latency=args.tail_latency,
+    )
+    print(f"模拟服务: http://127.0.0.1:{args.port}/v1 （设置 KIMI_BASE_URL 指向该地址）")
+    web.run_app(server.make_app(), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+检查采集帧池读出的音频块互不共享内存
+
+设备为16kHz单声道时重采样器直接透传，读出的块曾是帧池暂存区的视图：
+识别落后于采集时，队列中尚未处理的块会被下一次读取覆盖。
+这里模拟三次回调（值分别为1、2、3），全部读出后再检查各块内容。
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    from src.audio_capture import AudioCapture
+except ImportError as e:  # sounddevice/PortAudio 不可用
+    print(f"无法导入AudioCapture: {e}")
+    sys.exit(1)
+
+from src.resampler import StreamingResampler
+
+
+async def check(device_rate: int, channels: int) -> bool:
+    capture = AudioCapture(buffer_size=8)
+    capture._loop = asyncio.get_running_loop()
+    capture._data_ready = asyncio.Event()
+    capture._wake = lambda: capture._loop.call_soon_threadsafe(capture._data_ready.set)
+    capture.resampler = StreamingResampler(device_rate, capture.sample_rate)
+    blocksize = round(capture.chunk_size * device_rate / capture.sample_rate)
+    capture._allocate_pool(blocksize, channels)
+    capture.is_recording = True
+
+    for value in (1.0, 2.0, 3.0):
+        capture._audio_callback(np.full((blocksize, channels), value, dtype=np.float32), blocksize, None, None)
+    frames = [await capture.get_audio_chunk(timeout=0.1) for _ in range(3)]
+    # 重采样时滤波器有过渡段，只看块中间的样本
+    values = [float(frame.samples[len(frame.samples) // 2]) for frame in frames]
+    ok = np.allclose(values, [1.0, 2.0, 3.0], atol=1e-3)
+    print(f"{device_rate}Hz × {channels}声道: 读出 {values} {'✅' if ok else '❌'}")
+    return ok
+
+
+async def main():
+    results = [await check(rate, channels) for rate, channels in ((16000, 1), (16000, 2), (48000, 1))]
+    if not all(results):
+        print("❌ 音频块被后续读取覆盖")
+        sys.exit(1)
+    print("✅ 各音频块独立")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,22 +2,34 @@
 """
 实时字幕翻译工具主程序
 """
+import argparse
 import asyncio
 import logging
 import os
 import signal
 import sys
+import threading
 import time
 from datetime import datetime
-from pathlib import Path
-from typing import Coroutine
+from typing import Coroutine, Optional
 import numpy as np
 from dotenv import load_dotenv
 
-from src.audio_capture import AudioCapture
-from src.subtitle_overlay import SubtitleOverlay
+from src.file_source import FileAudioSource
+from src.http_client import HttpClient
+from src.metrics import MetricsServer, MetricsWriter
+from src.pipeline import BLOCK, DROP_OLDEST, AudioFrame, StageQueue, StageStats, Utterance
+from src.resilience import AdaptiveRateLimiter, ResilientCaller, RetryPolicy
+from src.streaming import SentenceAssembler, Word
+from src.subtitle_overlay import SimpleConsoleOverlay, SubtitleOverlay
+from src.tk_bridge import OverlayProxy, TkBridge
+from src.transcript_writer import TranscriptWriter
 from src.transcription import WhisperTranscriber
-from src.translation import KimiTranslator
+from src.translation import BatchingTranslator
+from src.translation_cache import TranslationCache
+from src.translation_dispatcher import TranslationDispatcher
+from src.translators import create_translator
+from src.vad import VoiceActivityDetector
 
 # 加载环境变量
 load_dotenv(override=True)
@@ -26,10 +38,6 @@ load_dotenv(override=True)
 # 配置日志
 def setup_logging():
     """配置日志系统"""
-    # 创建logs目录
-    logs_dir = Path("logs")
-    logs_dir.mkdir(exist_ok=True)
-    
     # 创建主日志记录器
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
@@ -41,22 +49,7 @@ def setup_logging():
     console_handler.setFormatter(console_format)
     logger.addHandler(console_handler)
     
-    # 转写结果日志处理器
-    transcript_logger = logging.getLogger("transcript")
-    transcript_logger.setLevel(logging.INFO)
-    
-    # 使用日期时间创建唯一的日志文件名
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    transcript_file = logs_dir / f"transcript_{timestamp}.log"
-    
-    # 文件处理器
-    file_handler = logging.FileHandler(transcript_file, encoding='utf-8')
-    file_handler.setLevel(logging.INFO)
-    file_format = logging.Formatter('%(asctime)s - %(message)s')
-    file_handler.setFormatter(file_format)
-    transcript_logger.addHandler(file_handler)
-    
-    return logger, transcript_logger
+    return logger
 
 
 class Application:
@@ -64,56 +57,103 @@ class Application:
     应用程序类，负责协调所有组件
     """
 
-    def __init__(self, transcriber, translator, audio_capture, overlay, logger, transcript_logger):
+    def __init__(self, transcriber, translator, audio_capture, overlay, logger, transcript=None, vad=None,
+                 http_client=None):
         self.transcriber = transcriber
         self.translator = translator
+        self.http_client = http_client
         self.audio_capture = audio_capture
         self.overlay = overlay
+        self.vad = vad
         self.running = False
         self._main_task = None
         self.loop = asyncio.get_event_loop()
+        self._loop_thread = None  # GUI模式下运行事件循环的后台线程
+        self.bridge = None
         self.logger = logger
-        self.transcript_logger = transcript_logger
+        self.transcript = transcript  # 转写记录（TranscriptWriter），None表示不记录
+
+        # 控制台字幕时不创建GUI，由事件循环直接运行（可在无显示器的环境下回放）
+        self.headless = isinstance(overlay, SimpleConsoleOverlay)
+
+        # 流水线阶段之间的有界队列：
+        # 音频积压时丢弃最旧的块以控制延迟，识别结果等待翻译（背压），只渲染最新的字幕；
+        # 全速回放文件时音频也使用背压，保证结果可复现
+        self.lossless = getattr(audio_capture, "lossless", False)
+        audio_policy = BLOCK if self.lossless else DROP_OLDEST
+        self.audio_queue = StageQueue("audio", maxsize=64, policy=audio_policy)
+        self.text_queue = StageQueue("text", maxsize=8, policy=BLOCK)
+        self.render_queue = StageQueue("render", maxsize=4, policy=DROP_OLDEST)
+        self.queues = [self.audio_queue, self.text_queue, self.render_queue]
+        # 各阶段耗时：
+        # capture 音频块从采集回调到进入识别阶段；buffer_fill 一句话的首个音频块采集到开始解码；
+        # vad/asr/translate/render 各阶段处理；source_visible 句末音频采集到原文显示；
+        # first_visible/end_to_end 句末音频采集到译文首次/最终显示；
+        # gui_bridge 界面操作从事件循环线程提交到在Tk线程中执行（仅GUI模式）
+        self.stage_stats = {
+            name: StageStats(name)
+            for name in ("capture", "buffer_fill", "vad", "asr", "source_visible", "translate", "render",
+                         "first_visible", "end_to_end", "gui_bridge")
+        }
+        self.latency_target = int(os.getenv("LATENCY_TARGET_MS", 500)) / 1000
+        self.metrics_server = None
+        metrics_port = int(os.getenv("METRICS_PORT", 0))
+        if metrics_port > 0:
+            self.metrics_server = MetricsServer(
+                self.collect_metrics, host=os.getenv("METRICS_HOST", "127.0.0.1"), port=metrics_port
+            )
+        self.stream_translation = os.getenv("TRANSLATION_STREAM", "false").lower() == "true"
+        # 流式识别时增量提交的片段先拼成句子再翻译
+        self.sentences = SentenceAssembler(max_chars=int(os.getenv("STREAM_MAX_SENTENCE_CHARS", 200)))
+        self.render_interval = int(os.getenv("RENDER_INTERVAL_MS", 50)) / 1000
+        self.stats_interval = float(os.getenv("PIPELINE_STATS_INTERVAL", 30))
+        self.dispatcher = TranslationDispatcher(
+            translator,
+            deliver=self._deliver,
+            max_in_flight=int(os.getenv("TRANSLATION_MAX_IN_FLIGHT", 3)),
+            reorder_timeout=int(os.getenv("TRANSLATION_REORDER_TIMEOUT_MS", 1500)) / 1000,
+            stats=self.stage_stats["translate"]
+        )
 
     async def _main_loop(self):
         """
-        主处理循环
+        主处理循环：启动各流水线阶段并等待其结束
         """
+        stage_tasks = []
         try:
+            # 后台预热翻译API连接，第一句翻译不必等待TCP/TLS握手
+            warmup_connections = int(os.getenv("HTTP_WARMUP_CONNECTIONS", 2))
+            if warmup_connections > 0:
+                stage_tasks.append(self.loop.create_task(self.translator.warmup(warmup_connections)))
+
+            # 等待后台的模型加载和预热完成后再开始采集，避免第一句话排队等待模型
+            if self.transcriber.model is None:
+                self.overlay.update_subtitle("正在加载语音识别模型...")
+                await self.transcriber.load_model()
+                self.overlay.update_subtitle("模型已就绪，正在聆听...")
+            self.logger.info(
+                f"🧠 语音识别模型就绪: 加载 {self.transcriber.load_seconds:.2f}s，"
+                f"预热 {self.transcriber.warmup_seconds:.2f}s"
+            )
+
+            if self.metrics_server:
+                await self.metrics_server.start()
+
             await self.audio_capture.start()
             self.logger.info("✅ 实时翻译服务已启动")
 
-            while self.running:
-                audio_data = await self.audio_capture.get_audio_chunk()
-                audio_data = await self.audio_capture.get_audio_chunk()
-                if audio_data is None:
-                    await asyncio.sleep(0.01)
-                    continue
-
-                text = await self.transcriber.transcribe(audio_data)
-
-                if not text:
-                    await asyncio.sleep(0.01)
-                    continue
-                if not text or not text.strip():
-                    continue
-                
-                # 记录识别结果到控制台和日志文件
-                self.logger.info(f"🎤 识别: {text}")
-                self.transcript_logger.info(f"[原文] {text}")
-
-                translated = await self.translator.translate(text)
-                if not translated:
-                    continue
-                
-                # 记录翻译结果到控制台和日志文件
-                self.logger.info(f"🌏 翻译: {translated}")
-                self.transcript_logger.info(f"[翻译] {translated}")
-                
-                # 在日志中添加一个空行，使记录更清晰
-                self.transcript_logger.info("")
-
-                self.overlay.update_subtitle(translated)
+            pipeline_tasks = [
+                self.loop.create_task(self._capture_stage()),
+                self.loop.create_task(self._transcribe_stage()),
+                self.loop.create_task(self._translate_stage()),
+                self.loop.create_task(self._render_stage()),
+            ]
+            stage_tasks += pipeline_tasks
+            if self.stats_interval > 0:
+                stage_tasks.append(self.loop.create_task(self._report_stats()))
+            # 各阶段在输入结束（回放完毕）后依次排空并退出
+            await asyncio.gather(*pipeline_tasks)
+            self.logger.info("✅ 输入已结束，全部句子处理完毕")
 
         except asyncio.CancelledError:
             self.logger.info("🛑 主循环被取消")
@@ -121,23 +161,394 @@ class Application:
             self.logger.error(f"❌ 主循环出现错误: {e}")
         finally:
             self.logger.info("正在清理资源...")
+            for task in stage_tasks:
+                task.cancel()
+            await asyncio.gather(*stage_tasks, return_exceptions=True)
+            await self.dispatcher.close()
+            if self.metrics_server:
+                await self.metrics_server.stop()
+            self._log_stats()
+            if self.vad:
+                stats = self.vad.get_stats(self.transcriber.realtime_factor)
+                self.logger.info(
+                    f"🔇 VAD丢弃静音 {stats['dropped_seconds']:.1f}s ({stats['dropped_ratio']:.0%})，"
+                    f"节省推理约 {stats['saved_inference_seconds']:.1f}s"
+                )
             if self.audio_capture.is_running():
                 await self.audio_capture.stop()
+            await self.transcriber.close()
+            await self.translator.close()
+            if self.http_client:
+                await self.http_client.close()
             self.overlay.hide()
             self.logger.info("✅ 清理完成")
 
-    def _drive_async_loop(self):
-        """驱动asyncio事件循环"""
-        if self.running and self.overlay.root:
-            self.loop.stop()
-            self.loop.run_forever()
-            # 使用 after 调度下一次执行，将控制权还给tkinter
-            self.overlay.root.after(50, self._drive_async_loop)
+    async def _capture_stage(self):
+        """采集阶段：等待音频回调唤醒，将音频块放入音频队列；输入结束时放入None通知下游"""
+        async for frame in self.audio_capture.frames():
+            if not self.running:
+                break
+            await self.audio_queue.put(frame)
+        await self.audio_queue.put(None)
+
+    async def _transcribe_stage(self):
+        """识别阶段：语音活动检测 + 转录，识别出的句子放入文本队列"""
+        stats = self.stage_stats
+        first_frame = None  # 当前句子的第一个音频块
+        last_frame = None  # 当前句子的最后一个音频块
+        current = None  # 流式识别中正在显示、尚未成句的句子
+        word_offset = None  # 流式识别单词时间戳换算为媒体时间的偏移（秒）
+        while self.running:
+            frame = await self.audio_queue.get()
+            end_of_input = frame is None
+            audio_data = None
+
+            # 语音活动检测：静音帧不进入转录，语音结束时立即切分语句
+            utterance_ended = end_of_input
+            if not end_of_input:
+                started = time.perf_counter()
+                stats["capture"].record(started - frame.captured_at)
+                if not self.lossless:
+                    # 实时输入时音频在队列中等待的时间即识别的积压（全速回放时积压是预期的，不计入）
+                    self.transcriber.backlog = started - frame.captured_at
+                audio_data = frame.samples
+                if self.vad:
+                    audio_data, utterance_ended = self.vad.process(audio_data)
+                    stats["vad"].record(time.perf_counter() - started)
+                if audio_data is not None:
+                    if first_frame is None:
+                        first_frame = frame
+                    last_frame = frame
+                    if self.transcriber.streaming:
+                        word_offset = self._word_offset(frame, audio_data)
+
+            asr_started = time.perf_counter()
+            text = None
+            if audio_data is not None:
+                text = await self.transcriber.transcribe(audio_data)
+            if utterance_ended:
+                tail = await self.transcriber.flush()
+                text = " ".join(part for part in (text, tail) if part) or None
+
+            if self.transcriber.streaming:
+                # 流式识别：提交的片段拼成整句后才交给翻译；未成句的部分连同临时假设先显示出来
+                # 字幕时间取自单词时间戳（说话的实际时间），而不是提交时所在的音频块
+                words = self.transcriber.pop_words()
+                if word_offset is None:
+                    words = []
+                else:
+                    words = [Word(word.start + word_offset, word.end + word_offset, word.text) for word in words]
+                sentences = self.sentences.add(text, words) if text else []
+                if utterance_ended:
+                    rest = self.sentences.flush()
+                    if rest:
+                        sentences.append(rest)
+                for sentence in sentences:
+                    utterance, current = current or Utterance(text=sentence), None
+                    utterance.text = sentence
+                    utterance.created_at = time.perf_counter()
+                    await self._emit_source(utterance, asr_started, first_frame, last_frame, self.sentences.span())
+                    # 同一段语音中的下一句从当前音频块开始
+                    first_frame = None if utterance_ended else last_frame
+                preview = "" if utterance_ended else self.sentences.preview(self.transcriber.provisional_text)
+                if preview:
+                    if current is None:
+                        current = Utterance(text="")
+                    if preview != current.text:
+                        current.text = preview
+                        self.overlay.show_source(current.id, preview)
+                else:
+                    current = None
+            elif text and text.strip():
+                utterance = Utterance(text=text)
+                await self._emit_source(utterance, asr_started, first_frame, last_frame)
+                first_frame = None
+            if utterance_ended:
+                first_frame = None
+
+            if end_of_input:
+                await self.text_queue.put(None)
+                return
+
+    def _word_offset(self, frame: AudioFrame, speech: np.ndarray) -> Optional[float]:
+        """
+        流式识别单词时钟（送入识别的累计样本数）与媒体时间之间的偏移
 
+        VAD丢弃静音，两个时钟在每段语音内相差固定值：由送入识别的语音末尾在媒体中的位置求出。
+        """
+        if frame.media_time is None:
+            return None
+        sample_rate = self.audio_capture.sample_rate
+        media_end = frame.media_time + len(frame.samples) / sample_rate
+        if self.vad:
+            media_end -= (self.vad.samples_received - self.vad.speech_end_sample) / sample_rate
+        stream_end = self.transcriber.audio_buffer.total_written + len(speech)
+        return media_end - stream_end / self.transcriber.sample_rate
+
+    async def _emit_source(self, utterance: Utterance, asr_started: float,
+                           first_frame: Optional[AudioFrame], last_frame: Optional[AudioFrame],
+                           span: Optional[tuple] = None):
+        """一句识别完成：记录、显示原文并交给翻译阶段（span 为流式识别按单词时间戳得到的媒体时间范围）"""
+        stats = self.stage_stats
+        if first_frame is not None:
+            utterance.captured_at = first_frame.captured_at
+            utterance.media_start = first_frame.media_time
+        if last_frame is not None:
+            utterance.audio_end_at = last_frame.captured_at
+            if last_frame.media_time is not None:
+                utterance.media_end = last_frame.media_time + len(last_frame.samples) / self.audio_capture.sample_rate
+        if span is not None:
+            utterance.media_start, utterance.media_end = span
+        utterance.spans["asr"] = utterance.created_at - asr_started
+        stats["asr"].record(utterance.spans["asr"])
+        if utterance.captured_at is not None:
+            utterance.spans["buffer_fill"] = asr_started - utterance.captured_at
+            stats["buffer_fill"].record(utterance.spans["buffer_fill"])
+
+        # 记录识别结果到控制台和转写记录（只入队，由写入线程批量写盘）
+        self.logger.info(f"🎤 识别: {utterance.text}")
+        if self.transcript:
+            self.transcript.source(utterance)
+
+        # 两阶段显示：原文立即上屏，不等待翻译
+        self.overlay.show_source(utterance.id, utterance.text)
+        origin = utterance.audio_end_at or utterance.created_at
+        utterance.spans["source_visible"] = time.perf_counter() - origin
+        stats["source_visible"].record(utterance.spans["source_visible"])
+
+        await self.text_queue.put(utterance)
+
+    async def _translate_stage(self):
+        """翻译阶段：翻译句子放入渲染队列"""
+        stats = self.stage_stats["translate"]
+        while self.running:
+            utterance = await self.text_queue.get()
+            if utterance is None:
+                # 输入结束：等待在途翻译全部交付后通知渲染阶段
+                await self.dispatcher.drain()
+                await self.render_queue.put(None)
+                return
+            started = time.perf_counter()
+
+            if self.stream_translation:
+                # 流式翻译：每收到一段增量就把部分译文交给渲染阶段（由渲染阶段节流）
+                utterance.final = False
+                async for partial in self.translator.translate_stream(utterance.text):
+                    utterance.translated = partial
+                    await self.render_queue.put(utterance)
+                utterance.final = True
+                utterance.spans["translate"] = time.perf_counter() - started
+                stats.record(utterance.spans["translate"])
+                if utterance.translated:
+                    await self._deliver(utterance)
+            else:
+                # 并发翻译，由调度器按句子顺序交付；在途请求达到上限时在这里等待（背压）
+                # 同一轮事件循环内提交的多句会被BatchingTranslator合并为一次请求
+                await self.dispatcher.submit(utterance)
+
+    async def _deliver(self, utterance: Utterance):
+        """记录译文并交给渲染阶段"""
+        # 记录翻译结果到控制台和转写记录
+        self.logger.info(f"🌏 翻译: {utterance.translated}")
+        if self.transcript:
+            self.transcript.translation(utterance)
+        # 字幕历史在这里记录译文：渲染队列会合并或丢弃排队的句子
+        self.overlay.record_translation(utterance.id, utterance.translated)
+
+        await self.render_queue.put(utterance)
+
+    async def _render_stage(self):
+        """渲染阶段：更新字幕，两次重绘之间至少间隔 render_interval，期间到达的更新只显示最新的"""
+        stats = self.stage_stats["render"]
+        last_render = 0.0
+        while self.running:
+            utterance = await self.render_queue.get()
+            if utterance is None:
+                return
+            wait = last_render + self.render_interval - time.perf_counter()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                latest = self.render_queue.get_latest_nowait(utterance)
+                if latest is None:
+                    # 输入结束：显示最后一条后退出
+                    await self.render_queue.put(None)
+                else:
+                    utterance = latest
+
+            started = time.perf_counter()
+            self.overlay.show_translation(utterance.id, utterance.translated)
+            last_render = time.perf_counter()
+            stats.record(last_render - started)
+
+            # 从句末音频采集（没有时间戳时从识别完成）到首次显示、到最终译文显示的总耗时
+            origin = utterance.audio_end_at or utterance.created_at
+            if utterance.first_rendered_at is None:
+                utterance.first_rendered_at = last_render
+                utterance.spans["first_visible"] = last_render - origin
+                self.stage_stats["first_visible"].record(utterance.spans["first_visible"])
+            if utterance.final:
+                utterance.spans["render"] = last_render - started
+                utterance.spans["end_to_end"] = last_render - origin
+                self.stage_stats["end_to_end"].record(utterance.spans["end_to_end"])
+                self.logger.debug(
+                    f"⏱ 句子#{utterance.id}: "
+                    + ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in utterance.spans.items())
+                )
+
+    async def _report_stats(self):
+        """定期输出流水线统计"""
+        while self.running:
+            await asyncio.sleep(self.stats_interval)
+            self._log_stats()
+
+    def get_pipeline_stats(self) -> dict:
+        """获取各阶段的队列深度和处理耗时"""
+        stats = {
+            "capture": self.audio_capture.get_stats(),
+            "queues": {queue.name: queue.get_stats() for queue in self.queues},
+            "stages": {name: stats.get_stats() for name, stats in self.stage_stats.items()},
+            "dispatcher": self.dispatcher.get_stats(),
+            "transcription": self.transcriber.get_buffer_info(),
+        }
+        cache = getattr(self.translator, "cache", None)
+        if cache:
+            stats["translation_cache"] = cache.get_stats()
+        http = getattr(self.translator, "http", None)
+        if http:
+            stats["http"] = http.get_stats()
+        resilience = getattr(self.translator, "resilience", None)
+        if resilience:
+            stats["translation_requests"] = resilience.get_stats()
+        if isinstance(self.translator, BatchingTranslator):
+            stats["translation_batch"] = self.translator.get_stats()
+        render_stats = getattr(self.overlay, "get_render_stats", None)
+        if render_stats and render_stats():
+            stats["overlay"] = render_stats()
+        if self.transcript:
+            stats["transcript"] = self.transcript.get_stats()
+        return stats
+
+    def collect_metrics(self) -> str:
+        """生成Prometheus文本格式的指标（供指标端点调用）"""
+        stats = self.get_pipeline_stats()
+        writer = MetricsWriter()
+        for name, stage in self.stage_stats.items():
+            writer.histogram("stage_latency_seconds", "各阶段耗时（秒）", stage, {"stage": name})
+        for name, queue in stats["queues"].items():
+            writer.gauge("queue_depth", "阶段队列当前深度", queue["depth"], {"queue": name})
+            writer.gauge("queue_capacity", "阶段队列容量", queue["capacity"], {"queue": name})
+            writer.counter("queue_dropped", "阶段队列丢弃的元素数", queue["dropped"], {"queue": name})
+        writer.counter("capture_dropped_frames", "采集端因消费不及时丢弃的音频块数",
+                       stats["capture"]["dropped_chunks"])
+        writer.counter("capture_input_overflows", "音频设备报告的输入溢出次数",
+                       stats["capture"]["input_overflows"])
+
+        transcription = stats["transcription"]
+        writer.gauge("realtime_factor", "识别实时率（每秒音频的推理耗时）", transcription["realtime_factor"] or 0.0)
+        writer.gauge("asr_load", "识别负载（解码耗时/可用时间的滑动平均）", transcription["load"])
+        writer.counter("asr_fast_path_decodes", "切换为贪心解码的次数", transcription["fast_path_decodes"])
+        writer.gauge("audio_buffer_seconds", "识别缓冲区中的音频时长（秒）", transcription["buffer_duration"])
+
+        dispatcher = stats["dispatcher"]
+        writer.gauge("translation_in_flight", "在途翻译请求数", dispatcher["in_flight"])
+        writer.counter("translation_cancelled", "被取消的过期翻译请求数", dispatcher["cancelled"])
+        if "overlay" in stats:
+            overlay = stats["overlay"]
+            writer.counter("overlay_updates", "字幕更新请求数", overlay["updates"])
+            writer.counter("overlay_frames", "字幕实际重绘帧数", overlay["frames"])
+            writer.counter("overlay_dropped_updates", "绘制前被更新的字幕覆盖的更新数", overlay["dropped_updates"])
+            writer.gauge("overlay_frame_p95_seconds", "字幕重绘耗时p95（秒）", overlay["frame_p95_ms"] / 1000)
+            writer.gauge("overlay_font_size", "当前字幕字号（自动缩放后）", overlay["font_size"])
+        if "translation_requests" in stats:
+            requests = stats["translation_requests"]
+            writer.counter("translation_attempts", "翻译API请求尝试次数", requests["attempts"])
+            writer.counter("translation_retries", "翻译API重试次数", requests["retries"])
+            writer.counter("translation_failures", "翻译最终失败次数", requests["failures"])
+        if "translation_cache" in stats:
+            cache = stats["translation_cache"]
+            writer.counter("translation_cache_hits", "翻译缓存命中数", cache["hits"] + cache["disk_hits"])
+            writer.counter("translation_cache_misses", "翻译缓存未命中数", cache["misses"])
+        if "transcript" in stats:
+            transcript = stats["transcript"]
+            writer.counter("transcript_records", "已写入的转写记录数", transcript["records"])
+            writer.gauge("transcript_pending", "等待写入线程处理的转写事件数", transcript["pending"])
+            writer.counter("transcript_write_errors", "转写记录写入失败次数", transcript["errors"])
+        return writer.render()
+
+    def _log_stats(self):
+        """输出一行流水线统计摘要"""
+        stats = self.get_pipeline_stats()
+        queues = ", ".join(
+            f"{name}={q['depth']}/{q['capacity']}(丢弃{q['dropped']})" for name, q in stats["queues"].items()
+        )
+        stages = ", ".join(
+            f"{name} p50={s['p50_ms']:.0f}ms p95={s['p95_ms']:.0f}ms" for name, s in stats["stages"].items()
+        )
+        self.logger.info(
+            f"📊 采集丢弃: {stats['capture']['dropped_chunks']}(溢出{stats['capture']['input_overflows']}) | 队列: {queues} | 耗时: {stages}"
+        )
+        end_to_end = stats["stages"]["end_to_end"]
+        if end_to_end["count"]:
+            met = end_to_end["p95_ms"] <= self.latency_target * 1000
+            self.logger.info(
+                f"🎯 端到端延迟 p50={end_to_end['p50_ms']:.0f}ms p95={end_to_end['p95_ms']:.0f}ms "
+                f"(目标 {self.latency_target * 1000:.0f}ms) {'✅ 达标' if met else '⚠️ 超标'}"
+            )
+        transcription = stats["transcription"]
+        if transcription["realtime_factor"] is not None:
+            self.logger.info(
+                f"🧠 识别: 解码配置 {transcription['profile']}，实时率 {transcription['realtime_factor']:.2f}，"
+                f"负载 {transcription['load']:.2f}，积压 {transcription['backlog']:.1f}s，"
+                f"贪心快速路径 {transcription['fast_path_decodes']} 次"
+            )
+        if "translation_batch" in stats:
+            batch = stats["translation_batch"]
+            self.logger.info(f"📦 批量翻译: {batch['batches']} 次请求 / {batch['items']} 句")
+        if "overlay" in stats:
+            overlay = stats["overlay"]
+            self.logger.info(
+                f"🖼 字幕渲染: {overlay['updates']} 次更新 / {overlay['frames']} 帧，"
+                f"合并丢弃 {overlay['dropped_updates']}，帧耗时 p50={overlay['frame_p50_ms']:.1f}ms "
+                f"p95={overlay['frame_p95_ms']:.1f}ms，字号 {overlay['font_size']}"
+            )
+        dispatcher = stats["dispatcher"]
+        self.logger.info(
+            f"🔀 翻译调度: 在途 {dispatcher['in_flight']}，乱序暂存 {dispatcher['reordered']}，"
+            f"过期取消 {dispatcher['cancelled']}"
+        )
+        if "translation_requests" in stats:
+            requests = stats["translation_requests"]
+            self.logger.info(
+                f"🔁 翻译请求: {requests['attempts']} 次尝试，重试 {requests['retries']}，"
+                f"对冲 {requests['hedged']}(胜 {requests['hedge_wins']})，失败 {requests['failures']}，"
+                f"限流 {requests['limiter']['throttled']} 次，当前速率 {requests['limiter']['rate']:.1f}次/秒"
+            )
+        if "http" in stats:
+            http = stats["http"]
+            self.logger.info(
+                f"🔌 HTTP: {http['requests']} 次请求，新建连接 {http['connections_created']}，"
+                f"复用 {http['connections_reused']} ({http['reuse_rate']:.0%})"
+            )
+        if "translation_cache" in stats:
+            cache = stats["translation_cache"]
+            self.logger.info(
+                f"📦 翻译缓存: 命中 {cache['hits']}+{cache['disk_hits']}(磁盘) / 未命中 {cache['misses']}"
+                f"，命中率 {cache['hit_rate']:.0%}"
+            )
+
+    def _run_event_loop(self):
+        """后台线程：运行asyncio事件循环直到主循环结束"""
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._main_task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.logger.error(f"❌ 事件循环异常退出: {e}")
 
     def start(self):
         """
-        启动应用程序 - GUI在主线程，asyncio也在主线程
+        启动应用程序 - GUI在主线程，asyncio事件循环在后台线程（控制台模式下在主线程）
         """
         if self.running:
             self.logger.info("应用已在运行中")
@@ -146,25 +557,44 @@ class Application:
         self.running = True
         self.logger.info("🎯 启动实时字幕翻译工具...")
 
+        # 模型在后台线程加载，与GUI创建并行
+        self.transcriber.preload()
+
+        if self.headless:
+            # 控制台模式：没有GUI主循环，直接运行事件循环直到输入结束或收到停止信号
+            self.overlay.show()
+            self._main_task = self.loop.create_task(self._main_loop())
+            try:
+                self.loop.run_until_complete(self._main_task)
+            except asyncio.CancelledError:
+                pass
+            self.running = False
+            self._shutdown()
+            return
+
         # 先显示GUI，确保root已初始化
-        self.overlay.show()
+        window = self.overlay
+        window.show()
         
         # 确保GUI已就绪
-        if not self.overlay.root:
+        if not window.root:
             self.logger.error("❌ 无法初始化GUI")
             return
 
-        # 创建asyncio任务
+        # 事件循环在后台线程中持续运行，流水线中的界面操作经桥接队列交给Tk线程执行
+        self.bridge = TkBridge(window.root, stats=self.stage_stats["gui_bridge"])
+        self.overlay = OverlayProxy(window, self.bridge)
         self._main_task = self.loop.create_task(self._main_loop())
-
-        # 启动asyncio事件循环的驱动器
-        self.overlay.root.after(50, self._drive_async_loop)
+        self._loop_thread = threading.Thread(target=self._run_event_loop, name="asyncio-loop", daemon=True)
+        self._loop_thread.start()
         
-        # 启动tkinter的GUI事件循环
-        self.overlay.run_gui_loop()
+        # 启动tkinter的GUI事件循环（窗口被关闭、输入结束或收到停止信号时返回）
+        window.run_gui_loop()
 
         # GUI循环结束后，清理工作
+        self.bridge.close()
         self.stop()
+        self._shutdown()
 
 
     def stop(self):
@@ -176,12 +606,35 @@ class Application:
 
         self.logger.info("🛑 正在停止服务...")
         self.running = False
+
+        if self._loop_thread:
+            # GUI模式：在事件循环线程中取消主循环，其清理逻辑会关闭字幕窗口使GUI主循环退出，
+            # 由 start() 在GUI主循环结束后完成剩余清理
+            if self._main_task and not self.loop.is_closed():
+                self.loop.call_soon_threadsafe(self._main_task.cancel)
+            return
+
         if self._main_task:
             self._main_task.cancel()
-        
-        # 确保loop停止
         if self.loop.is_running():
-            self.loop.stop()
+            # 在事件循环内部被调用（控制台模式下的信号处理），由 start() 在循环外完成清理
+            return
+
+        self._shutdown()
+
+    def _shutdown(self):
+        """在事件循环之外完成清理：等待主循环的清理逻辑执行完毕，再关闭共享连接池和事件循环"""
+        if self._loop_thread:
+            self._loop_thread.join()
+        elif self._main_task and not self._main_task.done():
+            try:
+                self.loop.run_until_complete(self._main_task)
+            except asyncio.CancelledError:
+                pass
+        if self.http_client:
+            self.loop.run_until_complete(self.http_client.close())
+        if self.transcript:
+            self.transcript.close()
         
         # 关闭loop
         self.loop.close()
@@ -190,24 +643,133 @@ class Application:
 
 
 
-def main():
+def parse_args(argv=None) -> argparse.Namespace:
+    """解析命令行参数（未指定的选项使用 .env 中的配置）"""
+    parser = argparse.ArgumentParser(description="实时字幕翻译工具")
+    parser.add_argument("--input", metavar="PATH",
+                        help="回放音频文件（WAV，安装soundfile后支持FLAC等）代替实时采集；'-' 表示从标准输入读取16位PCM")
+    parser.add_argument("--fast", action="store_true", help="尽可能快地回放（默认按真实时间节奏）")
+    parser.add_argument("--input-rate", type=int, default=16000, help="标准输入PCM的采样率")
+    parser.add_argument("--input-channels", type=int, default=1, help="标准输入PCM的声道数")
+    parser.add_argument("--console", action="store_true", help="在控制台输出字幕，不创建悬浮窗")
+    parser.add_argument("--translator", help="翻译后端，覆盖 TRANSLATION_SERVICE（如 simple 为无网络的确定性翻译）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """
     主函数
     """
+    args = parse_args(argv)
+
     # 设置日志系统
-    logger, transcript_logger = setup_logging()
+    logger = setup_logging()
     logger.info(f"启动时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    transcript_logger.info(f"=== 实时字幕转写记录 - 会话开始于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===\n")
+
+    # 转写记录：后台线程批量写入 JSONL/SRT/WebVTT
+    transcript = None
+    transcript_formats = [name.strip() for name in os.getenv("TRANSCRIPT_FORMATS", "jsonl,srt,vtt").split(",") if name.strip()]
+    if transcript_formats:
+        transcript = TranscriptWriter(
+            directory=os.getenv("TRANSCRIPT_DIR", "logs"),
+            formats=transcript_formats,
+            batch_size=int(os.getenv("TRANSCRIPT_BATCH_SIZE", 32)),
+            flush_interval=int(os.getenv("TRANSCRIPT_FLUSH_INTERVAL_MS", 1000)) / 1000,
+            fsync=os.getenv("TRANSCRIPT_FSYNC", "close").lower()
+        )
+        transcript.start()
     
+    # 事件循环实现：uvloop（可选依赖）可降低事件循环自身的调度开销
+    if os.getenv("EVENT_LOOP", "asyncio").lower() == "uvloop":
+        try:
+            import uvloop
+            asyncio.set_event_loop(uvloop.new_event_loop())
+            logger.info("使用uvloop事件循环")
+        except ImportError:
+            logger.warning("未安装uvloop，使用默认事件循环")
+
     # 依赖注入：在这里创建和配置组件
     # 依赖注入：在这里创建和配置组件
     language = os.getenv("WHISPER_LANGUAGE", "auto")
-    audio_capture = AudioCapture()
-    transcriber = WhisperTranscriber(language=language)
+    if args.input:
+        audio_capture = FileAudioSource(
+            args.input,
+            realtime=not args.fast,
+            input_rate=args.input_rate,
+            input_channels=args.input_channels
+        )
+    else:
+        from src.audio_capture import AudioCapture  # 依赖PortAudio，回放模式下不导入
+
+        audio_capture = AudioCapture(
+            device_rate=int(os.getenv("AUDIO_DEVICE_RATE", 0)) or None,
+            device_channels=int(os.getenv("AUDIO_DEVICE_CHANNELS", 0)) or None
+        )
+    transcriber = WhisperTranscriber(
+        model_name=os.getenv("WHISPER_MODEL", "base"),
+        device=os.getenv("WHISPER_DEVICE", "cpu"),
+        compute_type=os.getenv("WHISPER_COMPUTE_TYPE", "int8"),
+        cpu_threads=int(os.getenv("WHISPER_CPU_THREADS", 0)),
+        num_workers=int(os.getenv("WHISPER_NUM_WORKERS", 1)),
+        warmup=os.getenv("WHISPER_WARMUP", "true").lower() == "true",
+        profile=os.getenv("WHISPER_PROFILE", "balanced"),
+        adaptive=os.getenv("WHISPER_ADAPTIVE", "true").lower() == "true",
+        language=language,
+        streaming=os.getenv("TRANSCRIBE_MODE", "block") == "streaming",
+        stream_step=int(os.getenv("STREAM_STEP_MS", 500)) / 1000
+    )
     
-    translator = KimiTranslator()
+    vad_backend = os.getenv("VAD_BACKEND", "energy")
+    vad = None
+    if vad_backend != "off":
+        vad = VoiceActivityDetector(
+            sample_rate=audio_capture.sample_rate,
+            backend=vad_backend,
+            energy_threshold=float(os.getenv("VAD_ENERGY_THRESHOLD", 0.01)),
+            hangover_ms=int(os.getenv("VAD_HANGOVER_MS", 300))
+        )
+    
+    cache = None
+    if int(os.getenv("TRANSLATION_CACHE_SIZE", 1024)) > 0:
+        cache = TranslationCache(
+            max_size=int(os.getenv("TRANSLATION_CACHE_SIZE", 1024)),
+            ttl=float(os.getenv("TRANSLATION_CACHE_TTL", 24 * 3600)),
+            db_path=os.getenv("TRANSLATION_CACHE_DB") or None
+        )
+    http_client = HttpClient(
+        pool_size=int(os.getenv("HTTP_POOL_SIZE", 8)),
+        keepalive_timeout=float(os.getenv("HTTP_KEEPALIVE_SECONDS", 60)),
+        dns_ttl=int(os.getenv("HTTP_DNS_TTL", 300))
+    )
+    resilience = ResilientCaller(
+        limiter=AdaptiveRateLimiter(
+            rate=float(os.getenv("TRANSLATION_RATE_LIMIT", 3)),
+            burst=int(os.getenv("TRANSLATION_RATE_BURST", 5))
+        ),
+        policy=RetryPolicy(
+            max_attempts=int(os.getenv("TRANSLATION_MAX_RETRIES", 2)) + 1,
+            deadline=int(os.getenv("TRANSLATION_DEADLINE_MS", 8000)) / 1000
+        ),
+        hedge=os.getenv("TRANSLATION_HEDGE", "false").lower() == "true"
+    )
+    translator = create_translator(
+        args.translator or os.getenv("TRANSLATION_SERVICE", "kimi"),
+        cache=cache,
+        http_client=http_client,
+        resilience=resilience
+    )
+    if os.getenv("TRANSLATION_BATCH", "false").lower() == "true":
+        translator = BatchingTranslator(
+            translator,
+            batch_window=int(os.getenv("TRANSLATION_BATCH_WINDOW_MS", 0)) / 1000,
+            max_items=int(os.getenv("TRANSLATION_BATCH_MAX_ITEMS", 8)),
+            token_budget=int(os.getenv("TRANSLATION_BATCH_TOKENS", 600))
+        )
     
-    overlay = SubtitleOverlay() # tkinker overlay 必须在主线程创建
+    if args.console:
+        overlay = SimpleConsoleOverlay()
+    else:
+        overlay = SubtitleOverlay() # tkinker overlay 必须在主线程创建
 
     app = Application(
         transcriber=transcriber,
@@ -215,7 +777,9 @@ def main():
         audio_capture=audio_capture,
         overlay=overlay,
         logger=logger,
-        transcript_logger=transcript_logger
+        transcript=transcript,
+        vad=vad,
+        http_client=http_client
     )
 
     def handle_signal(sig, frame):
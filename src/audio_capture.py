@@ -3,27 +3,63 @@
 使用macOS系统音频捕获
 """
 import asyncio
+import time
 import numpy as np
 import sounddevice as sd
 from typing import Optional
 import logging
-import queue
-import threading
+
+from .pipeline import AudioFrame
+from .resampler import StreamingResampler
 
 logger = logging.getLogger(__name__)
 
 class AudioCapture:
-    """音频捕获类"""
-    
-    def __init__(self, sample_rate: int = 16000, channels: int = 1, chunk_size: int = 1024):
-        self.sample_rate = sample_rate
+    """
+    音频捕获类
+
+    以设备的原生采样率和声道数打开输入流（避免在实时音频线程中由PortAudio/CoreAudio重采样，
+    或因设备不支持16kHz而打开失败），在事件循环线程中下混并重采样为 sample_rate 单声道float32。
+
+    音频回调只把数据复制进预分配的帧池（环形数组）并推进写计数，不分配内存、不写日志、
+    不操作Python队列；输入溢出和帧池溢出只记录为计数器。消费者在事件循环线程中按顺序读取，
+    落后超过帧池容量时跳过最旧的帧（与之前"满时丢弃最旧块"的策略一致）。
+    """
+
+    def __init__(self, sample_rate: int = 16000, channels: int = 1, chunk_size: int = 1024,
+                 buffer_size: int = 32, device_rate: Optional[int] = None, device_channels: Optional[int] = None):
+        self.sample_rate = sample_rate  # 输出（送入识别）的采样率
         self.channels = channels
-        self.chunk_size = chunk_size
+        self.chunk_size = chunk_size  # 输出音频块的大约样本数
+        self.device_rate = device_rate  # 设备采样率，None表示使用设备默认值
+        self.device_channels = device_channels  # 采集声道数，None表示设备声道数（最多2）
+        self.resampler = None
+        self.resample_seconds = 0.0  # 下混和重采样累计耗时
         self.stream = None
         self.is_recording = False
-        self.audio_queue = queue.Queue()
-        self.buffer_size = 10  # 缓冲区大小
-        
+        self.buffer_size = buffer_size  # 帧池大小（音频块数），消费者落后超过该数量时丢弃最旧的块
+        self._loop = None
+        self._last_chunk = None
+
+        # 帧池：在start()中按设备格式预分配
+        self._pool = None  # [buffer_size, 块帧数, 声道]
+        self._slots = []  # 各槽位的视图（预先创建，回调中不再切片）
+        self._lengths = None  # 各槽位的有效帧数
+        self._timestamps = None  # 各槽位的采集时间
+        self._offsets = None  # 各槽位起点在音频流中的帧序号（设备采样率）
+        self._device_frames = 0  # 回调累计收到的帧数（含之后被丢弃的块，媒体时间不因丢帧而漂移）
+        self._scratch = None  # 消费者读取用的暂存区
+        self._written = 0  # 回调已写入的帧数（只由音频线程递增）
+        self._read = 0  # 消费者已读取的帧数（只由事件循环线程递增）
+        self._data_ready = None  # asyncio.Event，有新帧时唤醒等待的消费者
+        self._waiting = False  # 消费者正在等待，回调需要唤醒
+        self._wake = None
+
+        # 计数器（回调中只做整数加法）
+        self.dropped_chunks = 0  # 因消费不及时被丢弃的音频块数
+        self.input_overflows = 0  # PortAudio报告的输入溢出次数（回调未能及时运行）
+        self.status_errors = 0  # 其他回调状态标志
+
     def is_running(self) -> bool:
         """检查音频捕获是否正在运行"""
         return self.is_recording
@@ -34,97 +70,196 @@ class AudioCapture:
             # 获取可用设备
             devices = sd.query_devices()
             input_device = None
-            
+
             # 查找BlackHole或系统音频捕获设备
             for i, device in enumerate(devices):
                 if 'BlackHole' in device['name'] or 'Soundflower' in device['name']:
                     input_device = i
                     logger.info(f"使用音频设备: {device['name']}")
                     break
-            
+
+            self._loop = asyncio.get_running_loop()
+            self._data_ready = asyncio.Event()
+            self._wake = lambda: self._loop.call_soon_threadsafe(self._data_ready.set)
+
             if input_device is None:
                 # 使用默认输入设备
                 input_device = sd.default.device[0]
                 logger.warning("未找到BlackHole，使用默认输入设备")
-            
+
+            # 按设备原生格式采集，多声道设备（如BlackHole 16ch）只取前两个声道
+            info = sd.query_devices(input_device)
+            device_rate = int(self.device_rate or info["default_samplerate"])
+            device_channels = self.device_channels or max(1, min(2, int(info["max_input_channels"])))
+            self.device_rate, self.device_channels = device_rate, device_channels
+            self.resampler = StreamingResampler(device_rate, self.sample_rate)
+            logger.info(
+                f"采集格式: {device_rate}Hz × {device_channels}声道 → {self.sample_rate}Hz 单声道"
+            )
+
+            # 块时长与输出 chunk_size 保持一致
+            blocksize = round(self.chunk_size * device_rate / self.sample_rate)
+            self._allocate_pool(blocksize, device_channels)
+
             self.stream = sd.InputStream(
-                samplerate=self.sample_rate,
-                channels=self.channels,
+                samplerate=device_rate,
+                channels=device_channels,
                 device=input_device,
                 callback=self._audio_callback,
-                blocksize=self.chunk_size,
+                blocksize=blocksize,
                 dtype=np.float32
             )
-            
-            self.stream.start()
+
             self.is_recording = True
+            self.stream.start()
             logger.info("音频捕获已启动")
-            
+
         except Exception as e:
             logger.error(f"启动音频捕获失败: {e}")
             raise
-    
-    def _audio_callback(self, indata, frames, time, status):
-        """音频数据回调"""
+
+    def _allocate_pool(self, blocksize: int, channels: int):
+        """预分配帧池和消费者暂存区"""
+        self._pool = np.zeros((self.buffer_size, blocksize, channels), dtype=np.float32)
+        self._slots = [self._pool[i] for i in range(self.buffer_size)]
+        self._lengths = [blocksize] * self.buffer_size
+        self._timestamps = [0.0] * self.buffer_size
+        self._offsets = [0] * self.buffer_size
+        self._device_frames = 0
+        self._scratch = np.zeros((blocksize, channels), dtype=np.float32)
+        self._written = self._read = 0
+
+    def _audio_callback(self, indata, frames, time_info, status):
+        """
+        音频数据回调（实时音频线程）
+
+        只把数据复制进预分配的槽位并推进写计数；消费者正在等待时才调度一次唤醒。
+        """
+        captured_at = time.perf_counter()
         if status:
-            logger.warning(f"音频状态: {status}")
-        
-        if self.is_recording:
-            try:
-                # 将音频数据复制到队列中
-                audio_data = indata.copy().flatten()
-                
-                # 如果队列太满，丢弃旧数据
-                # 如果队列已满，丢弃最旧的数据以腾出空间
-                if self.audio_queue.full():
-                    self.audio_queue.get_nowait()  # 丢弃旧数据
-                self.audio_queue.put_nowait(audio_data)
-                
-            except Exception as e:
-                logger.error(f"音频回调错误: {e}")
-    
-    async def get_audio_chunk(self) -> Optional[np.ndarray]:
-        """获取音频数据块"""
+            if status.input_overflow:
+                self.input_overflows += 1
+            else:
+                self.status_errors += 1
         if not self.is_recording:
-            return None
-        
-        try:
-            # 非阻塞获取音频数据
-            data = self.audio_queue.get_nowait()
-            if data is not None and isinstance(data, np.ndarray) and data.size > 0:
-                return data
-            return None
-            
-        except queue.Empty:
-            return None
-        except Exception as e:
-            logger.error(f"读取音频数据失败: {e}")
-            return None
-    
+            return
+
+        slot = self._written % self.buffer_size
+        if frames == len(self._slots[slot]):
+            np.copyto(self._slots[slot], indata)
+        else:
+            self._slots[slot][:frames] = indata
+        self._lengths[slot] = frames
+        self._timestamps[slot] = captured_at
+        self._offsets[slot] = self._device_frames
+        self._device_frames += frames
+        self._written += 1  # 发布：先写数据再推进计数
+
+        if self._waiting:
+            self._waiting = False
+            self._wake()
+
+    def _take(self) -> Optional[AudioFrame]:
+        """在事件循环线程中取出下一帧并转换为输出格式；没有可用帧时返回None"""
+        while self._read < self._written:
+            # 落后达到帧池容量：最旧的帧已被（或正在被）覆盖，跳到仍然有效的最旧帧
+            lag = self._written - self._read
+            if lag >= self.buffer_size:
+                self.dropped_chunks += lag - self.buffer_size + 1
+                self._read = self._written - self.buffer_size + 1
+
+            index = self._read
+            slot = index % self.buffer_size
+            frames = self._lengths[slot]
+            captured_at = self._timestamps[slot]
+            media_time = self._offsets[slot] / self.resampler.input_rate
+            np.copyto(self._scratch[:frames], self._slots[slot][:frames])
+            self._read += 1
+            # 复制期间回调可能已开始覆盖该槽位，此时数据不完整，丢弃
+            if self._written >= index + self.buffer_size:
+                self.dropped_chunks += 1
+                continue
+
+            started = time.perf_counter()
+            samples = self.resampler.process(self._scratch[:frames])
+            self.resample_seconds += time.perf_counter() - started
+            return AudioFrame(samples, captured_at, media_time)
+        return None
+
+    async def get_audio_chunk(self, timeout: Optional[float] = None) -> Optional[AudioFrame]:
+        """
+        获取音频数据块，没有数据时等待回调唤醒
+
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            带采集时间戳的音频数据块（sample_rate 单声道）；停止采集或超时时返回None
+        """
+        deadline = None if timeout is None else self._loop.time() + timeout
+        while self.is_recording:
+            frame = self._take()
+            if frame is not None:
+                if frame.samples.size > 0:
+                    self._last_chunk = frame.samples
+                    return frame
+                continue
+
+            # 先声明等待再检查一次，避免错过在两者之间到达的帧
+            self._data_ready.clear()
+            self._waiting = True
+            if self._read < self._written:
+                self._waiting = False
+                continue
+            try:
+                remaining = None if deadline is None else max(0.0, deadline - self._loop.time())
+                await asyncio.wait_for(self._data_ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                self._waiting = False
+        return None
+
+    async def frames(self):
+        """异步迭代音频数据块（AudioFrame），直到采集停止"""
+        while self.is_recording:
+            frame = await self.get_audio_chunk()
+            if frame is None:
+                continue
+            yield frame
+
     async def stop(self):
         """停止音频捕获"""
         self.is_recording = False
-        
+
         if self.stream:
             self.stream.stop()
             self.stream.close()
             self.stream = None
-            
-        # 清空队列
-        while not self.audio_queue.empty():
-            try:
-                self.audio_queue.get_nowait()
-            except queue.Empty:
-                break
-                
+
+        # 唤醒仍在等待的消费者
+        if self._data_ready:
+            self._data_ready.set()
+
         logger.info("音频捕获已停止")
+        if self.input_overflows or self.dropped_chunks:
+            logger.warning(f"采集期间输入溢出 {self.input_overflows} 次，丢弃音频块 {self.dropped_chunks} 个")
 
     def get_audio_level(self) -> float:
-        """获取当前音频电平"""
-        try:
-            data = self.audio_queue.get_nowait()
-            return float(np.abs(data).mean())
-        except queue.Empty:
+        """获取当前音频电平（最近一个被消费的音频块）"""
+        if self._last_chunk is None:
             return 0.0
-        except Exception:
-            return 0.0
\ No newline at end of file
+        return float(np.abs(self._last_chunk).mean())
+
+    def get_stats(self) -> dict:
+        """获取采集统计信息"""
+        return {
+            "queue_depth": min(self._written - self._read, self.buffer_size),
+            "queue_capacity": self.buffer_size,
+            "dropped_chunks": self.dropped_chunks,
+            "input_overflows": self.input_overflows,
+            "status_errors": self.status_errors,
+            "device_rate": self.device_rate,
+            "device_channels": self.device_channels,
+            "resample_seconds": self.resample_seconds,
+        }
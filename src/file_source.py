@@ -0,0 +1,201 @@
+"""
+文件音频源模块
+从WAV/FLAC文件或标准输入的原始PCM回放音频，接口与AudioCapture一致，用于离线复现和压测
+"""
+import asyncio
+import logging
+import sys
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+from .pipeline import AudioFrame
+from .resampler import StreamingResampler
+
+try:
+    import soundfile
+except ImportError:  # 可选依赖，只有读取FLAC等格式时需要
+    soundfile = None
+
+logger = logging.getLogger(__name__)
+
+
+class FileAudioSource:
+    """
+    文件/标准输入音频源
+
+    - path 为 "-" 时从标准输入读取原始PCM（16位小端，采样率和声道数由 input_rate/input_channels 指定）
+    - 其他路径按WAV读取，安装了soundfile时也支持FLAC/OGG等格式
+    - 音频被混为单声道并重采样到 sample_rate，按 chunk_size 切块产出
+    - realtime=True 时按真实时间节奏产出（模拟实时采集），否则尽可能快地产出；
+      后者不应丢弃任何音频（lossless），以便得到可复现的结果
+    """
+
+    def __init__(self, path: str, sample_rate: int = 16000, chunk_size: int = 1024, realtime: bool = True,
+                 input_rate: int = 16000, input_channels: int = 1):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = 1
+        self.chunk_size = chunk_size
+        self.realtime = realtime
+        self.lossless = not realtime
+        self.input_rate = input_rate
+        self.input_channels = input_channels
+        self.is_recording = False
+        self._frames = None  # get_audio_chunk 使用的迭代器
+        self._next = None  # 等待中的下一块（超时后保留，下次继续等待）
+        self._last_chunk = None
+        self._resampler = None
+        self.dropped_chunks = 0  # 接口一致，文件源不会丢弃
+        self.replayed_samples = 0
+        self.lag_seconds = 0.0  # 实时回放时产出落后于计划时间的最大值
+
+    def is_running(self) -> bool:
+        """检查回放是否正在进行"""
+        return self.is_recording
+
+    async def start(self):
+        """开始回放（检查输入是否可读）"""
+        if self.path != "-" and not Path(self.path).is_file():
+            raise FileNotFoundError(f"音频文件不存在: {self.path}")
+        self.is_recording = True
+        self.replayed_samples = 0
+        mode = "实时" if self.realtime else "全速"
+        logger.info(f"音频回放已启动: {'标准输入' if self.path == '-' else self.path} ({mode})")
+
+    def _read_blocks(self) -> Iterator[tuple]:
+        """逐块读取输入，产出 (int16或float32数组[帧, 声道], 采样率)，每块约1秒"""
+        if self.path == "-":
+            frame_bytes = 2 * self.input_channels
+            stream = sys.stdin.buffer
+            while True:
+                data = stream.read(self.input_rate * frame_bytes)
+                if not data:
+                    return
+                data = data[:len(data) - len(data) % frame_bytes]
+                yield np.frombuffer(data, dtype=np.int16).reshape(-1, self.input_channels), self.input_rate
+
+        elif self.path.lower().endswith(".wav"):
+            with wave.open(self.path, "rb") as f:
+                if f.getsampwidth() != 2:
+                    raise ValueError(f"只支持16位PCM WAV: {self.path}")
+                rate, channels = f.getframerate(), f.getnchannels()
+                while True:
+                    data = f.readframes(rate)
+                    if not data:
+                        return
+                    yield np.frombuffer(data, dtype=np.int16).reshape(-1, channels), rate
+
+        else:
+            if soundfile is None:
+                raise ImportError("读取该格式需要安装soundfile: pip install soundfile")
+            info = soundfile.info(self.path)
+            for block in soundfile.blocks(self.path, blocksize=info.samplerate, dtype="float32", always_2d=True):
+                yield block, info.samplerate
+
+    def _convert(self, block: np.ndarray, rate: int) -> np.ndarray:
+        """转换为float32，混为单声道并重采样（流式重采样器在块之间保留状态，块边界无失真）"""
+        if block.dtype == np.int16:
+            block = block.astype(np.float32) / 32768.0
+        if self._resampler is None or self._resampler.input_rate != rate:
+            self._resampler = StreamingResampler(rate, self.sample_rate)
+        return self._resampler.process(block)
+
+    async def frames(self):
+        """异步迭代音频数据块（AudioFrame），直到输入结束或停止回放"""
+        loop = asyncio.get_running_loop()
+        reader = self._read_blocks()
+        # 读取（可能阻塞在标准输入上）放到专用的单线程中执行：回放被取消时读取可能仍在进行，
+        # 关闭读取器也提交到同一线程，排在进行中的读取之后，不会与之并发
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="file-source")
+        pending = np.empty(0, dtype=np.float32)
+        started = time.perf_counter()
+        try:
+            while self.is_recording:
+                item = await loop.run_in_executor(executor, next, reader, None)
+                if item is None:
+                    break
+                pending = np.concatenate((pending, self._convert(*item)))
+
+                while len(pending) >= self.chunk_size and self.is_recording:
+                    chunk, pending = pending[:self.chunk_size], pending[self.chunk_size:]
+                    await self._pace(started)
+                    yield self._emit(chunk)
+
+            if len(pending) and self.is_recording:
+                await self._pace(started)
+                yield self._emit(pending)
+        finally:
+            executor.submit(reader.close)
+            # 不等待：标准输入上的读取可能一直阻塞，关闭在读取返回后由读取线程完成
+            executor.shutdown(wait=False)
+            self.is_recording = False
+            logger.info(f"音频回放结束: 共 {self.replayed_samples / self.sample_rate:.1f}s")
+
+    async def _pace(self, started: float):
+        """实时模式下等到该块的计划时间（按绝对时间计算，不累积误差）"""
+        if not self.realtime:
+            await asyncio.sleep(0)  # 让出事件循环，避免全速回放时饿死其他任务
+            return
+        due = started + (self.replayed_samples + self.chunk_size) / self.sample_rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            self.lag_seconds = max(self.lag_seconds, -delay)
+
+    def _emit(self, chunk: np.ndarray) -> AudioFrame:
+        # 全速回放时采集时间戳没有意义，媒体时间按已回放的样本数计算
+        media_time = self.replayed_samples / self.sample_rate
+        self.replayed_samples += len(chunk)
+        self._last_chunk = chunk
+        return AudioFrame(chunk, time.perf_counter(), media_time)
+
+    async def get_audio_chunk(self, timeout: Optional[float] = None) -> Optional[AudioFrame]:
+        """
+        获取下一个音频数据块
+
+        Returns:
+            带时间戳的音频数据块；回放结束或超时时返回None
+        """
+        if not self.is_recording:
+            return None
+        if self._frames is None:
+            self._frames = self.frames()
+        if self._next is None:
+            self._next = asyncio.ensure_future(self._frames.__anext__())
+
+        done, _ = await asyncio.wait({self._next}, timeout=timeout)
+        if not done:
+            return None
+        task, self._next = self._next, None
+        try:
+            return task.result()
+        except StopAsyncIteration:
+            return None
+
+    async def stop(self):
+        """停止回放"""
+        self.is_recording = False
+        logger.info("音频回放已停止")
+
+    def get_audio_level(self) -> float:
+        """获取当前音频电平（最近一个产出的音频块）"""
+        if self._last_chunk is None:
+            return 0.0
+        return float(np.abs(self._last_chunk).mean())
+
+    def get_stats(self) -> dict:
+        """获取回放统计信息"""
+        return {
+            "queue_depth": 0,
+            "queue_capacity": 0,
+            "dropped_chunks": self.dropped_chunks,
+            "input_overflows": 0,
+            "replayed_seconds": self.replayed_samples / self.sample_rate,
+            "lag_seconds": self.lag_seconds,
+        }
@@ -0,0 +1,121 @@
+"""
+HTTP客户端模块
+共享的aiohttp连接池：长连接复用、DNS缓存、启动时预热连接，并统计连接复用情况
+"""
+import asyncio
+import logging
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """
+    共享HTTP客户端
+
+    所有翻译请求复用同一个 ClientSession 和连接池，避免每次请求重新建立TCP/TLS连接。
+    会话在第一次使用时创建（必须在事件循环中），由创建者负责调用 close()。
+    """
+
+    def __init__(self, pool_size: int = 8, pool_size_per_host: int = 4,
+                 keepalive_timeout: float = 60.0, dns_ttl: int = 300):
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self._session = None
+
+        # 统计计数
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """获取共享会话（首次调用时创建）"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                trace_configs=[self._make_trace_config()],
+            )
+        return self._session
+
+    def _make_trace_config(self) -> aiohttp.TraceConfig:
+        """通过aiohttp的追踪钩子统计连接创建与复用"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            self.requests += 1
+
+        async def on_connection_create_end(session, context, params):
+            self.connections_created += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            self.connections_reused += 1
+
+        async def on_dns_cache_hit(session, context, params):
+            self.dns_cache_hits += 1
+
+        async def on_dns_cache_miss(session, context, params):
+            self.dns_cache_misses += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+    async def warmup(self, url: str, headers: Optional[dict] = None, connections: int = 2) -> int:
+        """
+        预热连接：并发请求 url，提前完成DNS解析和TCP/TLS握手，连接随后留在池中复用
+
+        Args:
+            url: 预热请求的地址（应为轻量的GET接口）
+            connections: 预热的连接数
+
+        Returns:
+            成功预热的连接数
+        """
+        session = await self.get_session()
+
+        async def probe():
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                await response.read()
+                return response.status
+
+        results = await asyncio.gather(*(probe() for _ in range(connections)), return_exceptions=True)
+        warmed = sum(1 for result in results if not isinstance(result, Exception))
+        failures = [result for result in results if isinstance(result, Exception)]
+        if failures:
+            logger.warning(f"连接预热失败: {failures[0]}")
+        logger.info(f"HTTP连接预热完成: {warmed}/{connections}")
+        return warmed
+
+    async def close(self):
+        """关闭会话和连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def get_stats(self) -> dict:
+        """获取连接复用统计"""
+        connections = self.connections_created + self.connections_reused
+        return {
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_rate": self.connections_reused / connections if connections else 0.0,
+            "dns_cache_hits": self.dns_cache_hits,
+            "dns_cache_misses": self.dns_cache_misses,
+        }
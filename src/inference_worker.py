@@ -0,0 +1,121 @@
+"""
+推理工作器模块
+在独立线程中执行阻塞的模型推理，避免阻塞asyncio事件循环
+"""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceWorker:
+    """
+    后台推理工作器
+
+    任务进入有界等待队列，由调度协程逐个交给线程池执行：
+    - 队列已满时丢弃最旧的等待任务（其调用方收到CancelledError），保证始终处理最新的音频
+    - 调用方被取消时，尚未开始的任务直接跳过，已在执行的任务结果被丢弃
+    """
+
+    def __init__(self, max_pending: int = 2, max_workers: int = 1, name: str = "inference"):
+        self.max_pending = max_pending
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._queue = None
+        self._task = None
+
+        # 统计计数
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.dropped = 0
+
+    def _ensure_started(self):
+        """在当前事件循环中启动调度协程"""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._task = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def submit(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        提交阻塞任务并等待结果
+
+        Args:
+            fn: 在工作线程中执行的函数
+
+        Returns:
+            fn的返回值
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+
+        if self._queue.full():
+            # 丢弃最旧的等待任务
+            stale_future, _ = self._queue.get_nowait()
+            stale_future.cancel()
+            self.dropped += 1
+            logger.warning(f"{self.name}队列已满，丢弃最旧的等待任务")
+
+        self._queue.put_nowait((future, functools.partial(fn, *args, **kwargs)))
+        self.submitted += 1
+        return await future
+
+    async def _dispatch(self):
+        """调度协程：逐个在线程池中执行任务"""
+        loop = asyncio.get_running_loop()
+        while True:
+            future, job = await self._queue.get()
+            if future.done():
+                self.cancelled += 1
+                continue
+
+            try:
+                result = await loop.run_in_executor(self._executor, job)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+
+            if future.done():
+                # 调用方在推理期间被取消，丢弃结果
+                self.cancelled += 1
+            else:
+                future.set_result(result)
+                self.completed += 1
+
+    @property
+    def pending(self) -> int:
+        """等待执行的任务数"""
+        return self._queue.qsize() if self._queue else 0
+
+    async def shutdown(self):
+        """停止调度并取消全部等待任务"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while self._queue and not self._queue.empty():
+            future, _ = self._queue.get_nowait()
+            future.cancel()
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> dict:
+        """获取统计信息"""
+        return {
+            "pending": self.pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,186 @@
+"""
+本地翻译模块
+使用CTranslate2在CPU上运行MarianMT等序列到序列翻译模型，无需网络
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from .translation import BaseTranslator
+from .translation_cache import TranslationCache
+
+try:
+    import ctranslate2
+except ImportError:  # 可选依赖
+    ctranslate2 = None
+
+try:
+    from transformers import AutoTokenizer
+except ImportError:  # 可选依赖
+    AutoTokenizer = None
+
+logger = logging.getLogger(__name__)
+
+# 多目标语言模型（如 opus-mt-en-zh）用源句开头的语言标记选择输出语言
+TARGET_TOKENS = {
+    "zh-CN": ">>cmn_Hans<<",
+    "zh-TW": ">>cmn_Hant<<",
+}
+
+
+class CTranslate2Translator(BaseTranslator):
+    """
+    CTranslate2本地翻译
+
+    模型需预先转换为CTranslate2格式，并把分词器文件一起复制到模型目录，例如：
+        ct2-transformers-converter --model Helsinki-NLP/opus-mt-en-zh \\
+            --output_dir models/opus-mt-en-zh-ct2 --quantization int8 \\
+            --copy_files source.spm target.spm vocab.json tokenizer_config.json
+
+    不复制分词器文件时，tokenizer 需指定为Hugging Face模型名（如 Helsinki-NLP/opus-mt-en-zh）。
+    TARGET_LANGUAGE 对应的目标语言标记（见 TARGET_TOKENS）加在每句源文开头，不支持的目标语言在创建时报错。
+
+    推理在单个后台线程中执行，translate_batch 一次送入多句（配合 BatchingTranslator 合并并发请求）。
+    模型在第一次翻译或 warmup 时加载。
+    """
+
+    def __init__(self, model_path: str, tokenizer: str = None, device: str = "cpu", compute_type: str = "int8",
+                 intra_threads: int = 0, beam_size: int = 2, max_batch_size: int = 16,
+                 cache: Optional[TranslationCache] = None):
+        if ctranslate2 is None or AutoTokenizer is None:
+            raise ImportError("本地翻译需要安装依赖: pip install ctranslate2 transformers sentencepiece")
+
+        self.model_path = model_path
+        self.tokenizer_name = tokenizer or model_path
+        self.device = device
+        self.compute_type = compute_type
+        self.intra_threads = intra_threads
+        self.beam_size = beam_size
+        self.max_batch_size = max_batch_size
+        self.cache = cache
+        self.model = Path(model_path).name  # 用于缓存键
+        self.target_language = os.getenv("TARGET_LANGUAGE", "zh-CN")
+        if self.target_language not in TARGET_TOKENS:
+            raise ValueError(
+                f"本地翻译模型不支持目标语言: {self.target_language}，可选: {', '.join(TARGET_TOKENS)}"
+            )
+        self.target_token = TARGET_TOKENS[self.target_language]
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ct2")
+        self._translator = None
+        self._tokenizer = None
+
+        # 统计计数
+        self.sentences = 0
+        self.batches = 0
+        self.inference_seconds = 0.0
+
+    def _ensure_loaded(self):
+        """加载模型和分词器（在推理线程中调用）"""
+        if self._translator is not None:
+            return
+        started = time.perf_counter()
+        self._translator = ctranslate2.Translator(
+            self.model_path,
+            device=self.device,
+            compute_type=self.compute_type,
+            intra_threads=self.intra_threads,
+        )
+        try:
+            self._tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+        except (OSError, ValueError) as e:
+            raise RuntimeError(
+                f"无法加载分词器 {self.tokenizer_name}: 请在转换模型时用 --copy_files 复制 "
+                f"source.spm target.spm vocab.json tokenizer_config.json，或设置 CT2_TOKENIZER 为原模型名"
+            ) from e
+        logger.info(f"本地翻译模型加载完成: {self.model} ({time.perf_counter() - started:.1f}s)")
+
+    def _translate_sync(self, texts: list[str]) -> list[str]:
+        """同步批量翻译（在推理线程中执行）"""
+        self._ensure_loaded()
+        started = time.perf_counter()
+        sources = [
+            [self.target_token] + self._tokenizer.convert_ids_to_tokens(self._tokenizer.encode(text))
+            for text in texts
+        ]
+        results = self._translator.translate_batch(
+            sources,
+            beam_size=self.beam_size,
+            max_batch_size=self.max_batch_size,
+            max_decoding_length=256,
+        )
+        translations = [
+            self._tokenizer.decode(
+                self._tokenizer.convert_tokens_to_ids(result.hypotheses[0]), skip_special_tokens=True
+            ).strip()
+            for result in results
+        ]
+        self.inference_seconds += time.perf_counter() - started
+        self.batches += 1
+        self.sentences += len(texts)
+        return translations
+
+    async def translate(self, text: str) -> Optional[str]:
+        """翻译单句"""
+        if not text or not text.strip():
+            return None
+        return (await self.translate_batch([text]))[0]
+
+    async def translate_batch(self, texts: list[str]) -> list[Optional[str]]:
+        """批量翻译：未命中缓存的句子一次送入模型"""
+        results = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                continue
+            if self.cache:
+                results[i] = await self.cache.get(text, self.target_language, self.model)
+            if results[i] is None:
+                pending.append(i)
+        if not pending:
+            return results
+
+        sources = [texts[i] for i in pending]
+        try:
+            loop = asyncio.get_running_loop()
+            translations = await loop.run_in_executor(self._executor, self._translate_sync, sources)
+        except Exception as e:
+            logger.error(f"本地翻译失败: {e}")
+            return results
+
+        for i, source, translated in zip(pending, sources, translations):
+            results[i] = translated or None
+            if self.cache and translated:
+                await self.cache.set(source, self.target_language, self.model, translated)
+        return results
+
+    async def warmup(self, connections: int = 2) -> int:
+        """在后台线程加载模型并翻译一句，避免第一句字幕等待模型加载"""
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self._translate_sync, ["Hello."])
+        except Exception as e:
+            logger.warning(f"本地翻译模型预热失败: {e}")
+        return 0
+
+    async def test_connection(self) -> bool:
+        """检查模型目录是否存在"""
+        return Path(self.model_path).is_dir()
+
+    async def close(self):
+        """停止推理线程并关闭缓存"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.cache:
+            self.cache.close()
+
+    def get_stats(self) -> dict:
+        """获取推理统计"""
+        return {
+            "sentences": self.sentences,
+            "batches": self.batches,
+            "avg_batch_size": self.sentences / self.batches if self.batches else 0.0,
+            "inference_seconds": self.inference_seconds,
+        }
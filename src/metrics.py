@@ -0,0 +1,105 @@
+"""
+指标导出模块
+把流水线统计格式化为Prometheus文本格式，并通过本地HTTP端点提供
+"""
+import logging
+from typing import Callable, Dict, List, Optional
+
+from aiohttp import web
+
+from .pipeline import LATENCY_BUCKETS, StageStats
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value) -> str:
+    """转义标签值中的反斜杠、引号和换行"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsWriter:
+    """
+    Prometheus文本格式生成器
+
+    同名指标的样本归到一起，HELP/TYPE 只输出一次。
+    """
+
+    def __init__(self, prefix: str = "subtitle"):
+        self.prefix = prefix
+        self._families: Dict[str, tuple] = {}  # 名称 -> (类型, 说明, 样本行)
+
+    def _family(self, name: str, kind: str, help_text: str) -> List[str]:
+        name = f"{self.prefix}_{name}"
+        if name not in self._families:
+            self._families[name] = (kind, help_text, [])
+        return self._families[name][2]
+
+    @staticmethod
+    def _labels(labels: Optional[dict], extra: Optional[dict] = None) -> str:
+        merged = {**(labels or {}), **(extra or {})}
+        if not merged:
+            return ""
+        return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in merged.items()) + "}"
+
+    def gauge(self, name: str, help_text: str, value: float, labels: Optional[dict] = None):
+        self._family(name, "gauge", help_text).append(
+            f"{self.prefix}_{name}{self._labels(labels)} {float(value)}"
+        )
+
+    def counter(self, name: str, help_text: str, value: float, labels: Optional[dict] = None):
+        self._family(f"{name}_total", "counter", help_text).append(
+            f"{self.prefix}_{name}_total{self._labels(labels)} {float(value)}"
+        )
+
+    def histogram(self, name: str, help_text: str, stats: StageStats, labels: Optional[dict] = None):
+        lines = self._family(name, "histogram", help_text)
+        full_name = f"{self.prefix}_{name}"
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, stats.bucket_counts):
+            cumulative += count
+            lines.append(f"{full_name}_bucket{self._labels(labels, {'le': bound})} {cumulative}")
+        lines.append(f"{full_name}_bucket{self._labels(labels, {'le': '+Inf'})} {stats.count}")
+        lines.append(f"{full_name}_sum{self._labels(labels)} {stats.total}")
+        lines.append(f"{full_name}_count{self._labels(labels)} {stats.count}")
+
+    def render(self) -> str:
+        out = []
+        for name, (kind, help_text, lines) in self._families.items():
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+class MetricsServer:
+    """本地指标端点：GET /metrics 返回 collect() 生成的Prometheus文本"""
+
+    def __init__(self, collect: Callable[[], str], host: str = "127.0.0.1", port: int = 9464):
+        self.collect = collect
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.collect(), content_type="text/plain", charset="utf-8")
+
+    async def start(self):
+        """启动HTTP端点；端口无法绑定时记录警告并返回"""
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+        except OSError as e:
+            # 指标端点是可选功能：端口被占用等情况下只告警，程序继续运行
+            logger.warning(f"指标端点启动失败（{self.host}:{self.port}）: {e}，不提供指标")
+            await self._runner.cleanup()
+            self._runner = None
+            return
+        logger.info(f"指标端点: http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
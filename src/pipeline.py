@@ -0,0 +1,152 @@
+"""
+流水线模块
+各处理阶段之间的有界队列、丢弃策略和阶段统计
+"""
+import asyncio
+import bisect
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, NamedTuple, Optional
+
+# 队列满时的处理策略
+BLOCK = "block"  # 生产者等待（背压）
+DROP_OLDEST = "drop_oldest"  # 丢弃最旧的元素，保证低延迟
+DROP_NEWEST = "drop_newest"  # 丢弃新元素，保证已排队内容完整
+
+# 延迟直方图的桶上限（秒），覆盖从几毫秒的渲染到数秒的整块识别
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_utterance_ids = itertools.count(1)
+
+
+class AudioFrame(NamedTuple):
+    """带采集时间戳的音频块"""
+    samples: Any  # np.ndarray
+    captured_at: float  # 采集时间（time.perf_counter，音频回调被调用的时刻）
+    media_time: Optional[float] = None  # 该块起点在音频流中的位置（秒，采集/回放开始时为0）
+
+
+@dataclass
+class Utterance:
+    """在流水线中传递的一句话"""
+    text: str
+    id: int = field(default_factory=lambda: next(_utterance_ids))
+    translated: Optional[str] = None
+    final: bool = True  # 流式翻译时，部分译文为False
+    created_at: float = field(default_factory=time.perf_counter)  # 识别完成时间
+    first_rendered_at: Optional[float] = None  # 首次显示时间
+    captured_at: Optional[float] = None  # 这句话第一个音频块的采集时间
+    audio_end_at: Optional[float] = None  # 这句话最后一个音频块的采集时间
+    media_start: Optional[float] = None  # 这句话在音频流中的起止位置（秒），用于字幕文件时间轴
+    media_end: Optional[float] = None
+    spans: Dict[str, float] = field(default_factory=dict)  # 各阶段耗时（秒）
+
+
+class StageQueue:
+    """
+    阶段间的有界队列
+
+    put 按照 policy 处理队列已满的情况，并记录丢弃数和最大深度。
+    """
+
+    def __init__(self, name: str, maxsize: int, policy: str = BLOCK):
+        if policy not in (BLOCK, DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"未知的队列策略: {policy}")
+        self.name = name
+        self.policy = policy
+        self._queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.max_depth = 0
+
+    async def put(self, item: Any) -> bool:
+        """
+        放入元素
+
+        Returns:
+            元素是否进入队列（DROP_NEWEST策略下可能被丢弃）
+        """
+        if self._queue.full():
+            if self.policy == DROP_OLDEST:
+                self._queue.get_nowait()
+                self.dropped += 1
+            elif self.policy == DROP_NEWEST:
+                self.dropped += 1
+                return False
+
+        await self._queue.put(item)
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    async def get(self) -> Any:
+        """取出元素"""
+        return await self._queue.get()
+
+    def get_latest_nowait(self, default: Any = None) -> Any:
+        """取出队列中全部已有元素，只返回最新的一个（用于合并更新）"""
+        latest = default
+        while not self._queue.empty():
+            latest = self._queue.get_nowait()
+        return latest
+
+    def qsize(self) -> int:
+        """当前队列深度"""
+        return self._queue.qsize()
+
+    @property
+    def maxsize(self) -> int:
+        return self._queue.maxsize
+
+    def get_stats(self) -> dict:
+        """获取统计信息"""
+        return {
+            "depth": self.qsize(),
+            "max_depth": self.max_depth,
+            "capacity": self.maxsize,
+            "policy": self.policy,
+            "dropped": self.dropped,
+        }
+
+
+class StageStats:
+    """
+    单个阶段的处理耗时统计
+
+    保留最近若干次样本用于计算分位数，同时按 LATENCY_BUCKETS 累计直方图（用于导出指标）。
+    """
+
+    def __init__(self, name: str, window: int = 256):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent = deque(maxlen=window)
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)  # 最后一个为 +Inf
+
+    def record(self, seconds: float):
+        """记录一次处理耗时"""
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+        self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def percentile(self, q: float) -> float:
+        """最近样本的分位数（秒）"""
+        if not self._recent:
+            return 0.0
+        ordered = sorted(self._recent)
+        index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def get_stats(self) -> dict:
+        """获取统计信息（毫秒）"""
+        return {
+            "count": self.count,
+            "avg_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
@@ -0,0 +1,86 @@
+"""
+流式重采样模块
+把采集设备原生采样率、多声道的音频块转换为Whisper需要的16kHz单声道float32
+"""
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import firwin
+
+
+class StreamingResampler:
+    """
+    流式多相(polyphase)重采样器 + 声道下混
+
+    滤波器与 scipy.signal.resample_poly 相同（Kaiser窗FIR），但在块之间保留滤波器状态，
+    逐块处理与一次处理整段音频的结果一致，块边界没有失真。每块只做一次向量化的
+    "窗口 × 多相系数"点积，不逐样本循环。
+
+    滤波器是因果的，下采样时输出相对输入有 half_taps 个输出样本的群延迟（16kHz下约0.6ms）。
+    """
+
+    def __init__(self, input_rate: int, output_rate: int = 16000, half_taps: int = 10, beta: float = 5.0):
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        divisor = gcd(input_rate, output_rate)
+        self.up = output_rate // divisor
+        self.down = input_rate // divisor
+        self.passthrough = self.up == self.down
+
+        if not self.passthrough:
+            max_rate = max(self.up, self.down)
+            taps = firwin(2 * half_taps * max_rate + 1, 1.0 / max_rate, window=("kaiser", beta)) * self.up
+            per_phase = -(-len(taps) // self.up)
+            taps = np.pad(taps, (0, per_phase * self.up - len(taps)))
+            # 多相分解: phases[p, k] = taps[p + k*up]；反转后可直接与按时间顺序排列的输入窗口做点积
+            self._phases = np.ascontiguousarray(taps.reshape(per_phase, self.up).T[:, ::-1], dtype=np.float32)
+            self._history = np.zeros(per_phase - 1, dtype=np.float32)  # 上一块末尾的输入样本
+        self._consumed = 0  # 已输入的样本数（不含历史）
+        self._produced = 0  # 已输出的样本数
+
+    @staticmethod
+    def downmix(block: np.ndarray) -> np.ndarray:
+        """多声道 [帧, 声道] 取平均混为单声道float32"""
+        if block.ndim == 2:
+            block = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+        return np.asarray(block, dtype=np.float32)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        处理一个音频块
+
+        Args:
+            block: 一维单声道或 [帧, 声道] 的float32音频
+
+        Returns:
+            output_rate 下的单声道float32音频（长度随块边界在 ±1 内变化）。
+            总是新分配的数组，不与 block 共享内存（调用方可以复用输入缓冲区）
+        """
+        audio = self.downmix(block)
+        if self.passthrough:
+            self._consumed += len(audio)
+            self._produced += len(audio)
+            # 单声道输入时 downmix 返回的是 block 的视图
+            return audio.copy() if np.shares_memory(audio, block) else audio
+
+        buffer = np.concatenate((self._history, audio))
+        base = self._consumed
+        self._consumed += len(audio)
+
+        # 第m个输出对应上采样序列中的位置 m*down，由输入样本 j = m*down // up 及其之前的样本决定，
+        # 使用的多相分支为 (m*down) % up；计算到当前块最后一个输入样本能决定的输出为止
+        end = (self._consumed * self.up - 1) // self.down + 1
+        positions = np.arange(self._produced, end, dtype=np.int64) * self.down
+        self._produced = end
+        windows = sliding_window_view(buffer, self._phases.shape[1])[positions // self.up - base]
+        output = np.einsum("ij,ij->i", windows, self._phases[positions % self.up])
+
+        self._history = buffer[len(buffer) - len(self._history):]
+        return output.astype(np.float32, copy=False)
+
+    def reset(self):
+        """清空滤波器状态（例如切换设备后）"""
+        if not self.passthrough:
+            self._history[:] = 0
+        self._consumed = self._produced = 0
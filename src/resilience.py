@@ -0,0 +1,299 @@
+"""
+请求可靠性模块
+自适应令牌桶限流、截止时间内的抖动退避重试，以及按p95延迟触发的对冲请求
+"""
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from .pipeline import StageStats
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 可以重试的HTTP状态码（限流和服务端临时错误）
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class RequestError(Exception):
+    """一次请求失败"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = True,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after  # 服务端要求的等待时间（秒）
+
+    @property
+    def throttled(self) -> bool:
+        """是否被服务端限流"""
+        return self.status == 429
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数或HTTP日期），无法解析时返回None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """
+    自适应令牌桶
+
+    平时按 rate 次/秒发放令牌，最多积攒 burst 个；收到429时速率减半并清空令牌，
+    若带有 Retry-After 则在此之前暂停发放；之后每次成功请求把速率加回一小步（AIMD），
+    直到恢复配置的速率。
+    """
+
+    def __init__(self, rate: float = 3.0, burst: int = 5, min_rate: float = 0.2, recovery: float = 0.05):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.recovery = recovery  # 每次成功后恢复的速率（占配置速率的比例）
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+        # 统计计数
+        self.throttled = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """有空余令牌时立即取走一个，否则返回False（不等待）"""
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return False
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self, deadline: Optional[float] = None) -> bool:
+        """
+        等待并取走一个令牌
+
+        Args:
+            deadline: time.monotonic() 截止时间，预计等不到令牌时立即返回False
+
+        Returns:
+            是否取得令牌
+        """
+        started = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if now >= self._blocked_until:
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.waited_seconds += now - started
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            else:
+                wait = self._blocked_until - now
+            if deadline is not None and now + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        """请求成功：逐步恢复速率"""
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery)
+
+    def on_throttled(self, retry_after: Optional[float] = None):
+        """收到429：速率减半，并在 Retry-After 之前暂停发放令牌"""
+        now = time.monotonic()
+        self._refill(now)
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = 0.0
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+        logger.warning(f"请求被限流，速率降至 {self.rate:.2f}次/秒"
+                       + (f"，{retry_after:.1f}s 后恢复" if retry_after else ""))
+
+    def get_stats(self) -> dict:
+        return {
+            "rate": self.rate,
+            "max_rate": self.max_rate,
+            "throttled": self.throttled,
+            "waited_seconds": self.waited_seconds,
+        }
+
+
+class RetryPolicy:
+    """
+    重试策略：最多 max_attempts 次尝试，全部尝试（含等待）必须在 deadline 秒内完成，
+    两次尝试之间按指数退避加全抖动等待，服务端给出 Retry-After 时以其为下限
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.2, max_delay: float = 2.0,
+                 deadline: float = 8.0, attempt_timeout: float = 10.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+
+    def backoff(self, retry: int, retry_after: Optional[float] = None) -> float:
+        """第 retry 次重试前的等待时间（秒）"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class ResilientCaller:
+    """
+    可靠请求执行器
+
+    attempt(timeout) 是一次完整的请求，失败时抛出 RequestError。执行器负责限流、
+    重试和对冲：开启 hedge 时，若请求超过近期成功请求的p95延迟仍未返回，
+    且限流器有空余令牌，则再发一个相同请求，取先成功的结果并取消另一个。
+    """
+
+    def __init__(self, limiter: Optional[AdaptiveRateLimiter] = None, policy: Optional[RetryPolicy] = None,
+                 hedge: bool = False, hedge_percentile: float = 95, hedge_min_samples: int = 20,
+                 hedge_min_delay: float = 0.05):
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.policy = policy or RetryPolicy()
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.latency = StageStats("request")  # 成功请求的耗时，用于确定对冲时机
+
+        # 统计计数
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failures = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """对冲触发延迟（秒），样本不足时返回None"""
+        if self.latency.count < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, self.latency.percentile(self.hedge_percentile))
+
+    async def call(self, attempt: Callable[[float], Awaitable[T]], hedge: Optional[bool] = None) -> T:
+        """
+        执行请求
+
+        Args:
+            attempt: 接受本次超时时间（秒）的协程函数
+            hedge: 是否允许对冲（默认使用构造参数）
+
+        Raises:
+            RequestError: 全部尝试失败或超过截止时间
+        """
+        hedge = self.hedge if hedge is None else hedge
+        self.calls += 1
+        deadline = time.monotonic() + self.policy.deadline
+        last_error = None
+
+        for retry in range(self.policy.max_attempts):
+            if retry:
+                delay = self.policy.backoff(retry, last_error.retry_after)
+                if time.monotonic() + delay >= deadline:
+                    break
+                self.retries += 1
+                logger.warning(f"请求失败({last_error})，{delay:.2f}s 后第{retry}次重试")
+                await asyncio.sleep(delay)
+
+            if not await self.limiter.acquire(deadline):
+                last_error = RequestError("等待限流令牌超过截止时间", retryable=False)
+                break
+            try:
+                if hedge:
+                    return await self._hedged_attempt(attempt, deadline)
+                return await self._attempt(attempt, deadline)
+            except RequestError as e:
+                last_error = e
+                if not e.retryable:
+                    break
+
+        self.failures += 1
+        raise last_error or RequestError("请求超过截止时间")
+
+    async def _attempt(self, attempt: Callable[[float], Awaitable[T]], deadline: float) -> T:
+        """执行一次尝试，记录耗时并把结果反馈给限流器"""
+        self.attempts += 1
+        timeout = min(self.policy.attempt_timeout, deadline - time.monotonic())
+        if timeout <= 0:
+            raise RequestError("请求超过截止时间", retryable=False)
+        started = time.perf_counter()
+        try:
+            result = await attempt(timeout)
+        except asyncio.TimeoutError:
+            raise RequestError(f"请求超时({timeout:.1f}s)") from None
+        except RequestError as e:
+            if e.throttled:
+                self.limiter.on_throttled(e.retry_after)
+            raise
+        self.latency.record(time.perf_counter() - started)
+        self.limiter.on_success()
+        return result
+
+    async def _hedged_attempt(self, attempt: Callable[[float], Awaitable[T]], deadline: float) -> T:
+        """主请求超过对冲延迟仍未返回时，在有空余配额的前提下发出备份请求"""
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._attempt(attempt, deadline)
+
+        loop = asyncio.get_running_loop()
+        primary = loop.create_task(self._attempt(attempt, deadline))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self.limiter.try_acquire():
+                self.hedged += 1
+                tasks.add(loop.create_task(self._attempt(attempt, deadline)))
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_stats(self) -> dict:
+        """获取请求统计"""
+        latency = self.latency.get_stats()
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "failures": self.failures,
+            "p50_ms": latency["p50_ms"],
+            "p95_ms": latency["p95_ms"],
+            "limiter": self.limiter.get_stats(),
+        }
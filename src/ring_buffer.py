@@ -0,0 +1,114 @@
+"""
+音频环形缓冲区模块
+固定容量的float32环形缓冲区，写入不分配内存，窗口读取零拷贝
+"""
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    固定容量的音频环形缓冲区
+
+    底层数组长度为容量的两倍，每个样本同时写入 i 和 i + capacity 两个位置（镜像写入），
+    因此任意长度不超过容量的窗口在内存中都是连续的，可以直接返回视图而无需拷贝。
+    """
+
+    def __init__(self, capacity: int, dtype=np.float32):
+        if capacity <= 0:
+            raise ValueError("capacity必须为正整数")
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(self.capacity * 2, dtype=self.dtype)
+        self._write_index = 0  # 下一次写入的位置 [0, capacity)
+        self._size = 0  # 当前有效样本数
+        self.total_written = 0  # 累计写入样本数（单调递增，可用于换算时间戳）
+        self.overflow_samples = 0  # 因容量不足被覆盖的样本数
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def is_full(self) -> bool:
+        """缓冲区是否已满"""
+        return self._size == self.capacity
+
+    @property
+    def start_sample(self) -> int:
+        """缓冲区中最旧样本的绝对序号"""
+        return self.total_written - self._size
+
+    def write(self, samples: np.ndarray) -> int:
+        """
+        写入样本，容量不足时覆盖最旧的数据
+
+        Args:
+            samples: 一维音频数据
+
+        Returns:
+            实际写入的样本数
+        """
+        samples = np.asarray(samples).reshape(-1)
+        n = samples.shape[0]
+        if n == 0:
+            return 0
+
+        if n > self.capacity:
+            # 只保留最新的 capacity 个样本
+            self.overflow_samples += n - self.capacity
+            self.total_written += n - self.capacity
+            samples = samples[-self.capacity:]
+            n = self.capacity
+
+        cap = self.capacity
+        start = self._write_index
+        first = min(n, cap - start)
+        rest = n - first
+
+        # 镜像写入：[start, start+first) 与 [start+cap, start+cap+first)
+        self._data[start:start + first] = samples[:first]
+        self._data[start + cap:start + cap + first] = samples[:first]
+        if rest:
+            self._data[:rest] = samples[first:]
+            self._data[cap:cap + rest] = samples[first:]
+
+        self._write_index = (start + n) % cap
+        overflow = max(0, self._size + n - cap)
+        self.overflow_samples += overflow
+        self._size = min(cap, self._size + n)
+        self.total_written += n
+        return n
+
+    def view(self, n: int = None) -> np.ndarray:
+        """
+        获取最新 n 个样本的只读视图（从旧到新，零拷贝）
+
+        注意：视图会被后续写入覆盖，跨线程或跨await使用前需自行拷贝。
+
+        Args:
+            n: 样本数，默认返回全部有效数据
+        """
+        if n is None or n > self._size:
+            n = self._size
+        start = (self._write_index - n) % self.capacity
+        window = self._data[start:start + n]
+        window.flags.writeable = False
+        return window
+
+    def consume(self, n: int) -> int:
+        """
+        丢弃最旧的 n 个样本
+
+        Returns:
+            实际丢弃的样本数
+        """
+        n = max(0, min(int(n), self._size))
+        self._size -= n
+        return n
+
+    def clear(self):
+        """清空缓冲区（不释放内存）"""
+        self._size = 0
+
+    def duration(self, sample_rate: int) -> float:
+        """当前缓冲的音频时长（秒）"""
+        return self._size / sample_rate
@@ -0,0 +1,198 @@
+"""
+流式识别模块
+基于LocalAgreement策略，对重叠窗口的多次解码结果做一致性确认，增量提交稳定前缀
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+
+@dataclass
+class Word:
+    """带绝对时间戳的单词"""
+    start: float
+    end: float
+    text: str
+
+    @property
+    def key(self) -> str:
+        """用于一致性比较的归一化文本"""
+        return re.sub(r"[^\w']+", "", self.text.lower())
+
+
+def join_words(words: List[Word]) -> str:
+    """拼接单词文本（Whisper的单词自带前导空格）"""
+    return "".join(word.text for word in words).strip()
+
+
+class LocalAgreementBuffer:
+    """
+    LocalAgreement-2 假设缓冲区
+
+    每次解码得到一个新假设，与上一次假设的最长公共前缀被认为是稳定的，立即提交；
+    剩余部分作为临时假设展示，等待下一次解码确认。
+    """
+
+    def __init__(self, max_ngram: int = 5, tolerance: float = 0.1):
+        self.max_ngram = max_ngram  # 去除与已提交内容重叠时检查的最大词数
+        self.tolerance = tolerance  # 时间戳抖动容差（秒）
+        self.committed: List[Word] = []
+        self.last_committed_time = 0.0
+        self._previous: List[Word] = []
+
+    def insert(self, words: List[Word]) -> List[Word]:
+        """
+        插入新的解码结果（绝对时间戳），返回本次新提交的单词
+
+        Args:
+            words: 本次窗口解码得到的全部单词
+        """
+        # 只保留已提交时间之后的单词
+        words = [w for w in words if w.start > self.last_committed_time - self.tolerance]
+        words = self._strip_committed_overlap(words)
+
+        newly_committed = []
+        for new_word, old_word in zip(words, self._previous):
+            if not new_word.key or new_word.key != old_word.key:
+                break
+            newly_committed.append(new_word)
+
+        if newly_committed:
+            self.committed.extend(newly_committed)
+            self.last_committed_time = newly_committed[-1].end
+
+        self._previous = words[len(newly_committed):]
+        return newly_committed
+
+    def _strip_committed_overlap(self, words: List[Word]) -> List[Word]:
+        """去掉窗口开头与已提交末尾重复的n-gram（窗口重叠导致的重复识别）"""
+        if not words or not self.committed:
+            return words
+        if abs(words[0].start - self.last_committed_time) > 1.0:
+            return words
+
+        max_n = min(len(words), len(self.committed), self.max_ngram)
+        for n in range(max_n, 0, -1):
+            tail = [w.key for w in self.committed[-n:]]
+            head = [w.key for w in words[:n]]
+            if tail == head:
+                return words[n:]
+        return words
+
+    def flush(self) -> List[Word]:
+        """强制提交全部临时假设（例如语句结束时）"""
+        remaining = self._previous
+        if remaining:
+            self.committed.extend(remaining)
+            self.last_committed_time = remaining[-1].end
+        self._previous = []
+        return remaining
+
+    @property
+    def provisional(self) -> List[Word]:
+        """尚未确认的临时假设"""
+        return list(self._previous)
+
+    def committed_text(self, max_chars: Optional[int] = None) -> str:
+        """已提交文本，可截取末尾若干字符作为下一次解码的提示词"""
+        text = join_words(self.committed)
+        if max_chars is not None:
+            text = text[-max_chars:]
+        return text
+
+    def trim_committed(self, keep: int = 50):
+        """只保留最近的已提交单词，防止长时间运行时无限增长"""
+        if len(self.committed) > keep:
+            del self.committed[:-keep]
+
+    def reset(self):
+        """重置全部状态"""
+        self.committed.clear()
+        self._previous = []
+        self.last_committed_time = 0.0
+
+
+# 句末标点：西文标点后须为空白或文本末尾（避免切开 3.5 这类数字），中日文标点直接成句
+SENTENCE_END = re.compile(r"[.!?…]+[\"'”’)\]]*(?=\s|$)|[。！？]+[”’」』）]*")
+
+
+def _join_text(left: str, right: str) -> str:
+    """拼接两段文本：中日文之间不加空格"""
+    if not left or not right:
+        return left or right
+    if left[-1] >= "⺀" and right[0] >= "⺀":
+        return left + right
+    return f"{left} {right}"
+
+
+class SentenceAssembler:
+    """
+    把流式识别增量提交的片段拼成句子
+
+    LocalAgreement 每次只提交一到几个词，逐个翻译既浪费请求又失去上下文：
+    片段先在这里累积，遇到句末标点时切出完整句子；语句结束（VAD切分）时由 flush() 取出剩余部分；
+    没有标点的长段在超过 max_chars 时强制切分。
+    片段附带单词时间戳时，span() 按句子顺序取出每句覆盖的时间范围。
+    """
+
+    def __init__(self, max_chars: int = 200):
+        self.max_chars = max_chars
+        self.pending = ""  # 已提交但尚未成句的文本
+        self._words: List[Word] = []  # 已提交、尚未归入句子的单词
+        self._spans: List[Optional[Tuple[float, float]]] = []  # 已切出、尚未被 span() 取走的句子时间
+
+    def add(self, text: str, words: Optional[List[Word]] = None) -> List[str]:
+        """加入新提交的文本（及其单词时间戳），返回已完成的句子"""
+        if words:
+            self._words.extend(words)
+        self.pending = _join_text(self.pending, text.strip())
+        sentences = []
+        while True:
+            match = SENTENCE_END.search(self.pending)
+            if not match:
+                break
+            sentence = self.pending[:match.end()].strip()
+            self.pending = self.pending[match.end():].strip()
+            if sentence:
+                sentences.append(sentence)
+                self._spans.append(self._take_words(sentence))
+        if len(self.pending) > self.max_chars:
+            sentences.append(self.pending)
+            self.pending = ""
+            self._spans.append(self._take_words(sentences[-1]))
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """取出剩余的未成句文本"""
+        text, self.pending = self.pending, ""
+        span = self._take_words(text)
+        if text:
+            self._spans.append(span)
+        return text or None
+
+    def span(self) -> Optional[Tuple[float, float]]:
+        """
+        按顺序取出 add()/flush() 返回的下一句的 (开始, 结束) 时间，没有单词时间戳时返回None
+        """
+        return self._spans.pop(0) if self._spans else None
+
+    def _take_words(self, sentence: str) -> Optional[Tuple[float, float]]:
+        """
+        取出一句话覆盖的单词
+
+        按字符数对齐句子和单词；没有未成句文本时取出全部剩余单词，对齐误差不会累积到下一段语音。
+        """
+        if not self.pending:
+            words, self._words = self._words, []
+        else:
+            count = 0
+            while count < len(self._words) and len(join_words(self._words[:count])) < len(sentence):
+                count += 1
+            words, self._words = self._words[:count], self._words[count:]
+        if not words:
+            return None
+        return words[0].start, words[-1].end
+
+    def preview(self, provisional: str) -> str:
+        """当前句子的显示文本：已提交部分 + 临时假设"""
+        return _join_text(self.pending, provisional.strip())
@@ -0,0 +1,96 @@
+"""
+字幕历史模块
+固定容量的环形存储，长时间运行时内存占用保持不变
+"""
+import time
+from typing import Iterator, NamedTuple, Optional
+
+import numpy as np
+
+
+class HistoryEntry(NamedTuple):
+    """一条字幕历史"""
+    utterance_id: int
+    timestamp: float  # 识别完成的墙钟时间（time.time()）
+    source: str
+    translation: Optional[str]
+
+
+class SubtitleHistory:
+    """
+    字幕历史环形存储
+
+    句子ID和时间戳存放在预分配的numpy数组中，原文和译文存放在定长列表的槽位里；
+    写满后覆盖最旧的一条，追加和按ID更新都是O(1)。
+    """
+
+    def __init__(self, capacity: int = 200):
+        self.capacity = capacity
+        self._ids = np.full(capacity, -1, dtype=np.int64)
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._sources = [None] * capacity
+        self._translations = [None] * capacity
+        self._slot_of = {}  # 句子ID -> 槽位（只包含仍在存储中的句子）
+        self._written = 0  # 累计追加条数
+        self.evicted = 0  # 被覆盖的条数
+
+    def __len__(self) -> int:
+        return min(self._written, self.capacity)
+
+    def append(self, utterance_id: int, source: str, timestamp: Optional[float] = None) -> bool:
+        """
+        追加一句原文
+
+        Returns:
+            是否覆盖了最旧的一条
+        """
+        slot = self._written % self.capacity
+        evicted = self._written >= self.capacity
+        if evicted:
+            self._slot_of.pop(int(self._ids[slot]), None)
+            self.evicted += 1
+        self._ids[slot] = utterance_id
+        self._timestamps[slot] = time.time() if timestamp is None else timestamp
+        self._sources[slot] = source
+        self._translations[slot] = None
+        self._slot_of[utterance_id] = slot
+        self._written += 1
+        return evicted
+
+    def set_source(self, utterance_id: int, source: str) -> bool:
+        """更新某句的原文（流式识别中句子逐步补全），句子已不在存储中时返回False"""
+        slot = self._slot_of.get(utterance_id)
+        if slot is None:
+            return False
+        self._sources[slot] = source
+        return True
+
+    def set_translation(self, utterance_id: int, translation: str) -> bool:
+        """更新某句的译文，句子已不在存储中时返回False"""
+        slot = self._slot_of.get(utterance_id)
+        if slot is None:
+            return False
+        self._translations[slot] = translation
+        return True
+
+    def get(self, utterance_id: int) -> Optional[HistoryEntry]:
+        slot = self._slot_of.get(utterance_id)
+        return None if slot is None else self._entry(slot)
+
+    def _entry(self, slot: int) -> HistoryEntry:
+        return HistoryEntry(
+            int(self._ids[slot]), float(self._timestamps[slot]), self._sources[slot], self._translations[slot]
+        )
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        """从旧到新遍历"""
+        start = self._written - len(self)
+        for index in range(start, self._written):
+            yield self._entry(index % self.capacity)
+
+    def clear(self):
+        self._ids[:] = -1
+        self._sources = [None] * self.capacity
+        self._translations = [None] * self.capacity
+        self._slot_of.clear()
+        self._written = 0
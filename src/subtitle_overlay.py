@@ -6,14 +6,258 @@ import tkinter as tk
 from tkinter import font as tkfont
 import threading
 import queue
+import math
 import os
-from typing import Optional
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional
 import logging
 
+from .pipeline import StageStats
+from .subtitle_history import SubtitleHistory
+
 logger = logging.getLogger(__name__)
 
+FONT_FAMILY = "PingFang SC"
+
+
+class TextMeasurer:
+    """
+    文本宽度测量缓存（单一字号）
+
+    - 最近测量过的文本直接命中缓存
+    - 流式字幕每次只在末尾追加内容：新文本以上一次的文本开头时，只测量新增部分
+    """
+
+    def __init__(self, font: tkfont.Font, max_entries: int = 256):
+        self.font = font
+        self.max_entries = max_entries
+        self._cache: OrderedDict = OrderedDict()
+        self._last_text = ""
+        self._last_width = 0
+        self.measured = 0  # 实际调用Tk测量的次数
+
+    def width(self, text: str) -> int:
+        """文本单行显示时的像素宽度"""
+        width = self._cache.get(text)
+        if width is not None:
+            self._cache.move_to_end(text)
+        else:
+            self.measured += 1
+            if self._last_text and text.startswith(self._last_text):
+                width = self._last_width + self.font.measure(text[len(self._last_text):])
+            else:
+                width = self.font.measure(text)
+            self._cache[text] = width
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        self._last_text, self._last_width = text, width
+        return width
+
+
+class SubtitleComposer:
+    """
+    按句子ID合成两阶段字幕
+
+    识别结果一到就先显示原文，译文到达后替换（replace）或显示在原文上方（bilingual）；
+    translation 模式只显示译文（旧行为）。比已显示译文更早的句子的译文视为过期，直接丢弃。
+    语速较快时，较早句子的译文可能在后一句原文已上屏后才到达：此时译文与最新的原文一起显示，
+    不会让已显示的新原文退回到旧句子。
+    """
+
+    MODES = ("bilingual", "replace", "translation")
+
+    def __init__(self, mode: str = "bilingual", history: int = 8):
+        if mode not in self.MODES:
+            logger.warning(f"未知的字幕模式: {mode}，使用 bilingual")
+            mode = "bilingual"
+        self.mode = mode
+        self._sources: OrderedDict = OrderedDict()  # 最近几句的原文，按句子ID索引
+        self._history = history
+        self._translated_id = -1
+        self._latest_source_id = -1
+
+    def source(self, utterance_id: int, text: str) -> Optional[str]:
+        """记录原文，返回需要显示的文本（不需要更新显示时返回None）"""
+        self._sources[utterance_id] = text
+        self._latest_source_id = max(self._latest_source_id, utterance_id)
+        if len(self._sources) > self._history:
+            self._sources.popitem(last=False)
+        if self.mode == "translation":
+            return None
+        return text
+
+    def translation(self, utterance_id: int, text: str) -> Optional[str]:
+        """记录译文（可以是流式的部分译文），返回需要显示的文本"""
+        if utterance_id < self._translated_id:
+            return None
+        self._translated_id = utterance_id
+        if self.mode != "translation" and utterance_id < self._latest_source_id:
+            # 后一句的原文已经在屏幕上：保留它，译文显示在上方
+            return f"{text}\n{self._sources[self._latest_source_id]}"
+        source = self._sources.get(utterance_id)
+        if self.mode == "bilingual" and source:
+            return f"{text}\n{source}"
+        return text
+
+
+class HistoryPane:
+    """
+    字幕历史面板（独立的Toplevel窗口，Text控件可滚动）
+
+    每句字幕占Text中的一个逻辑行，并带有以句子ID命名的标签：新句子追加到末尾，超出容量时删除第一行，
+    译文到达时只替换该句所在的行，不重绘整个列表。同一帧内的多次更新合并处理
+    （流式译文逐段到达时只刷新最后的内容）。面板首次打开时才创建窗口并一次性填入已有历史。
+    """
+
+    def __init__(self, root: tk.Tk, history: SubtitleHistory, font: tkfont.Font,
+                 fg: str, bg: str, width: int, height: int = 300, interval: float = 1 / 60):
+        self.root = root
+        self.history = history
+        self.font = font
+        self.fg = fg
+        self.bg = bg
+        self.width = width
+        self.height = height
+        self.interval = interval
+        self.visible = False
+        self._window: Optional[tk.Toplevel] = None
+        self._text: Optional[tk.Text] = None
+        self._line_ids: deque = deque()  # 面板中各行对应的句子ID（从旧到新）
+        self._appended: list = []  # 待追加的句子ID
+        self._changed: set = set()  # 待刷新译文的句子ID
+        self._flush_scheduled = False
+
+    def append(self, utterance_id: int):
+        """新句子已写入历史存储"""
+        self._appended.append(utterance_id)
+        self._schedule()
+
+    def update(self, utterance_id: int):
+        """某句的译文已更新"""
+        self._changed.add(utterance_id)
+        self._schedule()
+
+    def toggle(self):
+        """显示/隐藏历史面板"""
+        if self.visible:
+            self._window.withdraw()
+            self.visible = False
+            return
+        if self._window is None:
+            self._create()
+        else:
+            self._flush()
+            self._window.deiconify()
+        self._place()
+        self.visible = True
+        self._text.see("end")
+
+    def _create(self):
+        self._window = tk.Toplevel(self.root)
+        self._window.overrideredirect(True)
+        self._window.attributes('-topmost', True)
+        self._text = tk.Text(
+            self._window, font=self.font, fg=self.fg, bg=self.bg, wrap="word",
+            borderwidth=0, highlightthickness=0, padx=10, pady=10,
+        )
+        scrollbar = tk.Scrollbar(self._window, command=self._text.yview)
+        self._text.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self._text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self._text.tag_config("time", foreground="gray")
+        self._text.tag_config("source", foreground="gray")
+        self._window.bind('<Escape>', lambda e: self.toggle())
+
+        # 之前的历史只在创建时整体填入一次，之后都是增量更新
+        self._appended.clear()
+        self._changed.clear()
+        for entry in self.history:
+            self._insert("end-1c", entry)
+            self._line_ids.append(entry.utterance_id)
+        self._text.config(state="disabled")
+
+    def _place(self):
+        """放在字幕窗口上方（空间不够时放在下方）"""
+        x = self.root.winfo_x()
+        y = self.root.winfo_y() - self.height - 10
+        if y < 0:
+            y = self.root.winfo_y() + self.root.winfo_height() + 10
+        self._window.geometry(f"{self.width}x{self.height}+{x}+{y}")
+
+    def _insert(self, index: str, entry):
+        """在 index 处插入一句字幕（一个逻辑行）"""
+        tag = f"u{entry.utterance_id}"
+        stamp = time.strftime("%H:%M:%S", time.localtime(entry.timestamp))
+        if entry.translation:
+            self._text.insert(
+                index, f"{stamp}  ", ("time", tag), entry.translation, (tag,),
+                f"  {entry.source}\n", ("source", tag),
+            )
+        else:
+            self._text.insert(index, f"{stamp}  ", ("time", tag), f"{entry.source}\n", (tag,))
+
+    def _schedule(self):
+        if self._text is None:
+            # 面板还没打开过：创建时会从历史存储整体填入
+            self._appended.clear()
+            self._changed.clear()
+            return
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.root.after(max(1, int(self.interval * 1000)), self._flush)
+
+    def _flush(self):
+        """把积累的更新应用到Text控件"""
+        self._flush_scheduled = False
+        if self._text is None or not (self._appended or self._changed):
+            return
+        text = self._text
+        following = text.yview()[1] >= 0.999  # 用户在查看旧内容时不自动滚动
+        text.config(state="normal")
+
+        for utterance_id in self._appended:
+            entry = self.history.get(utterance_id)
+            if entry is None:  # 在刷新前就已被挤出历史存储
+                continue
+            self._insert("end-1c", entry)
+            self._line_ids.append(utterance_id)
+            self._changed.discard(utterance_id)
+        while len(self._line_ids) > self.history.capacity:
+            # 按标签范围删除：译文中含换行时一句占多行
+            tag = f"u{self._line_ids.popleft()}"
+            ranges = text.tag_ranges(tag)
+            if ranges:
+                text.delete(ranges[0], ranges[-1])
+            text.tag_delete(tag)
+
+        for utterance_id in self._changed:
+            tag = f"u{utterance_id}"
+            ranges = text.tag_ranges(tag)
+            entry = self.history.get(utterance_id)
+            if not ranges or entry is None:
+                continue
+            start = text.index(ranges[0])
+            text.delete(start, ranges[-1])
+            self._insert(start, entry)
+
+        self._appended.clear()
+        self._changed.clear()
+        text.config(state="disabled")
+        if following:
+            text.see("end")
+
+
 class SubtitleOverlay:
-    """字幕悬浮窗类"""
+    """
+    字幕悬浮窗类
+
+    字幕更新先记为待渲染，每个显示帧（1/max_fps 秒）最多重绘一次，期间到达的更新只保留最新的
+    （被覆盖的更新计入 dropped_updates）。字体对象按字号缓存，文本宽度由 TextMeasurer 缓存；
+    开启自动缩放时，长句按基准字号下测得的宽度估算各字号所需行数，选择能放下的最大字号。
+
+    最近的字幕保存在固定容量的 SubtitleHistory 中，双击字幕窗口可打开/关闭可滚动的历史面板。
+    """
     
     def __init__(self):
         self.root = None
@@ -28,6 +272,35 @@ class SubtitleOverlay:
         self.bg_color = os.getenv("SUBTITLE_BG_COLOR", "black")
         self.opacity = float(os.getenv("SUBTITLE_OPACITY", 0.8))
         self.position = os.getenv("SUBTITLE_POSITION", "bottom")
+        self.auto_fit = os.getenv("SUBTITLE_AUTO_FIT", "true").lower() == "true"
+        self.min_font_size = int(os.getenv("SUBTITLE_MIN_FONT_SIZE", 14))
+        self.frame_interval = 1.0 / max(1, int(os.getenv("SUBTITLE_MAX_FPS", 60)))
+        self.composer = SubtitleComposer(os.getenv("SUBTITLE_MODE", "bilingual").lower())
+        self.window_width = 800
+        self.window_height = 100
+        self.padding = 20
+
+        # 字幕历史（容量为0时不记录）
+        history_size = int(os.getenv("SUBTITLE_HISTORY_SIZE", 200))
+        self.history = SubtitleHistory(history_size) if history_size > 0 else None
+        self.history_pane: Optional[HistoryPane] = None
+        self.history_visible = os.getenv("SUBTITLE_HISTORY_VISIBLE", "false").lower() == "true"
+
+        # 渲染调度
+        self._pending_text: Optional[str] = None  # 等待下一帧绘制的文本
+        self._render_scheduled = False
+        self._last_frame = 0.0
+        self._displayed_size = self.font_size
+
+        # 字体与测量缓存
+        self._fonts: Dict[int, tkfont.Font] = {}
+        self._linespace: Dict[int, int] = {}
+        self._measurer: Optional[TextMeasurer] = None
+
+        # 渲染统计
+        self.frame_stats = StageStats("overlay_frame")
+        self.updates = 0
+        self.dropped_updates = 0
         
     def show(self):
         """显示字幕悬浮窗 - 必须在主线程调用"""
@@ -52,8 +325,8 @@ class SubtitleOverlay:
             screen_width = self.root.winfo_screenwidth()
             screen_height = self.root.winfo_screenheight()
             
-            window_width = 800
-            window_height = 100
+            window_width = self.window_width
+            window_height = self.window_height
             
             if self.position == "bottom":
                 x = (screen_width - window_width) // 2
@@ -71,13 +344,14 @@ class SubtitleOverlay:
             self.label = tk.Label(
                 self.root,
                 text="准备就绪...",
-                font=tkfont.Font(family="PingFang SC", size=self.font_size),
+                font=self._font(self.font_size),
                 fg=self.font_color,
                 bg=self.bg_color,
-                wraplength=window_width - 40,
+                wraplength=window_width - 2 * self.padding,
                 justify="center",
-                pady=20
+                pady=self.padding
             )
+            self._measurer = TextMeasurer(self._font(self.font_size))
             self.label.pack(fill=tk.BOTH, expand=True)
             
             # 绑定事件
@@ -85,6 +359,16 @@ class SubtitleOverlay:
             self.root.bind('<ButtonRelease-1>', self._stop_move)
             self.root.bind('<B1-Motion>', self._on_move)
             self.root.bind('<Escape>', lambda e: self.hide())
+            self.root.bind('<Double-Button-1>', lambda e: self.toggle_history())
+
+            if self.history is not None:
+                self.history_pane = HistoryPane(
+                    self.root, self.history, self._font(max(self.min_font_size, self.font_size * 2 // 3)),
+                    self.font_color, self.bg_color, window_width, interval=self.frame_interval,
+                )
+                if self.history_visible:
+                    self.root.update_idletasks()
+                    self.history_pane.toggle()
             
             # 标记GUI就绪
             self.gui_ready = True
@@ -111,11 +395,114 @@ class SubtitleOverlay:
         y = self.root.winfo_y() + deltay
         self.root.geometry(f"+{x}+{y}")
     
+    def _font(self, size: int) -> tkfont.Font:
+        """按字号缓存的字体对象"""
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = tkfont.Font(family=FONT_FAMILY, size=size)
+            self._linespace[size] = font.metrics("linespace")
+        return font
+
     def update_subtitle(self, text: str):
-        """更新字幕内容 - 在单线程模型下是安全的"""
-        if text and self.running and self.label and text != self.current_text:
-            self.current_text = text
+        """更新字幕内容（在Tk线程中调用）：记为待渲染，由下一帧统一绘制"""
+        if not text or not self.running or not self.label:
+            return
+        if self._pending_text is not None:
+            if text == self._pending_text:
+                return
+            self.dropped_updates += 1  # 上一个更新还没来得及绘制就被覆盖
+        elif text == self.current_text:
+            return
+        self.updates += 1
+        self._pending_text = text
+        if not self._render_scheduled:
+            self._render_scheduled = True
+            delay = self._last_frame + self.frame_interval - time.perf_counter()
+            self.root.after(max(0, int(delay * 1000)), self._render)
+
+    def show_source(self, utterance_id: int, text: str):
+        """识别结果到达：先显示原文"""
+        if self.history is not None:
+            if self.history.set_source(utterance_id, text):
+                # 流式识别中同一句多次更新（已提交部分 + 临时假设），只刷新该行
+                if self.history_pane:
+                    self.history_pane.update(utterance_id)
+            else:
+                self.history.append(utterance_id, text)
+                if self.history_pane:
+                    self.history_pane.append(utterance_id)
+        display = self.composer.source(utterance_id, text)
+        if display:
+            self.update_subtitle(display)
+
+    def show_translation(self, utterance_id: int, text: str):
+        """译文（或流式部分译文）到达：替换或补充同一句的原文"""
+        display = self.composer.translation(utterance_id, text)
+        if display:
+            self.update_subtitle(display)
+
+    def record_translation(self, utterance_id: int, text: str):
+        """
+        记录一句的最终译文到字幕历史
+
+        由翻译交付处调用而不是渲染阶段：渲染阶段会合并/丢弃排队的更新，历史中的每一句都需要译文
+        """
+        if self.history is not None and self.history.set_translation(utterance_id, text) and self.history_pane:
+            self.history_pane.update(utterance_id)
+
+    def toggle_history(self):
+        """显示/隐藏字幕历史面板"""
+        if self.history_pane:
+            self.history_pane.toggle()
+
+    def _fit_font_size(self, text: str) -> int:
+        """能在窗口内完整显示 text 的最大字号（不超过设定字号）"""
+        if not self.auto_fit:
+            return self.font_size
+        wrap = (self.window_width - 2 * self.padding) * 0.9  # 按词换行时每行填不满，留出余量
+        height = self.window_height - 2 * self.padding
+        # 文本宽度与字号近似成正比：只在基准字号下测量一次，其他字号按比例估算
+        widths = [self._measurer.width(line) for line in text.split("\n")]
+        for size in range(self.font_size, self.min_font_size - 1, -1):
+            self._font(size)
+            lines = sum(max(1, math.ceil(width * size / self.font_size / wrap)) for width in widths)
+            if lines * self._linespace[size] <= height or size == self.min_font_size:
+                return size
+        return self.font_size
+
+    def _render(self):
+        """绘制一帧：只应用最新的待渲染文本"""
+        self._render_scheduled = False
+        text, self._pending_text = self._pending_text, None
+        if text is None or not self.label:
+            return
+        started = time.perf_counter()
+        size = self._fit_font_size(text)
+        if size != self._displayed_size:
+            self.label.config(text=text, font=self._font(size))
+            self._displayed_size = size
+        else:
             self.label.config(text=text)
+        self.current_text = text
+        self.root.update_idletasks()  # 在这里完成布局和重绘，以便测量帧耗时
+        self._last_frame = time.perf_counter()
+        self.frame_stats.record(self._last_frame - started)
+
+    def get_render_stats(self) -> dict:
+        """获取渲染统计信息"""
+        frames = self.frame_stats.get_stats()
+        return {
+            "updates": self.updates,
+            "frames": frames["count"],
+            "dropped_updates": self.dropped_updates,
+            "frame_p50_ms": frames["p50_ms"],
+            "frame_p95_ms": frames["p95_ms"],
+            "frame_max_ms": frames["max_ms"],
+            "font_size": self._displayed_size,
+            "measurements": self._measurer.measured if self._measurer else 0,
+            "history_entries": len(self.history) if self.history is not None else 0,
+            "history_evicted": self.history.evicted if self.history is not None else 0,
+        }
     
     def hide(self):
         """隐藏字幕悬浮窗"""
@@ -123,6 +510,8 @@ class SubtitleOverlay:
             return
             
         self.running = False
+        self._pending_text = None
+        self.history_pane = None
         
         if self.root:
             self.root.destroy()
@@ -150,7 +539,9 @@ class SubtitleOverlay:
         """设置字体大小"""
         self.font_size = max(8, min(48, size))
         if self.label:
-            self.label.config(font=tkfont.Font(family="PingFang SC", size=self.font_size))
+            self._measurer = TextMeasurer(self._font(self.font_size))
+            self._displayed_size = self._fit_font_size(self.current_text) if self.current_text else self.font_size
+            self.label.config(font=self._font(self._displayed_size))
 
 class SimpleConsoleOverlay:
     """简单的控制台字幕显示（备用方案）"""
@@ -158,6 +549,7 @@ class SimpleConsoleOverlay:
     def __init__(self):
         self.current_text = ""
         self.running = False
+        self.composer = SubtitleComposer(os.getenv("SUBTITLE_MODE", "bilingual").lower())
     
     def show(self):
         """显示字幕"""
@@ -173,7 +565,23 @@ class SimpleConsoleOverlay:
         """更新字幕"""
         if text and text != self.current_text:
             self.current_text = text
-            print(f"💬 {text}")
+            print("💬 " + text.replace("\n", "\n   "))
+
+    def show_source(self, utterance_id: int, text: str):
+        """识别结果到达：先显示原文"""
+        display = self.composer.source(utterance_id, text)
+        if display:
+            self.update_subtitle(display)
+
+    def show_translation(self, utterance_id: int, text: str):
+        """译文（或流式部分译文）到达：替换或补充同一句的原文"""
+        display = self.composer.translation(utterance_id, text)
+        if display:
+            self.update_subtitle(display)
+
+    def record_translation(self, utterance_id: int, text: str):
+        """控制台模式没有字幕历史"""
+        pass
     
     def run_gui_loop(self):
         """空实现，保持接口一致"""
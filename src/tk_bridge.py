@@ -0,0 +1,200 @@
+"""
+asyncio与Tkinter的桥接模块
+asyncio事件循环运行在后台线程，Tk主循环运行在主线程；
+事件循环中的界面操作经线程安全队列交给Tk线程执行
+"""
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+import tkinter as tk
+from typing import Callable, Optional
+
+from .pipeline import StageStats
+
+logger = logging.getLogger(__name__)
+
+
+class TkBridge:
+    """
+    线程安全的Tk调用队列
+
+    - call() 可在任意线程调用：把操作放入队列；队列由空变为非空时向唤醒管道写入一个字节。
+      Tk通过 createfilehandler 监听管道读端，在Tk线程中一次执行完队列中的全部操作
+      （事件驱动，无固定间隔的空转）
+    - 唤醒只是一次非阻塞的 os.write，不经过Tcl的跨线程调用（那会等待Tk线程处理完毕，
+      主循环启动前甚至等待最长1秒），事件循环线程不受Tk响应速度影响
+    - 主循环启动前写入的唤醒留在管道中，不会丢失
+    - 在主线程创建时把唤醒管道同时注册为信号唤醒fd：空闲时Tk阻塞在等待事件中，
+      Ctrl+C / SIGTERM 写入的字节同样唤醒Tk线程，Python信号处理函数随即执行
+    - 平台不支持 createfilehandler（Windows）时退化为按 poll_interval 轮询队列
+    - 每个操作从入队到在Tk线程中开始执行的耗时记录到 stats
+    """
+
+    def __init__(self, root: tk.Tk, stats: Optional[StageStats] = None, poll_interval: float = 0.005):
+        self.root = root
+        self.stats = stats
+        self._queue = queue.SimpleQueue()
+        self._wake_pending = False  # 已写入唤醒字节、尚未被处理
+        self.closed = False
+        self.wakeups = 0
+        self._poll_ms = max(1, int(poll_interval * 1000))
+
+        self._reader = self._writer = None
+        self._previous_wakeup_fd = None
+        try:
+            self._reader, self._writer = os.pipe()
+            os.set_blocking(self._reader, False)
+            os.set_blocking(self._writer, False)
+            root.tk.createfilehandler(self._reader, tk.READABLE, self._on_wake)
+        except (AttributeError, OSError, tk.TclError):
+            self._close_pipe()
+            logger.warning("不支持管道唤醒，界面更新改为轮询")
+            root.after(self._poll_ms, self._poll)
+            return
+
+        if threading.current_thread() is threading.main_thread():
+            # 信号字节与 call() 的唤醒字节共用管道，_on_wake 读空即可
+            self._previous_wakeup_fd = signal.set_wakeup_fd(self._writer, warn_on_full_buffer=False)
+
+    @property
+    def event_driven(self) -> bool:
+        return self._writer is not None
+
+    def call(self, func: Callable, *args):
+        """在Tk线程中执行 func(*args)（任意线程可调用，不等待执行完成）"""
+        if self.closed:
+            return
+        self._queue.put((func, args, time.perf_counter()))
+        writer = self._writer
+        if writer is not None and not self._wake_pending:
+            self._wake_pending = True
+            self.wakeups += 1
+            try:
+                os.write(writer, b"\0")
+            except OSError:
+                # 管道已满（已有未处理的唤醒）或已关闭
+                pass
+
+    def _on_wake(self, fd, mask):
+        """管道可读（Tk线程）：读空管道后执行队列中的操作（信号处理函数在返回Python时已执行）"""
+        try:
+            while os.read(fd, 4096):
+                pass
+        except OSError:  # 已读空（非阻塞）
+            pass
+        self._drain()
+
+    def _drain(self):
+        """在Tk线程中执行队列中的全部操作"""
+        self._wake_pending = False
+        while True:
+            try:
+                func, args, enqueued_at = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if self.stats:
+                self.stats.record(time.perf_counter() - enqueued_at)
+            try:
+                func(*args)
+            except Exception as e:
+                logger.error(f"界面更新失败: {e}")
+            if self.closed:
+                return
+
+    def _poll(self):
+        if self.closed:
+            return
+        self._drain()
+        if not self.closed:
+            try:
+                self.root.after(self._poll_ms, self._poll)
+            except tk.TclError:  # 窗口已销毁
+                self.closed = True
+
+    def _close_pipe(self):
+        for fd in (self._reader, self._writer):
+            if fd is not None:
+                os.close(fd)
+        self._reader = self._writer = None
+
+    def close(self):
+        """停止接收新的操作（在Tk线程中调用，窗口销毁后）"""
+        if self.closed:
+            return
+        self.closed = True
+        if self._previous_wakeup_fd is not None:
+            signal.set_wakeup_fd(self._previous_wakeup_fd)
+            self._previous_wakeup_fd = None
+        if self._reader is not None:
+            try:
+                self.root.tk.deletefilehandler(self._reader)
+            except tk.TclError:
+                pass
+            # 写端留给其他线程中可能仍在进行的 call()：读端关闭后写入只会得到 BrokenPipeError
+            os.close(self._reader)
+            self._reader = None
+
+    def __del__(self):
+        if self._writer is not None:
+            os.close(self._writer)
+
+    def get_stats(self) -> dict:
+        return {
+            "event_driven": self.event_driven,
+            "wakeups": self.wakeups,
+            "pending": self._queue.qsize(),
+        }
+
+
+class OverlayProxy:
+    """
+    字幕窗口代理：供事件循环线程使用，所有界面操作经 TkBridge 在Tk线程中执行
+    """
+
+    def __init__(self, overlay, bridge: TkBridge):
+        self._overlay = overlay
+        self._bridge = bridge
+
+    @property
+    def root(self):
+        return self._overlay.root
+
+    def update_subtitle(self, text: str):
+        self._bridge.call(self._overlay.update_subtitle, text)
+
+    def show_source(self, utterance_id: int, text: str):
+        self._bridge.call(self._overlay.show_source, utterance_id, text)
+
+    def show_translation(self, utterance_id: int, text: str):
+        self._bridge.call(self._overlay.show_translation, utterance_id, text)
+
+    def record_translation(self, utterance_id: int, text: str):
+        self._bridge.call(self._overlay.record_translation, utterance_id, text)
+
+    def toggle_history(self):
+        self._bridge.call(self._overlay.toggle_history)
+
+    def get_render_stats(self) -> Optional[dict]:
+        # 只读取计数器，可在事件循环线程中直接调用
+        stats = getattr(self._overlay, "get_render_stats", None)
+        return stats() if stats else None
+
+    def hide(self):
+        self._bridge.call(self._hide)
+
+    def _hide(self):
+        # 销毁窗口后不再接收新的操作
+        self._overlay.hide()
+        self._bridge.close()
+
+    def set_opacity(self, opacity: float):
+        self._bridge.call(self._overlay.set_opacity, opacity)
+
+    def set_font_size(self, size: int):
+        self._bridge.call(self._overlay.set_font_size, size)
+
+    def set_position(self, x: int, y: int):
+        self._bridge.call(self._overlay.set_position, x, y)
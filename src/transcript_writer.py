@@ -0,0 +1,242 @@
+"""
+转写记录模块
+后台线程批量写入 JSONL / SRT / WebVTT 转写文件，流水线中只做入队
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .pipeline import Utterance
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("jsonl", "srt", "vtt")
+FSYNC_POLICIES = ("none", "batch", "close")
+MIN_CUE_SECONDS = 1.0  # 字幕文件中每句至少显示的时长
+MAX_PENDING = 32  # 等待译文的句子超过该数量时，最早的一句只写原文（翻译持续失败时不无限积压）
+
+_CLOSE = object()
+
+
+class TranscriptWriter:
+    """
+    转写记录写入器
+
+    - source()/translation() 在事件循环中调用，只把当前句子的快照放入线程安全队列，不做任何磁盘I/O
+    - 写入线程积累记录，达到 batch_size 条或距上次写入超过 flush_interval 秒时批量写入各文件并flush
+    - fsync 策略：none 交给操作系统；batch 每批写入后fsync；close 只在关闭时fsync
+    - 译文按句子顺序交付：某句的译文到达时，更早但仍未翻译的句子（翻译失败）只写原文
+    - 字幕文件中每句至少显示 MIN_CUE_SECONDS，但不超过下一句的开始时间（字幕互不重叠）：
+      最新一句的字幕要等下一句到达（或关闭时）才写出，JSONL不受影响
+    - 字幕时间轴使用句子在音频流中的位置（媒体时间：实时采集从开始采集算起，文件回放即文件内时间，
+      全速回放也正确）；音频源不提供媒体时间时退回到相对会话开始的采集时间
+    """
+
+    def __init__(self, directory: str = "logs", basename: Optional[str] = None, formats=FORMATS,
+                 batch_size: int = 32, flush_interval: float = 1.0, fsync: str = "close"):
+        unknown = [name for name in formats if name not in FORMATS]
+        if unknown:
+            raise ValueError(f"未知的转写格式: {', '.join(unknown)}")
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"未知的fsync策略: {fsync}")
+        self.directory = Path(directory)
+        self.basename = basename or f"transcript_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.formats = tuple(formats)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        # 采集时间戳（perf_counter）与墙钟时间的对应关系
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+
+        self._queue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._files: Dict[str, object] = {}
+        self._pending: Dict[int, dict] = {}  # 已识别、等待译文的句子（写入线程内使用）
+        self._cues = 0
+        self._held: Optional[dict] = None  # 等待下一句开始时间的最后一句字幕
+
+        # 统计（写入线程更新）
+        self.records = 0
+        self.batches = 0
+        self.fsyncs = 0
+        self.errors = 0
+        self.write_seconds = 0.0
+
+    @property
+    def paths(self) -> Dict[str, Path]:
+        return {name: self.directory / f"{self.basename}.{name}" for name in self.formats}
+
+    def start(self):
+        """打开文件并启动写入线程"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for name, path in self.paths.items():
+            self._files[name] = open(path, "w", encoding="utf-8")
+        if "vtt" in self._files:
+            self._files["vtt"].write("WEBVTT\n\n")
+        if "jsonl" in self._files:
+            self._files["jsonl"].write(json.dumps({
+                "type": "session",
+                "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="milliseconds"),
+            }, ensure_ascii=False) + "\n")
+        self._thread = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+        self._thread.start()
+        logger.info(f"转写记录: {self.directory / self.basename}.{{{','.join(self.formats)}}}")
+
+    def source(self, utterance: Utterance):
+        """记录识别结果（不阻塞）"""
+        if self._thread:
+            self._queue.put(("source", utterance.id, utterance.text, utterance.captured_at,
+                             utterance.audio_end_at or utterance.created_at,
+                             utterance.media_start, utterance.media_end))
+
+    def translation(self, utterance: Utterance):
+        """记录最终译文和各阶段耗时（不阻塞）"""
+        if self._thread:
+            self._queue.put(("translation", utterance.id, utterance.translated, dict(utterance.spans)))
+
+    def close(self, timeout: float = 5.0):
+        """写入剩余记录并关闭文件（在事件循环之外调用）"""
+        if not self._thread:
+            return
+        self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("转写记录写入线程未能及时退出")
+        self._thread = None
+
+    def _run(self):
+        """写入线程：按条数或时间阈值批量写入"""
+        batch: List[dict] = []
+        deadline = None
+        closing = False
+        while not closing:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _CLOSE:
+                closing = True
+            elif item is not None:
+                batch.extend(self._collect(item))
+                if batch and deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) < self.batch_size:
+                    continue
+            if closing:
+                # 没有等到译文的句子只写原文
+                batch.extend(self._pending.pop(key) for key in sorted(self._pending))
+            if batch or closing:
+                self._write(batch, sync=self.fsync == "batch", final=closing)
+                batch = []
+            deadline = None
+
+        for handle in self._files.values():
+            try:
+                if self.fsync != "none":
+                    handle.flush()
+                    os.fsync(handle.fileno())
+                    self.fsyncs += 1
+                handle.close()
+            except OSError as e:
+                self.errors += 1
+                logger.error(f"关闭转写文件失败: {e}")
+        self._files.clear()
+
+    def _collect(self, item: tuple) -> List[dict]:
+        """处理一个事件，返回可以写出的记录"""
+        if item[0] == "source":
+            _, utterance_id, text, captured_at, audio_end_at, media_start, media_end = item
+            captured_at = captured_at if captured_at is not None else audio_end_at
+            if media_start is not None and media_end is not None:
+                start, end = media_start, media_end
+            else:
+                start, end = captured_at - self._origin, audio_end_at - self._origin
+            self._pending[utterance_id] = {
+                "type": "utterance",
+                "id": utterance_id,
+                "start": round(start, 3),
+                "end": round(end, 3),
+                "captured_at": datetime.fromtimestamp(
+                    self.started_at + captured_at - self._origin
+                ).isoformat(timespec="milliseconds"),
+                "source": text,
+                "translation": None,
+            }
+            if len(self._pending) > MAX_PENDING:
+                return [self._pending.pop(min(self._pending))]
+            return []
+
+        _, utterance_id, translated, spans = item
+        ready = [self._pending.pop(key) for key in sorted(self._pending) if key < utterance_id]
+        record = self._pending.pop(utterance_id, None)
+        if record is not None:
+            record["translation"] = translated
+            record["latency_ms"] = {name: round(seconds * 1000, 1) for name, seconds in spans.items()}
+            ready.append(record)
+        return ready
+
+    def _write(self, records: List[dict], sync: bool, final: bool = False):
+        started = time.perf_counter()
+        try:
+            for record in records:
+                if "jsonl" in self._files:
+                    self._files["jsonl"].write(json.dumps(record, ensure_ascii=False) + "\n")
+                if self._held is not None:
+                    self._write_cue(self._held, next_start=record["start"])
+                self._held = record
+            if final and self._held is not None:
+                self._write_cue(self._held, next_start=None)
+                self._held = None
+            for handle in self._files.values():
+                handle.flush()
+                if sync:
+                    os.fsync(handle.fileno())
+                    self.fsyncs += 1
+            self.records += len(records)
+            self.batches += 1
+        except OSError as e:
+            self.errors += 1
+            logger.error(f"写入转写记录失败: {e}")
+        self.write_seconds += time.perf_counter() - started
+
+    def _write_cue(self, record: dict, next_start: Optional[float]):
+        """写出一句SRT/WebVTT字幕：至少显示 MIN_CUE_SECONDS，但在下一句开始前结束"""
+        self._cues += 1
+        text = record["source"] if not record["translation"] else f"{record['translation']}\n{record['source']}"
+        start, end = record["start"], max(record["end"], record["start"] + MIN_CUE_SECONDS)
+        if next_start is not None:
+            end = max(start, min(end, next_start))
+        if "srt" in self._files:
+            self._files["srt"].write(
+                f"{self._cues}\n{_timestamp(start, ',')} --> {_timestamp(end, ',')}\n{text}\n\n"
+            )
+        if "vtt" in self._files:
+            self._files["vtt"].write(f"{_timestamp(start, '.')} --> {_timestamp(end, '.')}\n{text}\n\n")
+
+    def get_stats(self) -> dict:
+        return {
+            "records": self.records,
+            "batches": self.batches,
+            "pending": self._queue.qsize(),
+            "fsyncs": self.fsyncs,
+            "errors": self.errors,
+            "write_seconds": self.write_seconds,
+        }
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    """SRT（逗号）/ WebVTT（点号）时间戳 HH:MM:SS,mmm"""
+    millis = int(round(max(0.0, seconds) * 1000))
+    hours, millis = divmod(millis, 3600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
@@ -4,43 +4,156 @@
 """
 import asyncio
 import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 import numpy as np
 from faster_whisper import WhisperModel
-from typing import Optional
+from typing import List, Optional, Tuple
 import logging
 import os
+import time
 from pathlib import Path
 
+from .ring_buffer import AudioRingBuffer
+from .inference_worker import InferenceWorker
+from .streaming import LocalAgreementBuffer, Word, join_words
+
 logger = logging.getLogger(__name__)
 
+
+@dataclass(frozen=True)
+class DecodingProfile:
+    """一组解码参数（对应faster-whisper的transcribe参数）"""
+    beam_size: int
+    best_of: int
+    temperature: Tuple[float, ...]  # 解码失败（压缩率/对数概率不达标）时依次尝试的温度
+    condition_on_previous_text: bool
+    without_timestamps: bool
+
+    def options(self) -> dict:
+        return {
+            "beam_size": self.beam_size,
+            "best_of": self.best_of,
+            "temperature": list(self.temperature),
+            "condition_on_previous_text": self.condition_on_previous_text,
+            "without_timestamps": self.without_timestamps,
+        }
+
+
+DECODING_PROFILES = {
+    # 贪心解码、不回退温度：CPU上最快，适合实时字幕
+    "realtime": DecodingProfile(beam_size=1, best_of=1, temperature=(0.0,),
+                                condition_on_previous_text=False, without_timestamps=True),
+    # 小束宽加有限的温度回退
+    "balanced": DecodingProfile(beam_size=2, best_of=2, temperature=(0.0, 0.4, 0.8),
+                                condition_on_previous_text=False, without_timestamps=True),
+    # faster-whisper默认参数，准确率最高
+    "accurate": DecodingProfile(beam_size=5, best_of=5, temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+                                condition_on_previous_text=True, without_timestamps=False),
+}
+
+
 class WhisperTranscriber:
     """Faster-Whisper语音识别类"""
     
-    def __init__(self, model_name: str = "base", device: str = "cpu", language: str = "auto"):
+    def __init__(self, model_name: str = "base", device: str = "cpu", language: str = "auto",
+                 streaming: bool = False, stream_step: float = 0.5, compute_type: str = "int8",
+                 cpu_threads: int = 0, num_workers: int = 1, warmup: bool = True,
+                 profile: str = "balanced", adaptive: bool = True):
+        if profile not in DECODING_PROFILES:
+            raise ValueError(f"未知的解码配置: {profile}，可选: {', '.join(DECODING_PROFILES)}")
         self.model_name = model_name
         self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads  # 0表示由CTranslate2自动选择
+        self.num_workers = num_workers
+        self.warmup = warmup
         self.language = language
         self.model = None
-        self.audio_buffer = np.array([], dtype=np.float32)
+        self._load_future: Optional[Future] = None
+        self.load_seconds = 0.0
+        self.warmup_seconds = 0.0
         self.buffer_duration = 5.0  # 缓冲区持续时间（秒）
         self.sample_rate = 16000
+        # 预分配两倍窗口容量，避免每个回调块都重新分配和拷贝整个缓冲区
+        self.audio_buffer = AudioRingBuffer(int(self.sample_rate * self.buffer_duration * 2))
+
+        # 流式模式：每隔 stream_step 秒重新解码当前窗口，通过LocalAgreement增量提交
+        self.streaming = streaming
+        self.stream_step = stream_step
+        self.hypothesis = LocalAgreementBuffer()
+        self._samples_since_decode = 0
+        self._committed_words: List[Word] = []  # 已提交、尚未被 pop_words() 取走的单词
+        self.min_flush_duration = 0.3  # 语句结束时少于该时长的剩余音频直接丢弃（秒）
+
+        # 解码配置；adaptive开启时，推理跟不上实时则临时切换为贪心解码
+        self.profile = profile
+        self.adaptive = adaptive
+        self.load = 0.0  # 推理负载：解码耗时与可用时间之比的滑动平均，超过1表示跟不上实时
+        self.backlog = 0.0  # 最近一个音频块从采集到进入识别的等待时间（秒），由流水线更新
+        self.max_backlog = 1.0  # 积压超过该值视为落后于实时
+        self.fast_path = False
+        self.fast_path_decodes = 0
+
+        # 推理耗时统计
+        self.inference_seconds = 0.0
+        self.decoded_audio_seconds = 0.0
+        self._last_decode_seconds = 0.0
+
+        # 推理在独立线程中执行，事件循环在解码期间保持响应
+        self.worker = InferenceWorker(max_pending=2, name="whisper")
         
+    def preload(self) -> Future:
+        """
+        在后台线程开始加载并预热模型，立即返回
+
+        不依赖事件循环，可以在创建GUI之前调用，使模型加载与GUI创建并行。
+        重复调用返回同一个Future。
+        """
+        if self._load_future is None:
+            loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper-load")
+            self._load_future = loader.submit(self._load_and_warmup)
+            loader.shutdown(wait=False)
+        return self._load_future
+
     async def load_model(self):
-        """加载Whisper模型"""
+        """等待模型加载和预热完成（尚未预加载时在此开始加载）"""
+        await asyncio.wrap_future(self.preload())
+
+    def _load_and_warmup(self):
+        """加载模型并做一次预热解码（阻塞，在加载线程中执行）"""
         try:
-            logger.info(f"正在加载Faster-Whisper模型: {self.model_name}")
-            
-            # Faster-Whisper支持CPU和CUDA
-            device = "cpu"  # 在macOS上使用CPU
-            
-            self.model = WhisperModel(
+            logger.info(
+                f"正在加载Faster-Whisper模型: {self.model_name} "
+                f"(设备: {self.device}, 计算类型: {self.compute_type}, 线程: {self.cpu_threads or '自动'})"
+            )
+            start = time.perf_counter()
+            model = WhisperModel(
                 self.model_name,
-                device=device,
-                compute_type="int8"  # 使用int8量化提高速度
+                device=self.device,
+                compute_type=self.compute_type,
+                cpu_threads=self.cpu_threads,
+                num_workers=self.num_workers
             )
-            
-            logger.info(f"模型加载完成，使用设备: {device}")
-            
+            self.load_seconds = time.perf_counter() - start
+
+            if self.warmup:
+                # 用一秒低幅噪声跑一次完整解码，提前完成内存分配和计算图初始化；
+                # 关闭vad_filter，否则静音会被过滤而跳过解码器
+                start = time.perf_counter()
+                noise = np.random.default_rng(0).normal(0, 0.01, self.sample_rate).astype(np.float32)
+                segments, _ = model.transcribe(
+                    noise,
+                    language=self.language if self.language != "auto" else "en",
+                    beam_size=1,
+                    vad_filter=False
+                )
+                list(segments)
+                self.warmup_seconds = time.perf_counter() - start
+
+            self.model = model
+            logger.info(f"模型加载完成: 加载 {self.load_seconds:.2f}s，预热 {self.warmup_seconds:.2f}s")
+
         except Exception as e:
             logger.error(f"加载模型失败: {e}")
             raise
@@ -63,48 +176,248 @@ class WhisperTranscriber:
         
         try:
             # 累积音频数据到缓冲区
-            self.audio_buffer = np.concatenate([self.audio_buffer, audio_data])
+            self.audio_buffer.write(audio_data)
+
+            if self.streaming:
+                self._samples_since_decode += len(audio_data)
+                return await self._transcribe_streaming()
             
             # 检查缓冲区是否足够
-            required_samples = int(16000 * self.buffer_duration)  # 3秒音频
+            required_samples = int(self.sample_rate * self.buffer_duration)
             if len(self.audio_buffer) < required_samples:
                 return None
             
-            # 获取完整的音频数据块
-            audio_chunk = np.array(self.audio_buffer)
-            self.audio_buffer = np.array([], dtype=np.float32) # 清空缓冲区
-
-            # 直接在内存中处理音频
-            segments, info = self.model.transcribe(
-                audio_chunk,
-                language=self.language if self.language != "auto" else None,
-                task="transcribe",
-                beam_size=5,
-                vad_filter=True,
-                vad_parameters=dict(min_silence_duration_ms=500)
-            )
-
-            text_parts = [segment.text.strip() for segment in segments]
-            text = " ".join(text_parts).strip()
+            # 获取完整的音频数据块（拷贝快照：推理线程运行期间缓冲区仍会继续写入）
+            audio_chunk = np.array(self.audio_buffer.view())
+            self.audio_buffer.clear()
+            return await self._transcribe_block(audio_chunk)
+                
+        except Exception as e:
+            logger.error(f"转录失败: {e}")
+            return None
 
-            if text and len(text) > 1:  # 过滤掉非常短的文本
-                logger.info(f"识别结果: '{text}' (语言: {info.language}, 置信度: {info.language_probability:.2f})")
-                return text
+    async def flush(self) -> Optional[str]:
+        """
+        语句结束时调用：立即解码缓冲区中剩余的音频，并提交全部临时假设
 
+        Returns:
+            剩余部分的转录文本或None
+        """
+        if self.model is None:
             return None
-                
+
+        min_samples = int(self.sample_rate * self.min_flush_duration)
+        try:
+            if not self.streaming:
+                if len(self.audio_buffer) < min_samples:
+                    self.audio_buffer.clear()
+                    return None
+                audio_chunk = np.array(self.audio_buffer.view())
+                self.audio_buffer.clear()
+                return await self._transcribe_block(audio_chunk)
+
+            text = None
+            if len(self.audio_buffer) >= min_samples:
+                # 强制对当前窗口做最后一次解码
+                self._samples_since_decode = int(self.sample_rate * self.stream_step)
+                text = await self._transcribe_streaming()
+            tail_words = self.hypothesis.flush()
+            self._committed_words.extend(tail_words)
+            tail = join_words(tail_words)
+            self.audio_buffer.clear()
+            self._samples_since_decode = 0
+            return " ".join(part for part in (text, tail) if part) or None
+
         except Exception as e:
             logger.error(f"转录失败: {e}")
             return None
-    
+
+    def _select_profile(self) -> DecodingProfile:
+        """
+        选择本次解码使用的配置：落后于实时时走贪心快速路径（带滞回，避免来回切换）
+
+        落后的判据：解码负载超过1，或音频在进入识别前已积压超过 max_backlog 秒
+        """
+        if self.adaptive and self.profile != "realtime":
+            if not self.fast_path and (self.load > 1.0 or self.backlog > self.max_backlog):
+                self.fast_path = True
+                logger.warning(f"识别跟不上实时(负载 {self.load:.2f}，积压 {self.backlog:.1f}s)，切换为贪心解码")
+            elif self.fast_path and self.load < 0.6 and self.backlog < self.max_backlog / 2:
+                self.fast_path = False
+                logger.info(f"识别负载恢复(负载 {self.load:.2f})，恢复 {self.profile} 解码")
+        if self.fast_path:
+            self.fast_path_decodes += 1
+            return DECODING_PROFILES["realtime"]
+        return DECODING_PROFILES[self.profile]
+
+    def _update_load(self, budget: float):
+        """
+        根据上一次解码耗时更新推理负载
+
+        Args:
+            budget: 本次解码可用的时间（秒）：整块模式为音频时长，流式模式为解码间隔
+        """
+        if budget > 0:
+            self.load = 0.7 * self.load + 0.3 * (self._last_decode_seconds / budget)
+
+    async def _transcribe_block(self, audio_chunk: np.ndarray) -> Optional[str]:
+        """整块转录"""
+        # 直接在内存中处理音频
+        segments, info = await self.worker.submit(self._decode, audio_chunk, self._select_profile())
+        self._update_load(len(audio_chunk) / self.sample_rate)
+
+        text_parts = [segment.text.strip() for segment in segments]
+        text = " ".join(text_parts).strip()
+
+        if text and len(text) > 1:  # 过滤掉非常短的文本
+            logger.info(f"识别结果: '{text}' (语言: {info.language}, 置信度: {info.language_probability:.2f})")
+            return text
+
+        return None
+
+    def _decode(self, audio: np.ndarray, profile: DecodingProfile, **options):
+        """调用模型解码，返回分段列表和识别信息（阻塞，在推理线程中执行）"""
+        start = time.perf_counter()
+        segments, info = self.model.transcribe(
+            audio,
+            language=self.language if self.language != "auto" else None,
+            task="transcribe",
+            vad_filter=True,
+            vad_parameters=dict(min_silence_duration_ms=500),
+            **{**profile.options(), **options}
+        )
+        # segments是惰性生成器，在这里完成实际解码
+        segments = list(segments)
+        self._last_decode_seconds = time.perf_counter() - start
+        self.inference_seconds += self._last_decode_seconds
+        self.decoded_audio_seconds += len(audio) / self.sample_rate
+        return segments, info
+
+    async def _transcribe_streaming(self) -> Optional[str]:
+        """
+        流式转录：重新解码当前窗口，返回本次新确认的文本
+
+        未确认的尾部可通过 provisional_text 获取。
+        """
+        step_samples = int(self.sample_rate * self.stream_step)
+        if self._samples_since_decode < step_samples:
+            return None
+        self._samples_since_decode = 0
+
+        # 拷贝快照：推理期间缓冲区仍会继续写入
+        window = np.array(self.audio_buffer.view())
+        offset = self.audio_buffer.start_sample / self.sample_rate
+
+        segments, info = await self.worker.submit(
+            self._decode,
+            window,
+            self._select_profile(),
+            word_timestamps=True,
+            # 窗口裁剪依赖分段边界，流式模式始终保留时间戳
+            without_timestamps=False,
+            initial_prompt=self.hypothesis.committed_text(max_chars=200) or None
+        )
+        self._update_load(self.stream_step)
+
+        words = [
+            Word(start=offset + w.start, end=offset + w.end, text=w.word)
+            for segment in segments
+            for w in (segment.words or [])
+        ]
+        committed = self.hypothesis.insert(words)
+        self._committed_words.extend(committed)
+        self._trim_window(segments, offset)
+
+        text = join_words(committed)
+        if self.provisional_text:
+            logger.debug(f"临时假设: '{self.provisional_text}'")
+        if text:
+            logger.info(f"识别结果(流式): '{text}' (语言: {info.language}, 置信度: {info.language_probability:.2f})")
+            return text
+        return None
+
+    def _trim_window(self, segments, offset: float):
+        """
+        裁剪窗口：已确认的完整分段之前的音频不再参与后续解码
+
+        窗口超过 buffer_duration 时，强制裁剪到最后一个已提交单词的结束位置。
+        最后一个分段可能仍在变化，不作为裁剪点。
+
+        Args:
+            segments: 本次解码的分段（时间相对于 offset）
+            offset: 解码窗口起点的绝对时间（秒）
+        """
+        committed_time = self.hypothesis.last_committed_time
+        cut_time = None
+
+        # 优先在已完全确认的分段边界处裁剪
+        for segment in segments[:-1]:
+            if offset + segment.end <= committed_time:
+                cut_time = offset + segment.end
+
+        # 推理期间缓冲区可能继续写入或因溢出前移，按当前状态计算裁剪量
+        buffer_start = self.audio_buffer.start_sample / self.sample_rate
+        window_duration = self.audio_buffer.duration(self.sample_rate)
+        if cut_time is None and window_duration > self.buffer_duration:
+            cut_time = committed_time
+            if cut_time <= buffer_start:
+                # 长时间没有可确认的内容（静音或噪声），只保留最近 buffer_duration 秒
+                cut_time = buffer_start + window_duration - self.buffer_duration
+
+        if cut_time is not None and cut_time > buffer_start:
+            self.audio_buffer.consume(int((cut_time - buffer_start) * self.sample_rate))
+            self.hypothesis.trim_committed()
+
+    @property
+    def realtime_factor(self) -> Optional[float]:
+        """实时率：每秒音频的推理耗时（秒），尚未解码时为None"""
+        if not self.decoded_audio_seconds:
+            return None
+        return self.inference_seconds / self.decoded_audio_seconds
+
+    @property
+    def provisional_text(self) -> str:
+        """流式模式下尚未确认的临时假设文本"""
+        return join_words(self.hypothesis.provisional)
+
+    def pop_words(self) -> List[Word]:
+        """
+        取出上次调用以来流式模式提交的单词
+
+        时间戳以送入识别的累计样本数为时钟（audio_buffer.total_written / sample_rate），
+        不含VAD丢弃的静音，换算为媒体时间由调用方完成
+        """
+        words, self._committed_words = self._committed_words, []
+        return words
+
+    async def close(self):
+        """停止推理工作器，取消等待中的解码任务"""
+        await self.worker.shutdown()
+
     def clear_buffer(self):
         """清空音频缓冲区"""
-        self.audio_buffer = np.array([], dtype=np.float32)
+        self.audio_buffer.clear()
+        self.hypothesis.reset()
+        self._samples_since_decode = 0
+        self._committed_words = []
     
     def get_buffer_info(self) -> dict:
         """获取缓冲区信息"""
         return {
             "buffer_size": len(self.audio_buffer),
-            "buffer_duration": len(self.audio_buffer) / 16000,
-            "model_loaded": self.model is not None
+            "buffer_duration": self.audio_buffer.duration(self.sample_rate),
+            "buffer_capacity": self.audio_buffer.capacity,
+            "overflow_samples": self.audio_buffer.overflow_samples,
+            "streaming": self.streaming,
+            "provisional_text": self.provisional_text,
+            "realtime_factor": self.realtime_factor,
+            "profile": self.profile,
+            "load": self.load,
+            "fast_path": self.fast_path,
+            "backlog": self.backlog,
+            "fast_path_decodes": self.fast_path_decodes,
+            "inference": self.worker.get_stats(),
+            "model_loaded": self.model is not None,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds
         }
\ No newline at end of file
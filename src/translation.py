@@ -6,34 +6,99 @@ import asyncio
 import aiohttp
 import json
 import os
-from typing import Optional
+import re
+import time
+from typing import AsyncIterator, Optional
 import logging
 from dotenv import load_dotenv
 
+from .http_client import HttpClient
+from .resilience import RETRYABLE_STATUS, RequestError, ResilientCaller, parse_retry_after
+from .translation_cache import TranslationCache
+
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-class KimiTranslator:
-    """Kimi翻译类"""
+# 批量请求的输出上限：按原文token数估算，不超过模型上下文（moonshot-v1-8k）扣除提示词后的余量
+BATCH_OUTPUT_RATIO = 2  # 译文token数相对原文的倍数（含JSON引号、逗号等开销）
+BATCH_MIN_TOKENS = 1000  # 与单句请求相同
+BATCH_MAX_TOKENS = 4000
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估计token数（英文约每3~4字节一个token）"""
+    return max(1, len(text.encode("utf-8")) // 3)
+
+class BaseTranslator:
+    """
+    翻译引擎基类
+
+    子类至少实现 translate；批量、流式、预热等接口提供逐句实现的默认版本，
+    能原生批量或流式的后端应覆盖对应方法。
+    """
+
+    async def translate(self, text: str) -> Optional[str]:
+        """翻译单句，失败时返回None"""
+        raise NotImplementedError
+
+    async def translate_batch(self, texts: list[str]) -> list[Optional[str]]:
+        """批量翻译（默认逐句并发）"""
+        return list(await asyncio.gather(*(self.translate(text) for text in texts)))
+
+    async def translate_stream(self, text: str) -> AsyncIterator[str]:
+        """流式翻译（默认一次性产出完整结果）"""
+        translated = await self.translate(text)
+        if translated:
+            yield translated
+
+    async def warmup(self, connections: int = 2) -> int:
+        """预热（建立连接或加载模型），返回预热的连接数"""
+        return 0
+
+    async def test_connection(self) -> bool:
+        """测试后端是否可用"""
+        return True
+
+    async def close(self):
+        """释放资源"""
+        pass
+
+
+class KimiTranslator(BaseTranslator):
+    """Kimi翻译类（适用于任何OpenAI兼容的chat completions接口）"""
     
-    def __init__(self, api_key: str = None, base_url: str = None):
+    def __init__(self, api_key: str = None, base_url: str = None, cache: Optional[TranslationCache] = None,
+                 http_client: Optional[HttpClient] = None, resilience: Optional[ResilientCaller] = None,
+                 model: str = None):
         self.api_key = api_key or os.getenv("KIMI_API_KEY")
         self.base_url = base_url or os.getenv("KIMI_BASE_URL", "https://api.moonshot.cn/v1")
         self.target_language = os.getenv("TARGET_LANGUAGE", "zh-CN")
-        self.session = None
+        self.model = model or os.getenv("KIMI_MODEL", "moonshot-v1-8k")
+        self.cache = cache
+        # 未传入共享客户端时自行创建，并在close()中关闭
+        self._owns_http = http_client is None
+        self.http = http_client or HttpClient()
+        # 限流、重试和对冲策略
+        self.resilience = resilience or ResilientCaller()
         
         if not self.api_key:
             raise ValueError("未设置KIMI_API_KEY环境变量")
     
     async def __aenter__(self):
         """异步上下文管理器进入"""
-        self.session = aiohttp.ClientSession()
+        await self.http.get_session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """异步上下文管理器退出"""
-        if self.session:
-            await self.session.close()
+        await self.close()
+
+    async def close(self):
+        """关闭自有的HTTP客户端和翻译缓存（共享客户端由创建者关闭）"""
+        if self._owns_http:
+            await self.http.close()
+        if self.cache:
+            self.cache.close()
     
     async def translate(self, text: str) -> Optional[str]:
         """
@@ -47,79 +112,259 @@ class KimiTranslator:
         """
         if not text or not text.strip():
             return None
+
+        if self.cache:
+            cached = await self.cache.get(text, self.target_language, self.model)
+            if cached is not None:
+                return cached
         
+        return await self._translate_uncached(text)
+
+    async def _translate_uncached(self, text: str) -> Optional[str]:
+        """发送单句翻译请求并写入缓存"""
+        translated_text = await self._post_chat(self._build_payload(text))
+        if not translated_text:
+            return None
+
+        if self.cache:
+            await self.cache.set(text, self.target_language, self.model, translated_text)
+
+        return translated_text
+
+    async def _post_chat(self, payload: dict, hedge: Optional[bool] = None) -> Optional[str]:
+        """
+        发送非流式chat completions请求（经过限流、重试和对冲）
+
+        Returns:
+            模型回复内容，失败时返回None
+        """
         try:
-            if not self.session:
-                self.session = aiohttp.ClientSession()
-            
-            # 构建翻译提示
-            messages = [
-                {
-                    "role": "system",
-                    "content": f"你是一个专业的翻译助手，请将英文翻译成{self._get_language_name(self.target_language)}。要求翻译准确、自然，保留原意。"
-                },
-                {
-                    "role": "user",
-                    "content": text
-                }
-            ]
-            
-            # 设置请求参数 - 使用Kimi模型
-            payload = {
-                "model": "moonshot-v1-8k",  # Kimi模型
-                "messages": messages,
-                "max_tokens": 1000,
-                "temperature": 0.3,
-                "stream": False
-            }
-            
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            # 发送翻译请求
-            async with self.session.post(
+            return await self.resilience.call(
+                lambda timeout: self._post_chat_once(payload, timeout), hedge=hedge
+            )
+        except RequestError as e:
+            logger.error(f"翻译失败: {e}")
+            return None
+
+    async def _post_chat_once(self, payload: dict, timeout: float) -> str:
+        """发送一次非流式请求，失败时抛出RequestError"""
+        session = await self.http.get_session()
+        try:
+            async with session.post(
                 f"{self.base_url}/chat/completions",
                 json=payload,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=10)
+                headers=self._build_headers(),
+                timeout=aiohttp.ClientTimeout(total=timeout)
             ) as response:
-                response_text = await response.text()
-                if response.status == 200:
-                    logger.info(f"翻译API请求成功: {response.status}")
-                else:
-                    logger.error(f"API请求失败: {response.status}, 响应内容: {response_text[:200]}...")
-                    logger.error(f"请求URL: {self.base_url}/chat/completions")
-                    logger.error(f"请求头Authorization: Bearer {self.api_key[:15]}...")
-                
                 if response.status != 200:
-                    return None
-                
+                    raise await self._response_error(response)
                 data = await response.json()
-                translated_text = data["choices"][0]["message"]["content"].strip()
-                
-                return translated_text
-                
+                logger.info(f"翻译API请求成功: {response.status}")
+                return data["choices"][0]["message"]["content"].strip()
         except asyncio.TimeoutError:
-            logger.error("翻译请求超时")
-            return None
+            raise RequestError(f"翻译请求超时({timeout:.1f}s)") from None
+        except aiohttp.ClientError as e:
+            raise RequestError(f"网络错误: {e}") from None
+        except (KeyError, IndexError, ValueError) as e:
+            raise RequestError(f"响应格式错误: {e}", retryable=False) from None
+
+    async def _response_error(self, response: aiohttp.ClientResponse) -> RequestError:
+        """把非200响应转换为RequestError（429和5xx可重试）"""
+        response_text = await response.text()
+        logger.warning(f"API请求失败: {response.status}, 响应内容: {response_text[:200]}...")
+        return RequestError(
+            f"HTTP {response.status}",
+            status=response.status,
+            retryable=response.status in RETRYABLE_STATUS,
+            retry_after=parse_retry_after(response.headers.get("Retry-After")),
+        )
+
+    async def _open_stream(self, payload: dict, timeout: float) -> aiohttp.ClientResponse:
+        """建立一次流式请求，返回状态为200的响应（由调用方负责释放）"""
+        session = await self.http.get_session()
+        try:
+            response = await session.post(
+                f"{self.base_url}/chat/completions",
+                json=payload,
+                headers=self._build_headers(),
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            )
+        except asyncio.TimeoutError:
+            raise RequestError(f"流式翻译请求超时({timeout:.1f}s)") from None
+        except aiohttp.ClientError as e:
+            raise RequestError(f"网络错误: {e}") from None
+        if response.status != 200:
+            try:
+                raise await self._response_error(response)
+            finally:
+                response.release()
+        return response
+
+    async def translate_stream(self, text: str) -> AsyncIterator[str]:
+        """
+        流式翻译：消费服务端SSE事件流，逐步产出累积的部分译文
+
+        建立连接阶段经过限流和重试；开始产出译文后不再重试，中途断开时保留已产出的部分。
+
+        Args:
+            text: 要翻译的英文文本
+
+        Yields:
+            截至当前收到的完整译文前缀（最后一次产出即最终译文）
+        """
+        if not text or not text.strip():
+            return
+
+        if self.cache:
+            cached = await self.cache.get(text, self.target_language, self.model)
+            if cached is not None:
+                yield cached
+                return
+
+        payload = self._build_payload(text, stream=True)
+        started = time.perf_counter()
+        try:
+            response = await self.resilience.call(
+                lambda timeout: self._open_stream(payload, timeout), hedge=False
+            )
+        except RequestError as e:
+            logger.error(f"流式翻译失败: {e}")
+            return
+
+        translated_text = ""
+        try:
+            first_token_at = None
+            async for raw_line in response.content:
+                line = raw_line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue  # 跳过空行、注释和其他SSE字段
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if not delta:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    logger.debug(f"流式翻译首字耗时: {(first_token_at - started) * 1000:.0f}ms")
+                translated_text += delta
+                yield translated_text.lstrip()
+
+            translated_text = translated_text.strip()
+            if self.cache and translated_text:
+                await self.cache.set(text, self.target_language, self.model, translated_text)
+
+        except asyncio.TimeoutError:
+            logger.error("流式翻译请求超时")
         except Exception as e:
-            logger.error(f"翻译失败: {e}")
-            return None
-    
+            logger.error(f"流式翻译失败: {e}")
+        finally:
+            response.release()
+
+    def _build_payload(self, text: str, stream: bool = False) -> dict:
+        """构建chat completions请求体"""
+        # 构建翻译提示
+        messages = [
+            {
+                "role": "system",
+                "content": f"你是一个专业的翻译助手，请将英文翻译成{self._get_language_name(self.target_language)}。要求翻译准确、自然，保留原意。"
+            },
+            {
+                "role": "user",
+                "content": text
+            }
+        ]
+
+        # 设置请求参数 - 使用Kimi模型
+        return {
+            "model": self.model,  # Kimi模型
+            "messages": messages,
+            "max_tokens": 1000,
+            "temperature": 0.3,
+            "stream": stream
+        }
+
+    def _build_headers(self) -> dict:
+        """构建请求头"""
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
     async def translate_batch(self, texts: list[str]) -> list[Optional[str]]:
         """
-        批量翻译文本
+        批量翻译文本：未命中缓存的句子合并为一次请求（JSON数组格式），
+        解析失败时回退为逐条翻译
         
         Args:
             texts: 要翻译的文本列表
             
         Returns:
-            翻译结果列表
+            翻译结果列表（与输入一一对应，空文本对应None）
         """
-        tasks = [self.translate(text) for text in texts if text and text.strip()]
-        return await asyncio.gather(*tasks)
+        results = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                continue
+            if self.cache:
+                results[i] = await self.cache.get(text, self.target_language, self.model)
+            if results[i] is None:
+                pending.append(i)
+
+        if len(pending) == 1:
+            results[pending[0]] = await self._translate_uncached(texts[pending[0]])
+            return results
+        if not pending:
+            return results
+
+        sources = [texts[i] for i in pending]
+        # 批量请求代价高且耗时与单句不同，不做对冲
+        content = await self._post_chat(self._build_batch_payload(sources), hedge=False)
+        if not content:
+            # 请求本身失败（重试后仍超时/限流/5xx）：不拆成逐条请求加重服务压力，交由重试与限流策略处理
+            for i in pending:
+                results[i] = None
+            return results
+        translations = parse_batch_response(content, len(sources))
+
+        if translations is None:
+            logger.warning(f"批量翻译结果解析失败，回退为逐条翻译 ({len(sources)}条)")
+            translations = await asyncio.gather(*(self._translate_uncached(text) for text in sources))
+        elif self.cache:
+            for source, translated in zip(sources, translations):
+                if translated:
+                    await self.cache.set(source, self.target_language, self.model, translated)
+
+        for i, translated in zip(pending, translations):
+            results[i] = translated
+        return results
+
+    def _build_batch_payload(self, texts: list[str]) -> dict:
+        """构建批量翻译请求体：输入和输出都是JSON字符串数组"""
+        messages = [
+            {
+                "role": "system",
+                "content": f"你是一个专业的翻译助手。你会收到一个JSON字符串数组，请将每一项英文翻译成"
+                           f"{self._get_language_name(self.target_language)}，要求翻译准确、自然，保留原意。"
+                           f"只返回一个与输入等长、顺序一致的JSON字符串数组，不要添加任何解释。"
+            },
+            {
+                "role": "user",
+                "content": json.dumps(texts, ensure_ascii=False)
+            }
+        ]
+        return {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": min(
+                BATCH_MAX_TOKENS,
+                max(BATCH_MIN_TOKENS, BATCH_OUTPUT_RATIO * sum(estimate_tokens(text) for text in texts))
+            ),
+            "temperature": 0.3,
+            "stream": False
+        }
     
     def _get_language_name(self, lang_code: str) -> str:
         """获取语言名称"""
@@ -135,14 +380,21 @@ class KimiTranslator:
         }
         return language_map.get(lang_code, lang_code)
     
+    async def warmup(self, connections: int = 2) -> int:
+        """预热到API的连接，使第一次翻译不必等待TCP/TLS握手"""
+        return await self.http.warmup(
+            f"{self.base_url}/models",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            connections=connections
+        )
+
     async def test_connection(self) -> bool:
         """测试API连接"""
         try:
-            if not self.session:
-                self.session = aiohttp.ClientSession()
+            session = await self.http.get_session()
             
             headers = {"Authorization": f"Bearer {self.api_key}"}
-            async with self.session.get(
+            async with session.get(
                 f"{self.base_url}/models",
                 headers=headers,
                 timeout=aiohttp.ClientTimeout(total=5)
@@ -153,10 +405,141 @@ class KimiTranslator:
             logger.error(f"连接测试失败: {e}")
             return False
 
-class SimpleTranslator:
-    """简单翻译类，用于演示和测试"""
+def parse_batch_response(content: str, expected: int) -> Optional[list[str]]:
+    """
+    解析批量翻译的回复
+
+    优先按JSON数组解析（容忍```代码块包裹和前后说明文字），
+    其次按"1. xxx"编号行解析；条数不符时返回None。
+    """
+    text = content.strip()
+    start, end = text.find("["), text.rfind("]")
+    if start != -1 and end > start:
+        try:
+            items = json.loads(text[start:end + 1])
+            if isinstance(items, list) and len(items) == expected:
+                return [str(item).strip() for item in items]
+        except json.JSONDecodeError:
+            pass
+
+    numbered = re.findall(r"^\s*(\d+)[.、)）:：]\s*(.+?)\s*$", text, flags=re.MULTILINE)
+    if len(numbered) == expected and [int(n) for n, _ in numbered] == list(range(1, expected + 1)):
+        return [line for _, line in numbered]
+    return None
+
+
+class BatchingTranslator:
+    """
+    微批量翻译器
+
+    包装任意带 translate_batch 的翻译器：并发到达的 translate 调用在 batch_window 内合并，
+    达到 max_items 条或 token_budget 时立即发送，一次请求翻译多句，再按顺序分发结果。
+    batch_window 为0时只合并同一轮事件循环内发起的调用，不额外增加延迟。
+    """
+
+    def __init__(self, translator, batch_window: float = 0.0, max_items: int = 8, token_budget: int = 600):
+        self.translator = translator
+        self.batch_window = batch_window
+        self.max_items = max_items
+        self.token_budget = token_budget
+        self.cache = getattr(translator, "cache", None)
+        self.http = getattr(translator, "http", None)
+        self.resilience = getattr(translator, "resilience", None)
+        self._pending = []  # [(text, future)]
+        self._pending_tokens = 0
+        self._flush_handle = None
+        self._sending = set()  # 已发出、尚未完成的批次任务
+
+        # 统计计数
+        self.batches = 0
+        self.items = 0
+
+    estimate_tokens = staticmethod(estimate_tokens)
+
+    async def translate(self, text: str) -> Optional[str]:
+        """加入当前批次并等待结果"""
+        if not text or not text.strip():
+            return None
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        tokens = self.estimate_tokens(text)
+        if self._pending and self._pending_tokens + tokens > self.token_budget:
+            self._flush()
+
+        self._pending.append((text, future))
+        self._pending_tokens += tokens
+
+        if len(self._pending) >= self.max_items or self._pending_tokens >= self.token_budget:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """发送当前批次"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch):
+        texts = [text for text, _ in batch]
+        try:
+            results = await self.translator.translate_batch(texts)
+        except Exception as e:
+            logger.error(f"批量翻译失败: {e}")
+            results = [None] * len(batch)
+
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def translate_batch(self, texts: list[str]) -> list[Optional[str]]:
+        """批量翻译（直接交给底层翻译器）"""
+        return await self.translator.translate_batch(texts)
+
+    async def translate_stream(self, text: str) -> AsyncIterator[str]:
+        """流式翻译不做合并，直接交给底层翻译器"""
+        async for partial in self.translator.translate_stream(text):
+            yield partial
+
+    async def warmup(self, connections: int = 2) -> int:
+        return await self.translator.warmup(connections)
+
+    async def test_connection(self) -> bool:
+        return await self.translator.test_connection()
+
+    async def close(self):
+        # 先发出剩余批次并等待所有在途批次完成，再关闭底层翻译器的连接
+        self._flush()
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+        await self.translator.close()
+
+    def get_stats(self) -> dict:
+        """获取批量统计"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+
+
+class SimpleTranslator(BaseTranslator):
+    """简单翻译类，用于演示和测试（结果确定，可用 latency 模拟API耗时）"""
     
-    def __init__(self):
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
         self.translation_map = {
             "hello": "你好",
             "world": "世界",
@@ -174,6 +557,9 @@ class SimpleTranslator:
         """简单翻译实现"""
         if not text or not text.strip():
             return None
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
         
         text_lower = text.lower().strip()
         
@@ -184,11 +570,3 @@ class SimpleTranslator:
         
         # 返回原始文本作为占位符
         return f"[翻译: {text}]"
-    
-    async def translate_batch(self, texts: list[str]) -> list[Optional[str]]:
-        """批量翻译"""
-        return [await self.translate(text) for text in texts]
-    
-    async def test_connection(self) -> bool:
-        """测试连接"""
-        return True
\ No newline at end of file
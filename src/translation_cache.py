@@ -0,0 +1,160 @@
+"""
+翻译缓存模块
+内存LRU缓存（容量和过期时间限制）+ 可选的SQLite持久化层
+"""
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationCache:
+    """
+    翻译结果缓存
+
+    键由归一化后的原文、目标语言和模型名组成。内存层命中只需一次字典查找；
+    配置 db_path 后，未命中内存的查询会继续查找SQLite，写入在后台线程中完成，
+    不阻塞事件循环。
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 24 * 3600, db_path: Optional[str] = None):
+        self.max_size = max_size
+        self.ttl = ttl  # 过期时间（秒），0表示永不过期
+        self._entries = OrderedDict()  # key -> (译文, 写入时间)
+
+        self.db_path = db_path
+        self._db = None
+        self._executor = None
+        if db_path:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="translation-cache")
+            # 所有数据库操作都在同一个后台线程中串行执行
+            try:
+                self._executor.submit(self._open_db).result()
+            except sqlite3.Error as e:
+                logger.error(f"打开翻译缓存数据库失败，仅使用内存缓存: {e}")
+                self._executor.shutdown(wait=False)
+                self._executor = None
+                self._db = None
+
+        # 统计计数
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """归一化原文：合并空白、忽略大小写"""
+        return " ".join(text.split()).casefold()
+
+    def make_key(self, text: str, target_language: str, model: str) -> str:
+        """生成缓存键"""
+        raw = f"{target_language}\x1f{model}\x1f{self.normalize(text)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, text: str, target_language: str, model: str) -> Optional[str]:
+        """
+        查询缓存
+
+        Returns:
+            缓存的译文或None
+        """
+        key = self.make_key(text, target_language, model)
+        value = self._get_memory(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if self._db is not None:
+            loop = asyncio.get_running_loop()
+            row = await loop.run_in_executor(self._executor, self._db_get, key)
+            if row is not None and not self._expired(row[1]):
+                self._set_memory(key, row[0], row[1])
+                self.disk_hits += 1
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    async def set(self, text: str, target_language: str, model: str, translated: str):
+        """写入缓存（持久化层在后台线程中写入）"""
+        key = self.make_key(text, target_language, model)
+        created_at = time.time()
+        self._set_memory(key, translated, created_at)
+        if self._db is not None:
+            self._executor.submit(self._db_put, key, translated, created_at)
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry[1]):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _set_memory(self, key: str, value: str, created_at: float):
+        self._entries[key] = (value, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _expired(self, created_at: float) -> bool:
+        return bool(self.ttl) and time.time() - created_at > self.ttl
+
+    def _open_db(self):
+        """打开数据库并建表（在后台线程中执行）"""
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key TEXT PRIMARY KEY, translated TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        if self.ttl:
+            self._db.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl,))
+        self._db.commit()
+        logger.info(f"翻译缓存数据库已打开: {self.db_path}")
+
+    def _db_get(self, key: str):
+        return self._db.execute(
+            "SELECT translated, created_at FROM translations WHERE key = ?", (key,)
+        ).fetchone()
+
+    def _db_put(self, key: str, translated: str, created_at: float):
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO translations (key, translated, created_at) VALUES (?, ?, ?)",
+                (key, translated, created_at)
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"写入翻译缓存失败: {e}")
+
+    def close(self):
+        """等待后台写入完成并关闭数据库"""
+        if self._executor:
+            self._executor.submit(self._db.close).result()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        """获取命中统计"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
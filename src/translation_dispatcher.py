@@ -0,0 +1,149 @@
+"""
+翻译调度模块
+多个翻译请求并发执行，结果按句子顺序交付，被后续句子超越的过期请求会被取消
+"""
+import asyncio
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from .pipeline import StageStats, Utterance
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationDispatcher:
+    """
+    并发翻译调度器
+
+    - 最多 max_in_flight 个请求同时进行，达到上限时 submit 会等待（向上游施加背压）
+    - 每句按提交顺序编号，先完成的结果暂存，等前面的句子完成后再按顺序交付
+    - 若后面的句子已完成，而最早的句子超过 reorder_timeout 仍未返回，则取消该请求，
+      避免一个慢请求拖住后续字幕（它的译文到达时也早已过时）
+    """
+
+    def __init__(self, translator, deliver: Callable[[Utterance], Awaitable[None]],
+                 max_in_flight: int = 3, reorder_timeout: float = 1.5,
+                 stats: Optional[StageStats] = None):
+        self.translator = translator
+        self.deliver = deliver
+        self.max_in_flight = max_in_flight
+        self.reorder_timeout = reorder_timeout
+        self.stats = stats
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._sequence = itertools.count()
+        self._next_seq = 0  # 下一个应交付的序号
+        self._in_flight: Dict[int, asyncio.Task] = {}
+        self._done: Dict[int, Utterance] = {}  # 已完成、等待按顺序交付的结果
+        self._expire_handle = None
+        self._expire_seq = None
+        self._delivering = False
+        self._closed = False
+
+        # 统计计数
+        self.submitted = 0
+        self.delivered = 0
+        self.cancelled = 0
+        self.reordered = 0  # 乱序完成、需要暂存等待的结果数
+
+    async def submit(self, utterance: Utterance):
+        """提交一句翻译（在途请求达到上限时等待）"""
+        await self._semaphore.acquire()
+        seq = next(self._sequence)
+        self.submitted += 1
+        self._in_flight[seq] = asyncio.get_running_loop().create_task(self._run(seq, utterance))
+
+    async def _run(self, seq: int, utterance: Utterance):
+        started = time.perf_counter()
+        try:
+            utterance.translated = await self.translator.translate(utterance.text)
+            utterance.spans["translate"] = time.perf_counter() - started
+            if self.stats:
+                self.stats.record(utterance.spans["translate"])
+        except asyncio.CancelledError:
+            utterance.translated = None
+            self.cancelled += 1
+        except Exception as e:
+            logger.error(f"翻译失败: {e}")
+            utterance.translated = None
+        finally:
+            self._in_flight.pop(seq, None)
+            self._semaphore.release()
+
+        if self._closed:
+            return
+        self._done[seq] = utterance
+        if seq != self._next_seq:
+            self.reordered += 1
+        await self._deliver_ready()
+
+    async def _deliver_ready(self):
+        """按顺序交付所有已就绪的结果"""
+        if self._delivering:
+            return  # 已有协程在交付，它会继续处理新就绪的结果
+        self._delivering = True
+        try:
+            while self._next_seq in self._done:
+                utterance = self._done.pop(self._next_seq)
+                self._next_seq += 1
+                if utterance.translated:
+                    self.delivered += 1
+                    await self.deliver(utterance)
+        finally:
+            self._delivering = False
+        self._schedule_expire()
+
+    def _schedule_expire(self):
+        """队首请求阻塞了已完成的后续结果时，启动超时取消计时（同一队首只计时一次）"""
+        blocked = bool(self._done) and self._next_seq in self._in_flight
+        if self._expire_handle is not None:
+            if blocked and self._expire_seq == self._next_seq:
+                return
+            self._expire_handle.cancel()
+            self._expire_handle = None
+        if blocked:
+            self._expire_seq = self._next_seq
+            self._expire_handle = asyncio.get_running_loop().call_later(
+                self.reorder_timeout, self._expire_head, self._next_seq
+            )
+
+    def _expire_head(self, seq: int):
+        """取消阻塞队首的过期请求"""
+        self._expire_handle = None
+        task = self._in_flight.get(seq)
+        if task is not None and self._done:
+            logger.warning(f"翻译请求超过 {self.reorder_timeout:.1f}s 未返回且已被后续句子超越，取消")
+            task.cancel()
+
+    async def drain(self):
+        """等待全部在途请求完成并交付（输入结束时调用）"""
+        while self._in_flight:
+            await asyncio.gather(*list(self._in_flight.values()), return_exceptions=True)
+
+    @property
+    def in_flight(self) -> int:
+        """在途请求数"""
+        return len(self._in_flight)
+
+    async def close(self):
+        """取消全部在途请求"""
+        self._closed = True
+        if self._expire_handle is not None:
+            self._expire_handle.cancel()
+            self._expire_handle = None
+        tasks = list(self._in_flight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        """获取调度统计"""
+        return {
+            "in_flight": self.in_flight,
+            "waiting": len(self._done),
+            "submitted": self.submitted,
+            "delivered": self.delivered,
+            "cancelled": self.cancelled,
+            "reordered": self.reordered,
+        }
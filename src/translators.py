@@ -0,0 +1,93 @@
+"""
+翻译引擎注册表
+按 TRANSLATION_SERVICE 选择翻译后端，各后端提供相同的异步 translate/translate_batch 接口
+"""
+import os
+from typing import Callable, Dict, Optional
+
+from .http_client import HttpClient
+from .resilience import AdaptiveRateLimiter, ResilientCaller, RetryPolicy
+from .translation import BaseTranslator, KimiTranslator, SimpleTranslator
+from .translation_cache import TranslationCache
+
+# 名称 -> 工厂函数(cache, http_client, resilience) -> 翻译器
+TRANSLATORS: Dict[str, Callable[..., BaseTranslator]] = {}
+
+
+def register_translator(name: str):
+    """注册翻译后端的装饰器"""
+    def decorator(factory: Callable[..., BaseTranslator]):
+        TRANSLATORS[name] = factory
+        return factory
+    return decorator
+
+
+def create_translator(service: str, cache: Optional[TranslationCache] = None,
+                      http_client: Optional[HttpClient] = None,
+                      resilience: Optional[ResilientCaller] = None) -> BaseTranslator:
+    """
+    创建翻译器
+
+    Args:
+        service: 后端名称（见 TRANSLATORS）
+        cache: 翻译缓存
+        http_client: 共享HTTP客户端（网络后端使用）
+        resilience: 限流与重试策略（远程API后端使用）
+    """
+    factory = TRANSLATORS.get(service.lower())
+    if factory is None:
+        raise ValueError(f"未知的翻译服务: {service}，可选: {', '.join(sorted(TRANSLATORS))}")
+    return factory(cache=cache, http_client=http_client, resilience=resilience)
+
+
+@register_translator("kimi")
+def _create_kimi(cache, http_client, resilience) -> BaseTranslator:
+    return KimiTranslator(cache=cache, http_client=http_client, resilience=resilience)
+
+
+@register_translator("openai")
+def _create_openai(cache, http_client, resilience) -> BaseTranslator:
+    return KimiTranslator(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+        model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+        cache=cache,
+        http_client=http_client,
+        resilience=resilience,
+    )
+
+
+@register_translator("local")
+def _create_local_server(cache, http_client, resilience) -> BaseTranslator:
+    """本机OpenAI兼容服务（Ollama、llama.cpp server、vLLM等）：无配额限制，只做快速重试"""
+    return KimiTranslator(
+        api_key=os.getenv("LOCAL_TRANSLATION_API_KEY", "local"),
+        base_url=os.getenv("LOCAL_TRANSLATION_BASE_URL", "http://127.0.0.1:11434/v1"),
+        model=os.getenv("LOCAL_TRANSLATION_MODEL", "qwen2.5:1.5b"),
+        cache=cache,
+        http_client=http_client,
+        resilience=ResilientCaller(
+            limiter=AdaptiveRateLimiter(rate=1000, burst=1000),
+            policy=RetryPolicy(max_attempts=2, base_delay=0.05, deadline=30.0, attempt_timeout=30.0),
+        ),
+    )
+
+
+@register_translator("ctranslate2")
+def _create_ctranslate2(cache, http_client, resilience) -> BaseTranslator:
+    from .local_translation import CTranslate2Translator  # 可选依赖，按需导入
+
+    return CTranslate2Translator(
+        model_path=os.getenv("CT2_MODEL_PATH", "models/opus-mt-en-zh-ct2"),
+        tokenizer=os.getenv("CT2_TOKENIZER") or None,
+        device=os.getenv("CT2_DEVICE", "cpu"),
+        compute_type=os.getenv("CT2_COMPUTE_TYPE", "int8"),
+        intra_threads=int(os.getenv("CT2_THREADS", 0)),
+        beam_size=int(os.getenv("CT2_BEAM_SIZE", 2)),
+        cache=cache,
+    )
+
+
+@register_translator("simple")
+def _create_simple(cache, http_client, resilience) -> BaseTranslator:
+    return SimpleTranslator(latency=int(os.getenv("SIMPLE_TRANSLATION_LATENCY_MS", 0)) / 1000)
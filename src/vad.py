@@ -0,0 +1,165 @@
+"""
+语音活动检测模块
+在转录之前丢弃静音帧，并在语音边界处切分语句，避免静音音频进入Whisper推理
+"""
+from collections import deque
+from typing import Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import webrtcvad
+except ImportError:  # webrtcvad为可选依赖
+    webrtcvad = None
+
+
+class VoiceActivityDetector:
+    """
+    语音活动检测器
+
+    以固定时长的帧为单位判断是否为语音：
+    - energy: 向量化计算每帧RMS能量与过零率，噪声底噪自适应
+    - webrtc: 使用webrtcvad（需要安装webrtcvad）
+
+    语音结束后保留 hangover_ms 的拖尾，拖尾耗尽时视为一句话结束；
+    语音开始前保留 preroll_ms 的静音，避免截掉单词起始的辅音。
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 30, backend: str = "energy",
+                 energy_threshold: float = 0.01, zcr_threshold: float = 0.25,
+                 hangover_ms: int = 300, preroll_ms: int = 150, aggressiveness: int = 2):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.energy_threshold = energy_threshold
+        self.zcr_threshold = zcr_threshold
+        self.noise_floor = energy_threshold / 3  # 底噪估计（RMS）
+        self.noise_ratio = 3.0  # 语音能量需高于底噪的倍数
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.preroll_frames = max(0, preroll_ms // frame_ms)
+
+        self.backend = backend
+        self._webrtc = None
+        if backend == "webrtc":
+            if webrtcvad is None:
+                logger.warning("未安装webrtcvad，回退到能量检测")
+                self.backend = "energy"
+            else:
+                self._webrtc = webrtcvad.Vad(aggressiveness)
+
+        self._remainder = np.zeros(0, dtype=np.float32)  # 不足一帧的剩余样本
+        self._preroll = deque(maxlen=self.preroll_frames or 1)
+        self._hangover = 0
+        self.in_speech = False
+        self.samples_received = 0  # 累计输入样本数
+        self.speech_end_sample = 0  # 最近一次输出的语音数据末尾在输入流中的位置（样本序号）
+
+        # 统计计数
+        self.frames_total = 0
+        self.frames_dropped = 0
+        self.utterances = 0
+
+    def process(self, audio: np.ndarray) -> Tuple[Optional[np.ndarray], bool]:
+        """
+        处理一个音频块
+
+        Args:
+            audio: 一维float32音频数据
+
+        Returns:
+            (需要送入转录的语音数据或None, 本块内是否有一句话结束)
+        """
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        first_sample = self.samples_received - self._remainder.size  # 本次第一帧在输入流中的位置
+        self.samples_received += audio.size
+        if self._remainder.size:
+            audio = np.concatenate([self._remainder, audio])
+
+        n_frames = audio.size // self.frame_size
+        self._remainder = audio[n_frames * self.frame_size:].copy()
+        if n_frames == 0:
+            return None, False
+
+        frames = audio[:n_frames * self.frame_size].reshape(n_frames, self.frame_size)
+        speech_flags = self._classify(frames)
+
+        kept = []
+        utterance_ended = False
+        for index, (frame, is_speech) in enumerate(zip(frames, speech_flags)):
+            self.frames_total += 1
+            if is_speech:
+                if not self.in_speech:
+                    self.in_speech = True
+                    kept.extend(self._preroll)
+                    # 预卷帧在静音阶段已计为丢弃，这里重新计入
+                    self.frames_dropped -= len(self._preroll)
+                    self._preroll.clear()
+                self._hangover = self.hangover_frames
+                kept.append(frame)
+                self.speech_end_sample = first_sample + (index + 1) * self.frame_size
+            elif self.in_speech:
+                self._hangover -= 1
+                kept.append(frame)
+                self.speech_end_sample = first_sample + (index + 1) * self.frame_size
+                if self._hangover <= 0:
+                    self.in_speech = False
+                    self.utterances += 1
+                    utterance_ended = True
+            else:
+                self.frames_dropped += 1
+                if self.preroll_frames:
+                    self._preroll.append(frame.copy())
+
+        speech = np.concatenate(kept) if kept else None
+        return speech, utterance_ended
+
+    def _classify(self, frames: np.ndarray) -> np.ndarray:
+        """逐帧判断是否为语音，返回布尔数组"""
+        if self._webrtc is not None:
+            pcm = (np.clip(frames, -1.0, 1.0) * 32767).astype(np.int16)
+            return np.array([self._webrtc.is_speech(frame.tobytes(), self.sample_rate) for frame in pcm])
+
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        threshold = max(self.energy_threshold, self.noise_floor * self.noise_ratio)
+        # 浊音靠能量判断；清音（摩擦音）能量较低但过零率高
+        is_speech = (rms >= threshold) | ((rms >= threshold * 0.5) & (zcr >= self.zcr_threshold))
+
+        # 用非语音帧缓慢更新底噪估计
+        silent = rms[~is_speech]
+        if silent.size:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * float(np.mean(silent))
+        return is_speech
+
+    def reset(self):
+        """重置检测状态（保留统计计数）"""
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._preroll.clear()
+        self._hangover = 0
+        self.in_speech = False
+
+    @property
+    def dropped_seconds(self) -> float:
+        """被丢弃的静音时长（秒）"""
+        return self.frames_dropped * self.frame_size / self.sample_rate
+
+    def get_stats(self, realtime_factor: Optional[float] = None) -> dict:
+        """
+        获取统计信息
+
+        Args:
+            realtime_factor: 转录器实测的每秒音频推理耗时，用于估算节省的推理时间
+        """
+        total_seconds = self.frames_total * self.frame_size / self.sample_rate
+        return {
+            "backend": self.backend,
+            "total_seconds": total_seconds,
+            "dropped_seconds": self.dropped_seconds,
+            "dropped_ratio": self.dropped_seconds / total_seconds if total_seconds else 0.0,
+            "utterances": self.utterances,
+            "saved_inference_seconds": self.dropped_seconds * (realtime_factor or 0.0),
+        }